@@ -166,6 +166,10 @@ class TouchEventLoop(object):
             elif event == 'up':
                 wid.dispatch_event('on_touch_up', touch)
 
+            # the widget state can be changed by the touch
+            if hasattr(wid, 'mark_dirty'):
+                wid.mark_dirty()
+
             touch.grab_current = None
 
             if wid != root_window and root_window is not None:
@@ -47,13 +47,25 @@ def eventdispatcher_dispatch_event(self, event_type, *args):
 # ----------------------------------------------------------------------------
 
 def widget_on_update(self):
-    for w in self.children[:]:
-        w.dispatch_event('on_update')
+    children = self._children
+    if children:
+        for w in children[:]:
+            w.dispatch_event('on_update')
 
 def widget_on_draw(self):
-    self.draw()
-    if self.draw_children:
-        for w in self.children[:]:
+    if self._texture_cache is not None:
+        if not self.is_culled():
+            self.draw_texture_cache()
+        return
+    if not self.is_culled():
+        retained = self._retained
+        if retained is not None:
+            retained.draw(self)
+        else:
+            self.draw()
+    children = self._children
+    if self.draw_children and children:
+        for w in children[:]:
             w.dispatch_event('on_draw')
 
 def widget_collide_point(self, double x, double y):
@@ -1424,7 +1424,7 @@ cdef class CSSRectangle(GraphicInstruction):
         * draw-background (bool)
         * draw-border (bool)
     '''
-    cdef dict _style
+    cdef object _style
     cdef str _prefix
     cdef str _state
     cdef list _objects
@@ -11,7 +11,7 @@ from pymt.logger import pymt_logger
 from pymt import pymt_home_dir, pymt_config_fn, logger
 
 # Version number of current configuration format
-PYMT_CONFIG_VERSION = 16
+PYMT_CONFIG_VERSION = 18
 
 #: PyMT configuration object
 pymt_config = None
@@ -175,6 +175,14 @@ if not 'PYMT_DOC_INCLUDE' in os.environ:
             # ability to rotate the window
             pymt_config.setdefault('graphics', 'rotation', '0')
 
+        elif pymt_config_version == 16:
+            # additional directories for the font index
+            pymt_config.setdefault('pymt', 'font_dirs', '')
+
+        elif pymt_config_version == 17:
+            # record the drawing of widgets in display lists
+            pymt_config.setdefault('graphics', 'retained_draw', '0')
+
         else:
             # for future.
             break
@@ -2,18 +2,99 @@
 Text: Handle drawing of text
 '''
 
-__all__ = ('LabelBase', 'Label')
+__all__ = ('LabelBase', 'LabelLayout', 'Label')
 
 import pymt
 import re
 import os
+import time
+import threading
+import collections
+from Queue import Queue
 from pymt.core import core_select_lib
 from pymt.baseobject import BaseObject
+from pymt.cache import Cache
+from pymt.clock import getClock
+from pymt.logger import pymt_logger
+from pymt.core.text.fonts import pymt_fonts, font_extensions
 
 DEFAULT_FONT = 'Liberation Sans,Bitstream Vera Sans,Free Sans,Arial, Sans'
 
 label_font_cache = {}
 
+# create a cache for text layout
+if not 'PYMT_DOC' in os.environ:
+    Cache.register('pymt.textlayout', timeout=5., limit=1000)
+
+# asynchronous rendering: labels are measured and laid out in the main
+# thread, rasterized in a worker thread, and textures are uploaded from the
+# main thread. The worker never touch the Cache or the label size, and
+# render from a copy of the label options, in its own surface.
+_async_queue = Queue()
+_async_done = collections.deque()
+_async_worker = None
+
+def _async_run():
+    while True:
+        label, job, layout, size, options = _async_queue.get()
+        if label._async != job:
+            continue
+        try:
+            data = label._render_layout(layout, size, options)
+        except Exception:
+            pymt_logger.exception('Label: unable to render <%s>' % label.label)
+            continue
+        _async_done.append((label, job, data))
+
+def _async_upload(dt):
+    # upload textures until the frame budget is reached
+    start = time.time()
+    while _async_done:
+        label, job, data = _async_done.popleft()
+        if label._async != job:
+            continue
+        label._async = None
+        label._update_texture(data)
+        if time.time() - start > LabelBase.async_budget:
+            break
+
+def _async_start():
+    global _async_worker
+    if _async_worker is not None:
+        return
+    _async_worker = threading.Thread(target=_async_run,
+                                     name='LabelAsyncRenderer')
+    _async_worker.daemon = True
+    _async_worker.start()
+    getClock().schedule_interval(_async_upload, 0)
+
+class LabelLayout(object):
+    '''Computed line layout of a label text.
+
+    A layout is shared between every label having the same text, font, width
+    constraint and alignment. It's used for both measure and render pass.
+
+    :Parameters:
+        `text`: unicode
+            Text used to compute the layout
+        `lines`: list
+            List of ((width, height), glyphs) for each line
+        `size`: tuple
+            Width/height needed to render all the lines
+        `resume`: list
+            Layout state saved at each line start, used to resume the layout
+            when text is appended.
+    '''
+
+    __slots__ = ('key', 'text', 'lines', 'size', 'resume')
+
+    def __init__(self, key, text, lines, size, resume=None):
+        self.key = key
+        self.text = text
+        self.lines = lines
+        self.size = size
+        self.resume = resume
+
 class LabelBase(BaseObject):
     '''Core text label.
     This is the abstract class used for different backend to render text.
@@ -62,12 +143,30 @@ class LabelBase(BaseObject):
             100), the drawing will not go outside the viewport, but start from
             (0, 0). 
             If you want to draw another part of the texture, use `viewport_pos`.
+        `async`: bool, default to False
+            If True, the size of the label is computed immediately, but the
+            text is rasterized in a worker thread, and the texture is uploaded
+            in a later frame. Until then, nothing is drawn, or the
+            `async_placeholder` if set.
+        `async_placeholder`: list, default to None
+            Color of the rectangle drawn while the label is not yet rendered.
     '''
 
-    __slots__ = ('options', 'texture', '_label', 'color', 'usersize')
+    __slots__ = ('options', 'texture', '_label', 'color', 'usersize',
+                 '_layout', '_async')
 
     _cache_glyphs = {}
 
+    #: Maximum time (in seconds) spent each frame to upload textures of
+    #: asynchronous labels. At least one texture is uploaded per frame.
+    async_budget = 0.004
+
+    #: Indicate if the label can be rasterized in the worker thread. If
+    #: False, the `async` option is ignored.
+    async_capable = True
+
+    _async_counter = 0
+
     def __init__(self, label, **kwargs):
         kwargs.setdefault('font_size', 12)
         kwargs.setdefault('font_name', DEFAULT_FONT)
@@ -84,6 +183,8 @@ class LabelBase(BaseObject):
         kwargs.setdefault('color', (1, 1, 1, 1))
         kwargs.setdefault('viewport_size', None)
         kwargs.setdefault('viewport_pos', None)
+        kwargs.setdefault('async', False)
+        kwargs.setdefault('async_placeholder', None)
 
         padding = kwargs.get('padding', None)
         if not kwargs.get('padding_x', None):
@@ -108,6 +209,8 @@ class LabelBase(BaseObject):
         super(LabelBase, self).__init__(**kwargs)
 
         self._label     = None
+        self._layout    = None
+        self._async     = None
 
         self.color      = kwargs.get('color')
         self.usersize   = kwargs.get('size')
@@ -118,16 +221,14 @@ class LabelBase(BaseObject):
 
         if 'font_name' in self.options:
             fontname = self.options['font_name']
-            if fontname in label_font_cache:
-                if label_font_cache[fontname] is not None:
-                    self.options['font_name'] = label_font_cache[fontname]
-            else:
-                filename = os.path.join(pymt.pymt_data_dir, fontname)
-                if os.path.exists(filename):
-                    label_font_cache[fontname] = filename
-                    self.options['font_name'] = filename
-                else:
-                    label_font_cache[fontname] = None
+            if fontname not in label_font_cache:
+                # resolve font filename from the font index
+                label_font_cache[fontname] = None
+                if os.path.splitext(fontname)[1].lower() in font_extensions:
+                    label_font_cache[fontname] = \
+                            pymt_fonts.get_filename(fontname)
+            if label_font_cache[fontname] is not None:
+                self.options['font_name'] = label_font_cache[fontname]
 
         self.label      = label
 
@@ -135,168 +236,262 @@ class LabelBase(BaseObject):
         '''Return a tuple with (width, height) for a text.'''
         return (0, 0)
 
-    def _render_begin(self):
+    def _render_begin(self, size, options):
+        # create the surface, and return the rendering context given to
+        # _render_text() and _render_end(). Nothing is stored in the label:
+        # the label can be measured while the worker thread render it.
         pass
 
-    def _render_text(self, text, x, y):
+    def _render_text(self, context, text, x, y):
         pass
 
-    def _render_end(self):
+    def _render_end(self, context, size):
         pass
 
-    def render(self, real=False):
-        '''Return a tuple(width, height) to create the image
-        with the user constraints.
+    def get_layout(self):
+        '''Return the :class:`LabelLayout` of the current label.
 
-        2 differents methods are used:
-          * if user don't set width, splitting line
-            and calculate max width + height
-          * if user set a width, blit per glyph
+        The layout is cached, and shared with every label using the same
+        text, font, width constraint and alignment. If the text was only
+        appended since the last layout, only the last line is computed again.
         '''
+        label = self.label
+        key = (label, self.fontid, self.usersize[0], self.options['halign'])
+        layout = Cache.get('pymt.textlayout', key)
+        if layout is None:
+            # can we resume from the previous layout ?
+            previous = self._layout
+            if previous is None or previous.key[1:] != key[1:] or \
+               len(previous.text) >= len(label) or \
+               not label.startswith(previous.text):
+                previous = None
+            if self.usersize[0] is None:
+                layout = self._layout_lines(key, previous)
+            else:
+                layout = self._layout_words(key, previous)
+            Cache.append('pymt.textlayout', key, layout)
+        self._layout = layout
+        return layout
+
+    def _layout_lines(self, key, previous=None):
+        # no width specified, faster method: split only on new lines
+        text = key[0]
+        lines = []
+        offset = 0
+        if previous is not None:
+            lines = previous.lines[:-1]
+            offset = previous.text.rfind('\n') + 1
+        for line in text[offset:].split('\n'):
+            lines.append((self.get_extents(line), line))
+        w = max([int(size[0]) for size, line in lines])
+        h = sum([int(size[1]) for size, line in lines])
+        return LabelLayout(key, text, lines, (w, h))
+
+    def _layout_words(self, key, previous=None):
+        # constraint, split line on words.
+        text, fontid, uw = key[:3]
+
+        # precalculate id/name
+        if not fontid in self._cache_glyphs:
+            self._cache_glyphs[fontid] = {}
+        cache = self._cache_glyphs[fontid]
+
+        # initial state: (offset, number of lines, lw, lh, x, glyphs)
+        state = (0, 0, 0, 0, 0, ())
+        resume = []
+        if previous is not None:
+            # resume from the last line started before the last word: the
+            # height of a wrapped line depends on the word that follow it.
+            sep = max(previous.text.rfind(' '), previous.text.rfind('\n'))
+            for state in reversed(previous.resume):
+                if state[0] <= sep:
+                    break
+            resume = [x for x in previous.resume if x[0] < state[0]]
+        offset, nlines, lw, lh, x, glyphs = state
+        lines = list(previous.lines[:nlines]) if previous else []
+        glyphs = list(glyphs)
+        resume.append(state)
+
+        # verify that each glyph have size
+        for glyph in set(text[offset:]):
+            if not glyph in cache:
+                cache[glyph] = self.get_extents(glyph)
+
+        for word in re.split(r'( |\n)', text[offset:]):
+            wordoffset = offset
+            offset += len(word)
+
+            # calculate the word width
+            ww, wh = 0, 0
+            for glyph in word:
+                gw, gh = cache[glyph]
+                ww += gw
+                wh = max(gh, wh)
+
+            # is the word fit on the uw ?
+            if ww > uw:
+                # push the current line first, otherwise it's lost
+                if lw != 0:
+                    lines.append(((lw, max(wh, lh)), glyphs))
+                    glyphs = []
+                lines.append(((ww, wh), word))
+                lw = lh = x = 0
+                resume.append((offset, len(lines), 0, 0, 0, ()))
+                continue
 
-        uw, uh = self.usersize
-        w, h = 0, 0
-        x, y = 0, 0
-        if real:
-            self._render_begin()
+            # get the maximum height for this line
+            lh = max(wh, lh)
 
-        # no width specified, faster method
-        if uw is None:
-            for line in self.label.split('\n'):
-                lw, lh = self.get_extents(line)
-                if real:
-                    x = 0
-                    if self.options['halign'] == 'center':
-                        x = int((self.width - lw) / 2.)
-                    elif self.options['halign'] == 'right':
-                        x = int(self.width - lw)
-                    self._render_text(line, x, y)
-                    y += int(lh)
-                else:
-                    w = max(w, int(lw))
-                    h += int(lh)
+            # is the word fit on the line ?
+            if (word == '\n' or x + ww > uw) and lw != 0:
 
-        # constraint
-        else:
-            # precalculate id/name
-            if not self.fontid in self._cache_glyphs:
-                self._cache_glyphs[self.fontid] = {}
-            cache = self._cache_glyphs[self.fontid]
-
-            if not real:
-                # verify that each glyph have size
-                glyphs = list(set(self.label))
-                for glyph in glyphs:
-                    if not glyph in cache:
-                        cache[glyph] = self.get_extents(glyph)
-
-            # first, split lines
-            glyphs = []
-            lines = []
-            lw = lh = 0
-            for word in re.split(r'( |\n)', self.label):
-
-                # calculate the word width
-                ww, wh = 0, 0
-                for glyph in word:
-                    gw, gh = cache[glyph]
-                    ww += gw
-                    wh = max(gh, wh)
-
-                # is the word fit on the uw ?
-                if ww > uw:
-                    lines.append(((ww, wh), word))
-                    lw = lh = x = 0
-                    continue
+                # no, push actuals glyph
+                lines.append(((lw, lh), glyphs))
+                glyphs = []
 
-                # get the maximum height for this line
-                lh = max(wh, lh)
+                # reset size
+                lw = lh = x = 0
 
-                # is the word fit on the line ?
-                if (word == '\n' or x + ww > uw) and lw != 0:
+                # new line ? don't render
+                if word == '\n':
+                    resume.append((offset, len(lines), 0, 0, 0, ()))
+                    continue
+                resume.append((wordoffset, len(lines), 0, 0, 0, ()))
 
-                    # no, push actuals glyph
-                    lines.append(((lw, lh), glyphs))
-                    glyphs = []
+            # advance the width
+            lw += ww
+            x  += ww
+            lh = max(wh, lh)
+            glyphs += list(word)
 
-                    # reset size
-                    lw = lh = x = 0
+        # got some char left ?
+        if lw != 0:
+            lines.append(((lw, lh), glyphs))
 
-                    # new line ? don't render
-                    if word == '\n':
-                        continue
+        h = sum([size[1] for size, glyphs in lines])
+        return LabelLayout(key, text, lines, (uw, h), resume)
 
-                # advance the width
-                lw += ww
-                x  += ww
-                lh = max(wh, lh)
-                glyphs += list(word)
+    def render(self, real=False, size=None):
+        '''Return a tuple(width, height) to create the image
+        with the user constraints.
 
-            # got some char left ?
-            if lw != 0:
-                lines.append(((lw, lh), glyphs))
+        The line layout is computed once by :meth:`get_layout`, and shared
+        between the measure pass and the real rendering. For the real
+        rendering, `size` is the size of the image to create, default to the
+        label size.
 
-            if not real:
-                h = sum([size[1] for size, glyphs in lines])
-                w = uw
-            else:
-                # really render now.
-                y = 0
-                for size, glyphs in lines:
-                    x = 0
-                    if self.options['halign'] == 'center':
-                        x = int((self.width - size[0]) / 2.)
-                    elif self.options['halign'] == 'right':
-                        x = int(self.width - size[0])
-                    for glyph in glyphs:
-                        lw, lh = cache[glyph]
-                        if glyph != '\n':
-                            self._render_text(glyph, x, y)
-                        x += lw
-                    y += size[1]
+        2 differents methods are used:
+          * if user don't set width, splitting line
+            and calculate max width + height
+          * if user set a width, blit per glyph
+        '''
+        layout = self.get_layout()
 
         if not real:
             # was only the first pass
             # return with/height
+            w, h = layout.size
             w = int(max(w, 1))
             h = int(max(h, 1))
             return w, h
 
+        if size is None:
+            size = self.size
+        self._update_texture(self._render_layout(layout, size))
+
+    def _render_layout(self, layout, size, options=None):
+        # rasterize a layout in an image of `size`, and return the image data.
+        # This doesn't use the Cache or change the label, it's safe to call
+        # it from the worker thread with a copy of the options.
+        if options is None:
+            options = self.options
+        context = self._render_begin(size, options)
+        halign = options['halign']
+        width = size[0]
+        y = 0
+
+        # no width specified, faster method
+        if layout.key[2] is None:
+            for lsize, line in layout.lines:
+                lw, lh = lsize
+                x = 0
+                if halign == 'center':
+                    x = int((width - lw) / 2.)
+                elif halign == 'right':
+                    x = int(width - lw)
+                self._render_text(context, line, x, y)
+                y += int(lh)
+
+        # constraint
+        else:
+            cache = self._cache_glyphs[layout.key[1]]
+            for lsize, glyphs in layout.lines:
+                x = 0
+                if halign == 'center':
+                    x = int((width - lsize[0]) / 2.)
+                elif halign == 'right':
+                    x = int(width - lsize[0])
+                for glyph in glyphs:
+                    lw, lh = cache[glyph]
+                    if glyph != '\n':
+                        self._render_text(context, glyph, x, y)
+                    x += lw
+                y += lsize[1]
+
         # get data from provider
-        data = self._render_end()
+        data = self._render_end(context, size)
         assert(data)
+        return data
+
+    def _update_texture(self, data):
+        w, h = data.width, data.height
 
         # create texture is necessary
         if self.texture is None:
-            self.texture = pymt.Texture.create(*self.size)
+            self.texture = pymt.Texture.create(w, h)
             self.texture.flip_vertical()
-        elif self.width > self.texture.width or self.height > self.texture.height:
-            self.texture = pymt.Texture.create(*self.size)
+        elif w > self.texture.width or h > self.texture.height:
+            self.texture = pymt.Texture.create(w, h)
             self.texture.flip_vertical()
         else:
-            self.texture = self.texture.get_region(0, 0, self.width, self.height)
+            self.texture = self.texture.get_region(0, 0, w, h)
 
         # update texture
         self.texture.blit_data(data)
 
-
     def refresh(self):
         '''Force re-rendering of the label'''
         # first pass, calculating width/height
         sz = self.render()
-        self._size = sz
-        # second pass, render for real
-        self.render(real=True)
+        if self.options['async'] and self.async_capable:
+            # second pass will be done in the worker thread, from the
+            # layout computed in the first pass
+            LabelBase._async_counter += 1
+            self._async = LabelBase._async_counter
+            _async_start()
+            _async_queue.put((self, self._async, self._layout, sz,
+                              dict(self.options)))
+        else:
+            # second pass, render for real
+            self._async = None
+            self.render(real=True, size=sz)
         self._size = sz[0] + self.options['padding_x'] * 2, \
                      sz[1] + self.options['padding_y'] * 2
 
+    @property
+    def is_rendered(self):
+        '''Return False if the label is waiting for an asynchronous rendering
+        and have no texture yet'''
+        return self.texture is not None and self._async is None
+
     def draw(self):
         '''Draw the label'''
-        if self.texture is None:
-            return
         if not len(self.label):
             # it's a empty label, don't waste time to draw it
             return
+        if self.texture is None:
+            self.draw_placeholder()
+            return
 
         dx = 0
         dy = 0
@@ -371,6 +566,26 @@ class LabelBase(BaseObject):
             size=size,
             tex_coords=texc)
 
+    def draw_placeholder(self):
+        '''Draw the placeholder of an asynchronous label not yet rendered'''
+        color = self.options['async_placeholder']
+        if self._async is None or color is None:
+            return
+        x, y = self.pos
+        w, h = self.size
+        anchor_x = self.options['anchor_x']
+        anchor_y = self.options['anchor_y']
+        if anchor_x in ('center', 'middle'):
+            x -= w * 0.5
+        elif anchor_x == 'right':
+            x -= w
+        if anchor_y in ('center', 'middle'):
+            y -= h * 0.5
+        elif anchor_y == 'top':
+            y -= h
+        pymt.set_color(*color, blend=True)
+        pymt.drawRectangle(pos=(int(x), int(y)), size=(w, h))
+
     def _get_label(self):
         return self._label
     def _set_label(self, label):
@@ -391,6 +606,8 @@ class LabelBase(BaseObject):
     @property
     def content_width(self):
         '''Return the content width'''
+        if self._async is not None:
+            return self.width
         if self.texture is None:
             return 0
         return self.texture.width + 2 * self.options['padding_x']
@@ -398,6 +615,8 @@ class LabelBase(BaseObject):
     @property
     def content_height(self):
         '''Return the content height'''
+        if self._async is not None:
+            return self.height
         if self.texture is None:
             return 0
         return self.texture.height + 2 * self.options['padding_y']
@@ -405,7 +624,7 @@ class LabelBase(BaseObject):
     @property
     def content_size(self):
         '''Return the content size (width, height)'''
-        if self.texture is None:
+        if self.texture is None and self._async is None:
             return (0, 0)
         return (self.content_width, self.content_height)
 
@@ -0,0 +1,357 @@
+'''
+Fonts: index of available fonts, shared font objects
+
+The font registry scan the font directories, and store an index of all the
+TrueType fonts found (family, style, filename and metrics) in the PyMT home
+directory. The index is reused for the next start, and a directory is
+scanned again only if it has been modified.
+
+Directories are indexed lazily, in order, until the font searched is found:
+a font shipped with PyMT can be used without scanning the system
+directories.
+
+The registry is used by text providers to resolve a font name into a
+filename, without probing the filesystem, and to share font objects
+between labels ::
+
+    from pymt.core.text.fonts import pymt_fonts
+    filename = pymt_fonts.get_filename('DejaVu Sans', bold=True)
+
+Additional directories can be indexed with the `font_dirs` token of the
+`pymt` section in configuration (separated with os.pathsep).
+'''
+
+__all__ = ('FontRegistry', 'pymt_fonts')
+
+import os
+import sys
+import struct
+import time
+import cPickle
+import threading
+import pymt
+from pymt.logger import pymt_logger
+
+#: Version of the index file format
+FONT_INDEX_VERSION = 1
+
+#: Extensions of font files to index
+font_extensions = ('.ttf', '.otf', '.ttc')
+
+def get_system_font_dirs():
+    '''Return the list of font directories of the system'''
+    if sys.platform == 'win32':
+        windir = os.environ.get('WINDIR', 'C:\\Windows')
+        return [os.path.join(windir, 'Fonts')]
+    elif sys.platform == 'darwin':
+        return ['/Library/Fonts', '/System/Library/Fonts',
+                os.path.expanduser('~/Library/Fonts')]
+    return ['/usr/share/fonts', '/usr/local/share/fonts',
+            os.path.expanduser('~/.fonts')]
+
+def _normalize_name(name):
+    return name.lower().replace(' ', '').replace('-', '')
+
+def read_font_info(filename):
+    '''Read the family, style and line metrics of a TrueType/OpenType font.
+    Return a dict, or None if the file can't be read.'''
+    with open(filename, 'rb') as fd:
+        data = fd.read(12)
+        offset = 0
+        if data[:4] == 'ttcf':
+            # font collection, use the first font
+            fd.seek(12)
+            offset = struct.unpack('>I', fd.read(4))[0]
+            fd.seek(offset)
+            data = fd.read(12)
+        if len(data) < 12:
+            return None
+        numtables = struct.unpack('>H', data[4:6])[0]
+        tables = {}
+        records = fd.read(numtables * 16)
+        for i in xrange(numtables):
+            tag, checksum, toffset, length = \
+                    struct.unpack('>4sIII', records[i * 16:i * 16 + 16])
+            tables[tag] = (toffset, length)
+        for tag in ('name', 'head', 'hhea'):
+            if tag not in tables:
+                return None
+
+        def read_table(tag):
+            toffset, length = tables[tag]
+            fd.seek(toffset)
+            return fd.read(length)
+
+        # family and style
+        names = {}
+        table = read_table('name')
+        fmt, count, storage = struct.unpack('>HHH', table[:6])
+        for i in xrange(count):
+            platform, encoding, language, nameid, length, noffset = \
+                struct.unpack('>HHHHHH', table[6 + i * 12:18 + i * 12])
+            if nameid not in (1, 2):
+                continue
+            value = table[storage + noffset:storage + noffset + length]
+            if platform == 3:
+                # windows, unicode, prefer english
+                value = value.decode('utf_16_be', 'ignore')
+                if nameid not in names or language == 0x409:
+                    names[nameid] = value
+            elif platform == 1 and nameid not in names:
+                names[nameid] = value.decode('latin-1')
+
+        # metrics
+        table = read_table('head')
+        units_per_em = struct.unpack('>H', table[18:20])[0]
+        macstyle = struct.unpack('>H', table[44:46])[0]
+        table = read_table('hhea')
+        ascent, descent, line_gap = struct.unpack('>hhh', table[4:10])
+
+    if 1 not in names:
+        return None
+    return {
+        'family': names[1],
+        'style': names.get(2, u'Regular'),
+        'filename': filename,
+        'bold': bool(macstyle & 1),
+        'italic': bool(macstyle & 2),
+        'units_per_em': units_per_em,
+        'ascent': ascent,
+        'descent': descent,
+        'line_gap': line_gap,
+    }
+
+
+class FontRegistry(object):
+    '''Index of fonts available on the system, and cache of font objects.
+
+    :Parameters:
+        `filename`: str
+            Filename of the index. If None, the index is not saved.
+        `dirs`: list
+            Directories to scan
+        `limit`: int, default to 32
+            Maximum number of font objects kept in cache
+    '''
+    def __init__(self, filename=None, dirs=None, limit=32):
+        self.filename = filename
+        self.dirs = dirs or []
+        self.limit = limit
+        self._saved = None
+        self._index = {}
+        self._dirs_mtime = {}
+        self._families = {}
+        self._files = {}
+        self._fonts = {}
+        self._fonts_lock = threading.Lock()
+        self._tick = 0
+
+    def _load_index(self):
+        if self.filename is None or not os.path.exists(self.filename):
+            return {}, {}
+        try:
+            with open(self.filename, 'rb') as fd:
+                version, mtimes, index = cPickle.load(fd)
+            if version == FONT_INDEX_VERSION:
+                return mtimes, index
+        except Exception:
+            pymt_logger.warning('Fonts: unable to read font index <%s>' %
+                                self.filename)
+        return {}, {}
+
+    def _save_index(self):
+        if self.filename is None:
+            return
+        # keep the saved entries of the directories not indexed yet
+        mtimes, index = self._saved
+        mtimes = dict(mtimes)
+        mtimes.update(self._dirs_mtime)
+        index = dict(index)
+        index.update(self._index)
+        try:
+            with open(self.filename, 'wb') as fd:
+                cPickle.dump((FONT_INDEX_VERSION, mtimes, index), fd,
+                             cPickle.HIGHEST_PROTOCOL)
+        except Exception:
+            pymt_logger.warning('Fonts: unable to write font index <%s>' %
+                                self.filename)
+
+    def _scan_dir(self, path):
+        # return the font entries of a directory, and the mtime of all the
+        # subdirectories
+        entries = []
+        mtimes = {}
+        for root, dirs, files in os.walk(path):
+            mtimes[root] = os.path.getmtime(root)
+            for filename in files:
+                if os.path.splitext(filename)[1].lower() not in font_extensions:
+                    continue
+                filename = os.path.join(root, filename)
+                try:
+                    info = read_font_info(filename)
+                except Exception:
+                    info = None
+                if info is None:
+                    pymt_logger.debug('Fonts: unable to read <%s>' % filename)
+                    continue
+                entries.append(info)
+        return entries, mtimes
+
+    def _reset(self, force=False):
+        mtimes, index = {}, {}
+        if not force:
+            mtimes, index = self._load_index()
+        self._saved = (mtimes, index)
+        self._index = {}
+        self._dirs_mtime = {}
+        self._families = {}
+        self._files = {}
+
+    def _is_unchanged(self, mtimes):
+        # check that no subdirectory have been changed
+        for root, mtime in mtimes.iteritems():
+            try:
+                if os.path.getmtime(root) != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def _index_dir(self, path):
+        # index a directory, from the saved index if no subdirectory have
+        # been changed, otherwise by scanning it.
+        mtimes, index = self._saved
+        entries = ()
+        if os.path.isdir(path):
+            dmtimes = mtimes.get(path)
+            if dmtimes and path in index and self._is_unchanged(dmtimes):
+                entries = index[path]
+                self._dirs_mtime[path] = dmtimes
+            else:
+                start = time.time()
+                entries, self._dirs_mtime[path] = self._scan_dir(path)
+                self._index[path] = entries
+                self._save_index()
+                pymt_logger.debug('Fonts: %d fonts indexed in <%s> in %.3fs'
+                                  % (len(entries), path, time.time() - start))
+        self._index[path] = entries
+
+        # update lookup tables
+        for info in entries:
+            family = _normalize_name(info['family'])
+            if family not in self._families:
+                self._families[family] = []
+            self._families[family].append(info)
+            basename = os.path.basename(info['filename']).lower()
+            self._files.setdefault(basename, info)
+            self._files.setdefault(info['filename'], info)
+
+    def _index_next(self):
+        # index the next directory. Return False if all are indexed.
+        if self._saved is None:
+            self._reset()
+        for path in self.dirs:
+            if path not in self._index:
+                self._index_dir(path)
+                return True
+        return False
+
+    def scan(self, force=False):
+        '''Index all the font directories. Directories already indexed and
+        not modified since the last scan are not scanned again, except if
+        `force` is True.'''
+        self._reset(force)
+        while self._index_next():
+            pass
+
+    @property
+    def fonts(self):
+        '''Return the list of all the fonts indexed'''
+        while self._index_next():
+            pass
+        fonts = []
+        for path in self.dirs:
+            fonts.extend(self._index.get(path, ()))
+        return fonts
+
+    def find(self, name, bold=False, italic=False):
+        '''Search a font from a family name (or a list of name separated by
+        comma), and return the font information, or None if not found.
+
+        The directories are indexed until one of them contain the family.'''
+        for family in name.split(','):
+            family = _normalize_name(family)
+            fonts = self._families.get(family)
+            while not fonts and self._index_next():
+                fonts = self._families.get(family)
+            if not fonts:
+                continue
+            for info in fonts:
+                if info['bold'] == bold and info['italic'] == italic:
+                    return info
+            return fonts[0]
+
+    def find_file(self, filename):
+        '''Return the font information of a font filename (absolute, or only
+        the basename), or None if not indexed.'''
+        basename = os.path.basename(filename).lower()
+        while True:
+            info = self._files.get(filename) or self._files.get(basename)
+            if info is not None or not self._index_next():
+                return info
+
+    def get_filename(self, name, bold=False, italic=False):
+        '''Return the filename of a font name, or None if not found.
+        The name can be a filename or a list of families.'''
+        if os.path.splitext(name)[1].lower() in font_extensions:
+            info = self.find_file(name)
+        else:
+            info = self.find(name, bold, italic)
+        if info is None:
+            return None
+        return info['filename']
+
+    def get_font(self, key, loader):
+        '''Get a font object from the cache. If it's not found, the font is
+        created by calling `loader()`. Fonts not used since a long time are
+        removed when the cache limit is reached.
+
+        :Parameters:
+            `key`: tuple
+                Uniq identifier of the font object, like
+                (provider, filename, size)
+            `loader`: callable
+                Function that return the font object
+
+        It can be called from the asynchronous label renderer thread.
+        '''
+        with self._fonts_lock:
+            self._tick += 1
+            try:
+                item = self._fonts[key]
+                item[1] = self._tick
+                return item[0]
+            except KeyError:
+                pass
+            if len(self._fonts) >= self.limit:
+                oldest = min(self._fonts.iteritems(), key=lambda x: x[1][1])
+                del self._fonts[oldest[0]]
+            font = loader()
+            self._fonts[key] = [font, self._tick]
+            return font
+
+
+def _get_font_dirs():
+    dirs = [pymt.pymt_data_dir]
+    if pymt.pymt_config is not None and \
+       pymt.pymt_config.has_option('pymt', 'font_dirs'):
+        dirs += [x for x in pymt.pymt_config.get(
+            'pymt', 'font_dirs').split(os.pathsep) if x]
+    return dirs + get_system_font_dirs()
+
+#: Default font registry
+pymt_fonts = None
+if 'PYMT_DOC' not in os.environ:
+    pymt_fonts = FontRegistry(
+        filename=os.path.join(pymt.pymt_home_dir, 'fonts.idx'),
+        dirs=_get_font_dirs())
@@ -5,8 +5,10 @@ MarkupLabel: Handle drawing of text with markup
 __all__ = ('MarkupLabel', )
 
 import pymt
+import os
 from pymt.parser import parse_color
 from pymt.logger import pymt_logger
+from pymt.cache import Cache
 import re
 from . import Label, LabelBase
 
@@ -15,6 +17,67 @@ MarkupLabelBase = Label
 if Label is None:
     MarkupLabelBase = LabelBase
 
+# create caches for parsed markup and span layout
+if not 'PYMT_DOC' in os.environ:
+    Cache.register('pymt.markup', timeout=60., limit=1000)
+    Cache.register('pymt.markupspan', timeout=5., limit=1000)
+
+#: Options that can be changed by markup tags
+markup_options = ('bold', 'italic', 'font_size', 'color', 'font_name')
+
+def parse_markup(text):
+    '''Parse a markup text, and return a list of span (style, text).
+    The style is a tuple of (option, value) to apply on the label options
+    for rendering the text.'''
+    spans = []
+    style = {}
+    stack = {}
+
+    def push(k, v):
+        if not k in stack:
+            stack[k] = []
+        stack[k].append(style.get(k))
+        style[k] = v
+
+    def pop(k):
+        if len(stack.get(k, ())) == 0:
+            pymt_logger.warning('Label: pop style stack without push')
+            return
+        v = stack[k].pop()
+        if v is None:
+            del style[k]
+        else:
+            style[k] = v
+
+    for item in re.split('(\[.*?\])', text):
+        if item == '':
+            continue
+        if item == '[b]':
+            push('bold', True)
+        elif item == '[/b]':
+            pop('bold')
+        elif item == '[i]':
+            push('italic', True)
+        elif item == '[/i]':
+            pop('italic')
+        elif item.startswith('[size='):
+            push('font_size', int(item[6:-1]))
+        elif item == '[/size]':
+            pop('font_size')
+        elif item.startswith('[color='):
+            push('color', tuple(parse_color(item[7:-1])))
+        elif item == '[/color]':
+            pop('color')
+        elif item.startswith('[font='):
+            push('font_name', item[6:-1])
+        elif item == '[/font]':
+            pop('font_name')
+        else:
+            items = style.items()
+            items.sort()
+            spans.append((tuple(items), item))
+    return spans
+
 class MarkupLabel(MarkupLabelBase):
     '''Markup text label.
 
@@ -28,9 +91,20 @@ class MarkupLabel(MarkupLabelBase):
         * [font=<str>][/font] : font name
         * [size=<integer>][/size] : size
         * [color=#<color>][/color] : text color
+
+    The parsed markup and the layout of each span are cached. When the label
+    text change, only the glyphs of the spans that changed are rasterized
+    again, if the label size is the same.
+
+    The `async` option is not supported: the options are changed for each
+    span during the rendering.
     '''
+
+    async_capable = False
+
     def __init__(self, *largs, **kwargs):
-        self._style_stack = {}
+        self._runs = None
+        self._run = None
         super(MarkupLabel, self).__init__(*largs, **kwargs)
 
     @property
@@ -39,104 +113,137 @@ class MarkupLabel(MarkupLabelBase):
         s = [x for x in s if x != '']
         return s
 
-    def _push_style(self, k):
-        if not k in self._style_stack:
-            self._style_stack[k] = []
-        self._style_stack[k].append(self.options[k])
-
-    def _pop_style(self, k):
-        if len(self._style_stack[k]) == 0:
-            pymt_logger.warning('Label: pop style stack without push')
-            return
-        v = self._style_stack[k].pop()
-        self.options[k] = v
-
-    def render(self, real=False):
-        w, h = 0, 0
-        x, y = 0, 0
-        lw, lh = 0, 0
-        nl = False
-        if real:
-            self._render_begin()
-
-        for item in self.markup:
-            if item == '[b]':
-                self._push_style('bold')
-                self.options['bold'] = True
-            elif item == '[/b]':
-                self._pop_style('bold')
-            elif item == '[i]':
-                self._push_style('italic')
-                self.options['italic'] = True
-            elif item == '[/i]':
-                self._pop_style('italic')
-            elif item.startswith('[size='):
-                size = int(item[6:-1])
-                self._push_style('font_size')
-                self.options['font_size'] = size
-            elif item == '[/size]':
-                self._pop_style('font_size')
-            elif item.startswith('[color='):
-                color = parse_color(item[7:-1])
-                self._push_style('color')
-                self.options['color'] = color
-            elif item == '[/color]':
-                self._pop_style('color')
-            elif item.startswith('[font='):
-                fontname = item[6:-1]
-                self._push_style('font_name')
-                self.options['font_name'] = fontname
-            elif item == '[/font]':
-                self._pop_style('font_name')
-            else:
-                args = x, y, w, h, lw, lh, nl
-                args = self.render_label(real, item, args)
-                x, y, w, h, lw, lh, nl = args
+    @property
+    def spans(self):
+        '''Return the parsed markup, as a list of (style, text)'''
+        spans = Cache.get('pymt.markup', self.label)
+        if spans is None:
+            spans = parse_markup(self.label)
+            Cache.append('pymt.markup', self.label, spans)
+        return spans
+
+    def render(self, real=False, size=None):
+        options = self.options
+        base = [(k, options[k]) for k in markup_options]
+        args = (0, 0, 0, 0, 0, 0, 0)
+        runs = []
+
+        try:
+            for style, label in self.spans:
+                options.update(base)
+                options.update(style)
+                self._run = []
+                args = self.render_label(real, label, args)
+                if real:
+                    runs.append((style, label, tuple(self._run)))
+        finally:
+            options.update(base)
+            self._run = None
 
         if not real:
             # was only the first pass
             # return with/height
+            x, y, w, h, lw, lh, gx = args
             w = int(max(w, 1))
             h = int(max(h, 1))
             return w, h
 
-        # get data from provider
-        data = self._render_end()
-        assert(data)
-
-        # create texture is necessary
-        if self.texture is None:
-            self.texture = pymt.Texture.create(*self.size)
-            self.texture.flip_vertical()
-        elif self.width > self.texture.width or self.height > self.texture.height:
-            self.texture = pymt.Texture.create(*self.size)
-            self.texture.flip_vertical()
-        else:
-            self.texture = self.texture.get_region(0, 0, self.width, self.height)
-
-        # update texture
-        self.texture.blit_data(data)
+        if size is None:
+            size = self.size
+        size = tuple(size)
+
+        # search the region to redraw
+        previous = self._runs
+        self._runs = (size, runs)
+        region = None
+        if previous is not None and self._async is None \
+           and self.texture is not None and self.texture.size == size \
+           and previous[0] == size and len(previous[1]) == len(runs):
+            region = self._get_changed_region(previous[1], runs, size)
+            if region is None:
+                # nothing changed.
+                return
+
+        if region is None:
+            context = self._render_begin(size, self.options)
+            self._render_runs(context, runs, base)
+            data = self._render_end(context, size)
+            assert(data)
+            self._update_texture(data)
+            return
 
-    def render_label(self, real, label, args):
-        x, y, w, h, lw, lh, nl = args
+        # render only the changed region, and blit it in the texture
+        rx, ry, rw, rh = region
+        context = self._render_begin((rw, rh), self.options)
+        self._render_runs(context, runs, base, region)
+        data = self._render_end(context, (rw, rh))
+        assert(data)
+        self.texture.blit_data(data, pos=(rx, ry))
+
+    def _get_changed_region(self, previous, runs, size):
+        # return the bounding box of the changed runs, or None
+        x1 = y1 = None
+        x2 = y2 = None
+        for i in xrange(len(runs)):
+            if runs[i] == previous[i]:
+                continue
+            for glyph, gx, gy, gw, gh in previous[i][2] + runs[i][2]:
+                if x1 is None:
+                    x1, y1, x2, y2 = gx, gy, gx + gw, gy + gh
+                    continue
+                x1 = min(x1, gx)
+                y1 = min(y1, gy)
+                x2 = max(x2, gx + gw)
+                y2 = max(y2, gy + gh)
+        if x1 is None:
+            return None
+        w, h = size
+        x1 = max(0, int(x1))
+        y1 = max(0, int(y1))
+        x2 = min(w, int(x2 + 1))
+        y2 = min(h, int(y2 + 1))
+        return x1, y1, max(1, x2 - x1), max(1, y2 - y1)
+
+    def _render_runs(self, context, runs, base, region=None):
+        options = self.options
+        rx = ry = 0
+        if region is not None:
+            rx, ry, rw, rh = region
+        try:
+            for style, label, glyphs in runs:
+                options.update(base)
+                options.update(style)
+                for glyph, gx, gy, gw, gh in glyphs:
+                    if region is not None and (gx + gw < rx or gx > rx + rw
+                                               or gy + gh < ry or gy > ry + rh):
+                        continue
+                    self._render_text(context, glyph, gx - rx, gy - ry)
+        finally:
+            options.update(base)
+
+    def _get_span_lines(self, label, x, lw, lh):
+        # split the span text in lines, starting from the current line state.
+        # The result is shared by the measure and the real pass.
         uw, uh = self.usersize
+        fontid = self.fontid
+        key = (label, fontid, uw, x, lw, lh)
+        result = Cache.get('pymt.markupspan', key)
+        if result is not None:
+            return result
 
         # precalculate id/name
-        if not self.fontid in self._cache_glyphs:
-            self._cache_glyphs[self.fontid] = {}
-        cache = self._cache_glyphs[self.fontid]
+        if not fontid in self._cache_glyphs:
+            self._cache_glyphs[fontid] = {}
+        cache = self._cache_glyphs[fontid]
 
-        if not real:
-            # verify that each glyph have size
-            glyphs = list(set(label))
-            for glyph in glyphs:
-                if not glyph in cache:
-                    cache[glyph] = self.get_extents(glyph)
+        # verify that each glyph have size
+        for glyph in set(label):
+            if not glyph in cache:
+                cache[glyph] = self.get_extents(glyph)
 
         # first, split lines
         glyphs = []
         lines = []
-        _x, _y = x, y
         for word in re.split(r'( |\n)', label):
 
             if word == '':
@@ -182,21 +289,34 @@ class MarkupLabel(MarkupLabelBase):
         if lw != 0:
             lines.append(((lw, lh), glyphs))
 
+        result = (lines, x, lw, lh)
+        Cache.append('pymt.markupspan', key, result)
+        return result
+
+    def render_label(self, real, label, args):
+        # x, lw, lh are the line state used to split the spans, and are the
+        # same in the measure and the real pass. gx, y are the position of
+        # the next glyph, only used in the real pass.
+        x, y, w, h, lw, lh, gx = args
+        uw, uh = self.usersize
+
+        lines, x, lw, lh = self._get_span_lines(label, x, lw, lh)
+
         if not real:
             h = sum([size[1] for size, glyphs in lines])
             w = uw
         else:
-            # really render now.
-            x, y = _x, _y
+            # place the glyphs, they are rendered later.
+            cache = self._cache_glyphs[self.fontid]
+            run = self._run
             for i in xrange(len(lines)):
                 size, glyphs = lines[i]
                 for glyph in glyphs:
-                    lw, lh = cache[glyph]
-                    self._render_text(glyph, x, y)
-                    x += lw
+                    gw, gh = cache[glyph]
+                    run.append((glyph, gx, y, gw, gh))
+                    gx += gw
                 if i < len(lines) - 1:
                     y += size[1]
-                    x = 0
-
-        return (x, y, w, h, lw, lh, nl)
+                    gx = 0
 
+        return (x, y, w, h, lw, lh, gx)
@@ -30,14 +30,16 @@ cairo_default_surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1)
 cairo_default_context = cairo.Context(cairo_default_surface)
 
 class LabelCairo(LabelBase):
-    def _select_font(self, context):
+    def _select_font(self, context, options=None):
+        if options is None:
+            options = self.options
         italic = cairo.FONT_SLANT_NORMAL
         bold = cairo.FONT_WEIGHT_NORMAL
-        fontsize = self.options['font_size'] * 1.333
-        fontname = self.options['font_name'].split(',')[0]
-        if self.options['bold']:
+        fontsize = options['font_size'] * 1.333
+        fontname = options['font_name'].split(',')[0]
+        if options['bold']:
             bold = cairo.FONT_WEIGHT_BOLD
-        if self.options['italic']:
+        if options['italic']:
             italic = cairo.FONT_SLANT_ITALIC
 
         context.select_font_face(fontname, italic, bold)
@@ -47,37 +49,29 @@ class LabelCairo(LabelBase):
         context.set_font_options(font_options)
 
         # get maximum height for font
-        font_extents = context.font_extents()
-        self._font_extents = font_extents
-        self._height = \
-            self._font_extents[FONT_EXTENTS_DESCENT_IDX] + \
-            self._font_extents[FONT_EXTENTS_ASCENT_IDX]
+        return context.font_extents()
 
     def get_extents(self, text):
-        self._select_font(cairo_default_context)
+        font_extents = self._select_font(cairo_default_context)
         extents = cairo_default_context.text_extents(text)
-        return (extents[4], self._height)
+        return (extents[4], font_extents[FONT_EXTENTS_DESCENT_IDX] + \
+                font_extents[FONT_EXTENTS_ASCENT_IDX])
 
-    def _render_begin(self):
+    def _render_begin(self, size, options):
         # create a surface, context, font...
-        self._cairo_surface = cairo.ImageSurface(
-                cairo.FORMAT_ARGB32, *self.size)
-        self._cairo_context = cairo.Context(self._cairo_surface)
-
-        self._select_font(self._cairo_context)
-
-    def _render_text(self, text, x, y):
-        color = map(lambda x: x * 255, self.options['color'])
-        self._cairo_context.set_source_rgba(*color)
-        self._cairo_context.move_to(x,
-            y + self._font_extents[FONT_EXTENTS_ASCENT_IDX])
-        self._cairo_context.show_text(text)
-
-    def _render_end(self):
-        data = pymt.ImageData(self.width, self.height,
-            'RGBA', buffer(self._cairo_surface.get_data())[:])
-
-        del self._cairo_surface
-        del self._cairo_context
-
-        return data
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, *size)
+        context = cairo.Context(surface)
+        font_extents = self._select_font(context, options)
+        return surface, context, font_extents, options
+
+    def _render_text(self, context, text, x, y):
+        surface, context, font_extents, options = context
+        color = map(lambda x: x * 255, options['color'])
+        context.set_source_rgba(*color)
+        context.move_to(x, y + font_extents[FONT_EXTENTS_ASCENT_IDX])
+        context.show_text(text)
+
+    def _render_end(self, context, size):
+        surface = context[0]
+        return pymt.ImageData(size[0], size[1],
+            'RGBA', buffer(surface.get_data())[:])
@@ -12,42 +12,51 @@ except:
 import pymt
 import os
 from . import LabelBase
+from pymt.core.text.fonts import pymt_fonts
 
 # used for fetching extends before creature image surface
 default_font = ImageFont.load_default()
 
 class LabelPIL(LabelBase):
     _cache = {}
-    def _select_font(self):
-        fontsize = int(self.options['font_size'] * 1.333)
-        fontname = self.options['font_name'].split(',')[0]
-        id = '%s.%s' % (unicode(fontname), unicode(fontsize))
+    def _select_font(self, options=None):
+        if options is None:
+            options = self.options
+        fontsize = int(options['font_size'] * 1.333)
+        fontname = options['font_name']
+        id = (fontname, fontsize, options['bold'], options['italic'])
         if not id in self._cache:
-            filename = os.path.join(pymt.pymt_data_dir, 'DejaVuSans.ttf')
-            font = ImageFont.truetype(filename, fontsize)
-            self._cache[id] = font
-
-        return self._cache[id]
+            filename = None
+            if os.path.isabs(fontname):
+                filename = fontname
+            else:
+                filename = pymt_fonts.get_filename(fontname,
+                    bold=options['bold'], italic=options['italic'])
+            if filename is None:
+                filename = os.path.join(pymt.pymt_data_dir, 'DejaVuSans.ttf')
+            self._cache[id] = filename
+
+        # font objects are shared with the font registry
+        filename = self._cache[id]
+        return pymt_fonts.get_font(('pil', filename, fontsize),
+            lambda: ImageFont.truetype(filename, fontsize))
 
     def get_extents(self, text):
         font = self._select_font()
         w, h = font.getsize(text)
         return w, h
 
-    def _render_begin(self):
+    def _render_begin(self, size, options):
         # create a surface, context, font...
-        self._pil_im = Image.new('RGBA', self.size)
-        self._pil_draw = ImageDraw.Draw(self._pil_im)
-
-    def _render_text(self, text, x, y):
-        color = tuple(map(lambda x: int(x * 255), self.options['color']))
-        self._pil_draw.text((int(x), int(y)), text, font=self._select_font(), fill=color)
-
-    def _render_end(self):
-        data = pymt.ImageData(self.width, self.height,
-            self._pil_im.mode, self._pil_im.tostring())
-
-        del self._pil_im
-        del self._pil_draw
-
-        return data
+        im = Image.new('RGBA', size)
+        return im, ImageDraw.Draw(im), options
+
+    def _render_text(self, context, text, x, y):
+        im, draw, options = context
+        color = tuple(map(lambda x: int(x * 255), options['color']))
+        draw.text((int(x), int(y)), text, font=self._select_font(options),
+                  fill=color)
+
+    def _render_end(self, context, size):
+        im, draw, options = context
+        return pymt.ImageData(size[0], size[1], im.mode, im.tostring())
@@ -6,6 +6,7 @@ __all__ = ('LabelPygame', )
 
 import pymt
 from . import LabelBase
+from pymt.core.text.fonts import pymt_fonts
 
 try:
     import pygame
@@ -18,57 +19,64 @@ pygame_cache = {}
 pygame.font.init()
 
 class LabelPygame(LabelBase):
-    def _get_font_id(self):
-        return '|'.join([unicode(self.options[x]) for x \
+    def _get_font_id(self, options=None):
+        if options is None:
+            options = self.options
+        return '|'.join([unicode(options[x]) for x \
             in ('font_size', 'font_name', 'bold', 'italic')])
 
-    def _get_font(self):
-        id = self._get_font_id()
+    def _get_font(self, options=None):
+        if options is None:
+            options = self.options
+        id = self._get_font_id(options)
         if id not in pygame_cache:
             # try first the file if it's a filename
-            fontobject = None
-            fontname = self.options['font_name']
+            filename = None
+            fontname = options['font_name']
             ext = fontname.split('.')[-1]
             if ext.lower() == 'ttf':
-                # fontobject
-                fontobject = pygame.font.Font(fontname,
-                                int(self.options['font_size'] * 1.333))
+                filename = fontname
+
+            # search the font in the font index
+            if filename is None:
+                filename = pymt_fonts.get_filename(fontname,
+                    bold=options['bold'],
+                    italic=options['italic'])
 
             # fallback to search a system font
-            if fontobject is None:
-                # try to search the font
-                font = pygame.font.match_font(
-                    self.options['font_name'].replace(' ', ''),
-                    bold=self.options['bold'],
-                    italic=self.options['italic'])
+            if filename is None:
+                filename = pygame.font.match_font(
+                    options['font_name'].replace(' ', ''),
+                    bold=options['bold'],
+                    italic=options['italic'])
 
-                # fontobject
-                fontobject = pygame.font.Font(font,
-                                int(self.options['font_size'] * 1.333))
-            pygame_cache[id] = fontobject
+            pygame_cache[id] = (filename,
+                                int(options['font_size'] * 1.333))
 
-        return pygame_cache[id]
+        # font objects are shared with the font registry
+        filename, size = pygame_cache[id]
+        return pymt_fonts.get_font(('pygame', filename, size),
+                                   lambda: pygame.font.Font(filename, size))
 
     def get_extents(self, text):
         font = self._get_font()
         w, h = font.size(text)
         return w, h
 
-    def _render_begin(self):
-        self._pygame_surface = pygame.Surface(self.size, pygame.SRCALPHA, 32)
-        self._pygame_surface.fill((0, 0, 0, 0))
+    def _render_begin(self, size, options):
+        surface = pygame.Surface(size, pygame.SRCALPHA, 32)
+        surface.fill((0, 0, 0, 0))
+        return surface, options
 
-    def _render_text(self, text, x, y):
-        font = self._get_font()
-        color = [min(255, c * 255) for c in self.options['color']]
+    def _render_text(self, context, text, x, y):
+        surface, options = context
+        font = self._get_font(options)
+        color = [min(255, c * 255) for c in options['color']]
         color = color[2], color[1], color[0]
         text = font.render(text, 1, color)
-        self._pygame_surface.blit(text, (x, y), None, pygame.BLEND_RGBA_ADD)
-
-    def _render_end(self):
-        data = pymt.ImageData(self.width, self.height,
-            'RGBA', buffer(self._pygame_surface.get_buffer())[:])
-
-        del self._pygame_surface
+        surface.blit(text, (x, y), None, pygame.BLEND_RGBA_ADD)
 
-        return data
+    def _render_end(self, context, size):
+        surface, options = context
+        return pymt.ImageData(size[0], size[1],
+            'RGBA', buffer(surface.get_buffer())[:])
@@ -11,7 +11,13 @@ For each event dispatcher there is a set of events that it dispatches; these
 correspond with the type of event handlers you can attach.  Event types are
 identified by their name, for example, ''on_resize''.  If you are creating a
 new class which implements `EventDispatcher`, you must call
-`EventDispatcher.register_event_type` for each event type.
+`EventDispatcher.register_event_type` for each event type. Widgets can
+declare them at class level instead, with the `__events__` attribute::
+
+    class MTMyWidget(MTWidget):
+        __events__ = ('on_press', )
+        def on_press(self):
+            pass
 
 Attaching event handlers
 ========================
@@ -156,20 +162,29 @@ class EventDispatcher(BaseObject):
 
     __slots__ = ('_event_types', '_event_stack')
 
+    #: Event types declared at class level, shared by all the instances.
+    #: The instance get its own set only when an event type is registered or
+    #: unregistered on it.
+    _class_event_types = frozenset()
+
     def __init__(self, **kwargs):
         super(EventDispatcher, self).__init__(**kwargs)
-        self._event_types = []
+        self._event_types = self._class_event_types
         self._event_stack = None
 
     @property
     def event_types(self):
         '''List of event types available'''
-        return self._event_types
+        return list(self._event_types)
 
     def unregister_event_type(self, event_type):
         '''Remove an event types from the available list'''
-        if event_type in self._event_types:
-            self._event_types.remove(event_type)
+        event_types = self._event_types
+        if event_type not in event_types:
+            return
+        if type(event_types) is frozenset:
+            event_types = self._event_types = set(event_types)
+        event_types.remove(event_type)
 
     def register_event_type(self, event_type):
         '''Register an event type with the dispatcher.
@@ -183,11 +198,15 @@ class EventDispatcher(BaseObject):
                 Name of the event to register.
 
         '''
+        event_types = self._event_types
+        if event_type in event_types:
+            return
         if not hasattr(self, event_type):
             raise Exception('Missing default handler <%s> in <%s>' % (
                             event_type, self.__class__.__name__))
-        if not event_type in self._event_types:
-            self._event_types.append(event_type)
+        if type(event_types) is frozenset:
+            event_types = self._event_types = set(event_types)
+        event_types.add(event_type)
 
     def push_handlers(self, *args, **kwargs):
         '''Push a level onto the top of the handler stack, then attach zero or
@@ -78,13 +78,18 @@ def drawCSSRectangle(pos=(0, 0), size=(100, 100), style=dict(), prefix=None, sta
                 newstyle[k.replace(prefix, '')] = style[k]
         style = newstyle
 
-    style.setdefault('border-width', 1.5)
-    style.setdefault('border-radius', 0)
-    style.setdefault('border-radius-precision', .1)
-    style.setdefault('draw-border', 0)
-    style.setdefault('draw-background', 1)
-    style.setdefault('draw-alpha-background', 0)
-    style.setdefault('alpha-background', (1, 1, .5, .5))
+    # the widget style can be shared, don't change it
+    defaults = {
+        'border-width': 1.5,
+        'border-radius': 0,
+        'border-radius-precision': .1,
+        'draw-border': 0,
+        'draw-background': 1,
+        'draw-alpha-background': 0,
+        'alpha-background': (1, 1, .5, .5),
+    }
+    defaults.update(style)
+    style = defaults
 
     k = { 'pos': pos, 'size': size }
 
@@ -9,7 +9,7 @@ __all__ = (
     'drawTexturedRectangle', 'drawLine',
     'drawRectangleAlpha', 'drawRoundedRectangleAlpha',
     'drawSemiCircle', 'drawStippledCircle',
-    'getLastLabel', 'getLabel',
+    'getLastLabel', 'getLabel', 'LabelHandle', 'LabelStrip',
 )
 
 import os
@@ -34,6 +34,7 @@ except ImportError, e:
 _temp_label = None
 if not 'PYMT_DOC' in os.environ:
     Cache.register('pymt.label', timeout=1., limit=1000)
+    Cache.register('pymt.labelstrip', timeout=5., limit=100)
 
 def _make_point_list(points):
     t = type(points)
@@ -45,6 +46,32 @@ def _make_point_list(points):
     else:
         return list(points)
 
+def _get_label_options(kwargs):
+    kwargs.setdefault('markup', False)
+    kwargs.setdefault('font_size', 12)
+    kwargs.setdefault('center', True)
+    if kwargs.get('center'):
+        kwargs.setdefault('anchor_x', 'center')
+        kwargs.setdefault('anchor_y', 'center')
+    else:
+        kwargs.setdefault('anchor_x', 'left')
+        kwargs.setdefault('anchor_y', 'bottom')
+    del kwargs['center']
+    return kwargs
+
+def _get_label_key(label, kwargs):
+    # create an uniq and hashable id for this label. list values (like color)
+    # are converted to tuple.
+    items = kwargs.items()
+    items.sort()
+    key = [label]
+    for k, v in items:
+        if type(v) is list:
+            v = tuple(v)
+        key.append(k)
+        key.append(v)
+    return tuple(key)
+
 def getLabel(label, **kwargs):
     '''Get a cached label object
 
@@ -60,20 +87,15 @@ def getLabel(label, **kwargs):
     class to known all availables parameters.
 
     Used by drawLabel()
+
+    .. note::
+        Each text is cached in a new label. If the text change often, use a
+        :class:`LabelHandle` instead.
     '''
-    kwargs.setdefault('markup', False)
-    kwargs.setdefault('font_size', 12)
-    kwargs.setdefault('center', True)
-    if kwargs.get('center'):
-        kwargs.setdefault('anchor_x', 'center')
-        kwargs.setdefault('anchor_y', 'center')
-    else:
-        kwargs.setdefault('anchor_x', 'left')
-        kwargs.setdefault('anchor_y', 'bottom')
-    del kwargs['center']
+    kwargs = _get_label_options(kwargs)
 
     # create an uniq id for this label
-    id = '%s##%s' % (label, str(kwargs))
+    id = _get_label_key(label, kwargs)
 
     # get or store
     obj = Cache.get('pymt.label', id)
@@ -87,6 +109,149 @@ def getLabel(label, **kwargs):
 
     return obj
 
+class LabelStrip(object):
+    '''Label composed from prerendered glyphs.
+    Each glyph is rendered once, and the text is drawn glyph per glyph. This
+    is designed for text that change every frame with only few characters,
+    like numbers ::
+
+        strip = LabelStrip(font_size=10)
+        strip.label = '%.2f' % value
+        strip.draw()
+
+    LabelStrip support the same parameters as :func:`getLabel`, except
+    markup and width constraint.
+
+    The glyphs are shared between strips of same options, in the
+    `pymt.labelstrip` cache: they are released when no strip with these
+    options have been drawn for some seconds.
+    '''
+
+    __slots__ = ('options', 'label', 'pos', '_key', '_anchor_x',
+                 '_anchor_y')
+
+    def __init__(self, label='', pos=(0, 0), **kwargs):
+        kwargs = _get_label_options(kwargs)
+        self._anchor_x = kwargs.pop('anchor_x')
+        self._anchor_y = kwargs.pop('anchor_y')
+        kwargs['anchor_x'] = 'left'
+        kwargs['anchor_y'] = 'bottom'
+        kwargs['markup'] = False
+        self.options = kwargs
+        self.label = label
+        self.pos = pos
+
+        # glyphs are shared between strips of same options
+        self._key = _get_label_key('', kwargs)
+
+    def _get_glyphs(self):
+        glyphs = Cache.get('pymt.labelstrip', self._key)
+        if glyphs is None:
+            glyphs = {}
+            Cache.append('pymt.labelstrip', self._key, glyphs)
+        return glyphs
+
+    def _get_glyph(self, glyphs, glyph):
+        try:
+            return glyphs[glyph]
+        except KeyError:
+            obj = pymt.Label(glyph, **self.options)
+            glyphs[glyph] = obj
+            return obj
+
+    def get_glyph(self, glyph):
+        '''Return the label object of a glyph'''
+        return self._get_glyph(self._get_glyphs(), glyph)
+
+    def _get_content_size(self, glyphs):
+        w = h = 0
+        get_glyph = self._get_glyph
+        for glyph in self.label:
+            gw, gh = get_glyph(glyphs, glyph).content_size
+            w += gw
+            h = max(h, gh)
+        return w, h
+
+    @property
+    def content_size(self):
+        '''Return the content size (width, height)'''
+        return self._get_content_size(self._get_glyphs())
+
+    def draw(self):
+        '''Draw the label, glyph per glyph'''
+        glyphs = self._get_glyphs()
+        w, h = self._get_content_size(glyphs)
+        x, y = self.pos
+        if self._anchor_x in ('center', 'middle'):
+            x -= w * 0.5
+        elif self._anchor_x == 'right':
+            x -= w
+        if self._anchor_y in ('center', 'middle'):
+            y -= h * 0.5
+        elif self._anchor_y == 'top':
+            y -= h
+        get_glyph = self._get_glyph
+        for glyph in self.label:
+            obj = get_glyph(glyphs, glyph)
+            obj.pos = x, y
+            obj.draw()
+            x += obj.content_width
+
+class LabelHandle(object):
+    '''Stable label object. The label object is created once, and updated
+    when the text change, without filling the label cache with one-off
+    entries ::
+
+        handle = LabelHandle(font_size=10, center=False)
+
+        # later, in your draw()
+        handle.label = 'Score: %d' % score
+        handle.draw(pos=(0, 0))
+
+    :Parameters:
+        `strip`: bool, default to False
+            If True, the text will be composed from prerendered glyphs, using
+            a :class:`LabelStrip`. Use it for numbers that change every frame.
+
+    LabelHandle support all the parameters from :func:`getLabel`.
+    '''
+
+    __slots__ = ('obj', )
+
+    def __init__(self, label='', **kwargs):
+        kwargs.setdefault('strip', False)
+        strip = kwargs.pop('strip')
+        if strip:
+            self.obj = LabelStrip(label, **kwargs)
+            return
+        kwargs = _get_label_options(kwargs)
+        if kwargs.get('markup'):
+            self.obj = pymt.MarkupLabel(label, **kwargs)
+        else:
+            self.obj = pymt.Label(label, **kwargs)
+
+    def _get_label(self):
+        return self.obj.label
+    def _set_label(self, label):
+        if self.obj.label != label:
+            self.obj.label = label
+    label = property(_get_label, _set_label,
+                     doc='Get/Set the text of the label')
+
+    @property
+    def content_size(self):
+        '''Return the content size (width, height)'''
+        return self.obj.content_size
+
+    def draw(self, pos=None):
+        '''Draw the label at the `pos` position, and return the content
+        size'''
+        obj = self.obj
+        if pos is not None:
+            obj.pos = pos
+        obj.draw()
+        return obj.content_size
+
 def drawLabel(label, pos=(0,0), **kwargs):
     '''Draw a label on the window.
 
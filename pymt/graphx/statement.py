@@ -45,6 +45,7 @@ __all__ = (
     'gx_texture', 'gx_blending_replace'
 )
 
+import os
 import pymt
 from OpenGL.GL import GL_COMPILE, GL_COMPILE_AND_EXECUTE, \
         GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA, GL_BLEND, GL_MODELVIEW, \
@@ -53,9 +54,25 @@ from OpenGL.GL import GL_COMPILE, GL_COMPILE_AND_EXECUTE, \
         glEnable, glDisable, glGenLists, glNewList, glEndList, glCallList, \
         glBlendFunc, glMatrixMode, glPushMatrix, glLoadIdentity, glPopAttrib, \
         glPushMatrix, glPopAttrib, glColor3f, glColor4f, glBindTexture, \
-        glPopMatrix, glBegin, glEnd, glPushAttrib
+        glPopMatrix, glBegin, glEnd, glPushAttrib, glDeleteLists
 
 gl_displaylist_generate = False
+
+# Releasing display list through GC is problematic: GC can happen in the
+# middle of a glBegin/glEnd, or while another list is compiled. The lists
+# are released from the main loop instead.
+_displaylist_release_list = []
+def _displaylist_release(*largs):
+    global _displaylist_release_list
+    dls = _displaylist_release_list
+    _displaylist_release_list = []
+    for dl in dls:
+        # OpenGL may be unloaded when leaving the application
+        try:
+            glDeleteLists(dl, 1)
+        except:
+            pass
+
 class GlDisplayList:
     '''Abstraction to opengl display-list usage. Here is an example of usage
     ::
@@ -79,6 +96,11 @@ class GlDisplayList:
         if 'execute' in kwargs.get('mode'):
             self.mode = GL_COMPILE_AND_EXECUTE
 
+    def __del__(self):
+        # deletion is done outside GC call, see _displaylist_release()
+        if _displaylist_release_list is not None:
+            _displaylist_release_list.append(self.dl)
+
     def __enter__(self):
         self.start()
 
@@ -315,3 +337,8 @@ gx_matrix_identity = GlMatrix(do_loadidentity=True)
 #: Alias to GlTexture
 gx_texture = GlTexture
 
+if 'PYMT_DOC' not in os.environ:
+    from pymt.clock import getClock
+
+    # install tick to release display lists every 200ms
+    getClock().schedule_interval(_displaylist_release, 0.2)
@@ -46,6 +46,59 @@ class bench_widget_creation:
         for x in xrange(10000):
             o.append(MTWidget())
 
+def get_deep_size(obj):
+    '''Return the memory size of an object and of all the objects it
+    reference (each one counted once). Classes, modules and functions are
+    not counted.'''
+    seen = set()
+    size = 0
+    stack = [obj]
+    skip = (type, type(sys), type(get_deep_size))
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, skip):
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+        stack.extend(gc.get_referents(o))
+    return size
+
+class bench_widget_memory:
+    '''Widget: memory usage (10000 MTWidget)'''
+    def run(self):
+        o = []
+        for x in xrange(10000):
+            o.append(MTWidget())
+        self.widgets = o
+    def report(self):
+        size = get_deep_size(self.widgets) - get_deep_size([])
+        return '%d bytes/widget' % (size / len(self.widgets))
+
+class bench_css_get_style:
+    '''CSS: style lookup (10000 widgets, 2000 rules)'''
+    def __init__(self):
+        from pymt.ui.colors import CSSSheet
+        names = ('widget', 'button', 'label', 'scatterwidget', 'slider')
+        rules = []
+        for x in xrange(500):
+            rules.append('.cls%d { bg-color: rgb(%d, 0, 0); }' % (x, x % 255))
+            rules.append('%s.cls%d { font-size: %d; }' % (
+                names[x % len(names)], x, x % 30))
+            rules.append('#id%d { color: rgb(0, %d, 0); }' % (x, x % 255))
+            rules.append('%s%d { draw-border: 1; }' % (names[x % len(names)], x))
+        self.sheet = CSSSheet()
+        self.sheet.parse_text('\n'.join(rules))
+        widgets = []
+        classes = (MTWidget, MTButton, MTLabel, MTScatterWidget, MTSlider)
+        for x in xrange(10000):
+            cls = classes[x % len(classes)]
+            widgets.append(cls(cls='cls%d' % (x % 500), id='id%d' % x))
+        self.widgets = widgets
+    def run(self):
+        get_style = self.sheet.get_style
+        for w in self.widgets:
+            get_style(w)
+
 class bench_widget_dispatch:
     '''Widget: event dispatch (1000 on_update in 10*1000 MTWidget)'''
     def __init__(self):
@@ -61,6 +114,117 @@ class bench_widget_dispatch:
         for x in xrange(1000):
             root.dispatch_event('on_update')
 
+class bench_widget_recreate:
+    '''Widget: create/destroy (100 * 100 MTButton)'''
+    def run(self):
+        root = MTWidget()
+        for x in xrange(100):
+            for y in xrange(100):
+                root.add_widget(MTButton(label='item %d' % y, cls='item'))
+            for w in root.children[:]:
+                root.remove_widget(w)
+
+class bench_widget_pool:
+    '''Widget: acquire/release in a pool (100 * 100 MTButton)'''
+    def run(self):
+        from pymt.ui.widgetpool import WidgetPool
+        pool = WidgetPool()
+        root = MTWidget()
+        for x in xrange(100):
+            for y in xrange(100):
+                root.add_widget(pool.acquire(MTButton, label='item %d' % y,
+                                             cls='item'))
+            for w in root.children[:]:
+                pool.release(w)
+
+class bench_layout_nested:
+    '''Layout: 100 changes in 20 nested MTBoxLayout (5000 widgets)'''
+    def __init__(self):
+        self.root = parent = MTBoxLayout(orientation='vertical')
+        for level in xrange(20):
+            child = MTBoxLayout(
+                orientation=('horizontal', 'vertical')[level % 2])
+            for x in xrange(250):
+                parent.add_widget(MTWidget(size=(10, 10)))
+            parent.add_widget(child)
+            parent = child
+        self.leaf = parent
+        self.root.dispatch_event('on_update')
+    def run(self):
+        root = self.root
+        leaf = self.leaf
+        for x in xrange(100):
+            root.children[0].pos = (x, x)
+            w = MTWidget(size=(10, 10))
+            leaf.add_widget(w)
+            root.dispatch_event('on_update')
+            leaf.remove_widget(w)
+            root.dispatch_event('on_update')
+
+class bench_layout_grid:
+    '''Layout: 10 layouts of a MTGridLayout (100 * 100 widgets)'''
+    def __init__(self):
+        self.grid = MTGridLayout(cols=100)
+        for x in xrange(10000):
+            self.grid.add_widget(MTWidget(size=(10, 10), size_hint=(1, 1)))
+    def run(self):
+        grid = self.grid
+        for x in xrange(10):
+            grid.pos = (x, x)
+            grid.update_minimum_size()
+            grid.do_layout()
+
+class bench_kineticlist_virtual:
+    '''Widget: scroll a virtualized MTKineticList (100000 items)'''
+    def __init__(self):
+        adapter = KineticListAdapter(
+            data=['item %d' % x for x in xrange(100000)])
+        self.klist = MTKineticList(adapter=adapter, size=(400, 600))
+    def run(self):
+        klist = self.klist
+        for x in xrange(1000):
+            klist.yoffset = -x * 4000
+            klist.do_layout()
+
+class bench_kineticlist_search:
+    '''Widget: type a search in a MTKineticList (50000 items)'''
+    def __init__(self):
+        self.klist = MTKineticList()
+        for x in xrange(50000):
+            self.klist.add_widget(MTKineticItem(label='item %d' % x,
+                                                deletable=False))
+        self.klist.get_search_index('label')
+    def run(self):
+        klist = self.klist
+        for x in xrange(10):
+            for text in ('i', 'it', 'ite', 'item', 'item ', 'item 4',
+                         'item 42', 'item 4', 'item '):
+                klist.apply_filter(text)
+
+class bench_coverflow:
+    '''Widget: draw a MTCoverFlow while scrolling (5000 covers)'''
+    def __init__(self):
+        self.coverflow = MTCoverFlow(size=(800, 600))
+        for x in xrange(5000):
+            self.coverflow.add_widget(MTButton(label='album %d' % x,
+                                               size=(400, 400)))
+    def run(self):
+        coverflow = self.coverflow
+        for x in xrange(100):
+            coverflow.selection = x
+            coverflow.dispatch_event('on_draw')
+
+class bench_scatter_transform:
+    '''Scatter: transformation (100 moves of 200 MTScatter)'''
+    def __init__(self):
+        self.scatters = [MTScatter(pos=(randint(0, 800), randint(0, 600)))
+                         for x in xrange(200)]
+    def run(self):
+        point = Vector(50, 50)
+        for x in xrange(100):
+            for scatter in self.scatters:
+                scatter.apply_angle_scale_trans(0.01, 1.001, (1, 1), point)
+
 class bench_graphx_line:
     '''Graphx: draw lines (5000 x/y) 1000 times'''
     def __init__(self):
@@ -270,6 +434,8 @@ if __name__ == '__main__':
             test.run()
             clock_end = clockfn() - clock_start
             log('%.6f' % clock_end)
+            if hasattr(test, 'report'):
+                log('      %s' % test.report())
         except Exception, e:
             log('failed %s' % str(e))
             continue
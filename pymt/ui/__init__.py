@@ -6,3 +6,8 @@ from pymt.ui.animation import *
 from pymt.ui.window import *
 from pymt.ui.widgets import *
 from pymt.ui.colors import *
+from pymt.ui.spatialindex import *
+from pymt.ui.searchindex import *
+from pymt.ui.texturecache import *
+from pymt.ui.retained import *
+from pymt.ui.widgetpool import *
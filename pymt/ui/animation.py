@@ -75,6 +75,7 @@ import types
 from copy import deepcopy, copy
 from pymt.clock import getClock
 from pymt.event import EventDispatcher
+from pymt.ui.colors import CSSStyleProxy
 
 class AnimationBase(object):
     # This is the base animation object class. Everytime a do or animate
@@ -106,7 +107,11 @@ class AnimationBase(object):
 
     def _get_value_from(self, prop):
         if hasattr(self.widget, prop):
-            return self.widget.__getattribute__(prop)
+            value = self.widget.__getattribute__(prop)
+            if type(value) is CSSStyleProxy:
+                # read the style dict, it's changed with apply_css()
+                value = value.shared
+            return value
         return self.widget.__dict__[prop]
 
     def _set_value_from(self, value, prop):
@@ -114,7 +119,10 @@ class AnimationBase(object):
             kwargs = {}
             attr = getattr(self.widget, prop)
             try:
-                if type(attr) == dict and type(value) == dict:
+                if prop == 'style' and type(value) == dict:
+                    # style can be shared, let the widget copy it.
+                    self.widget.apply_css(value)
+                elif type(attr) == dict and type(value) == dict:
                     for k, v in value.iteritems():
                         attr[k] = v
                 else:
@@ -132,6 +140,10 @@ class AnimationBase(object):
             vstart, vend =  self._prop_list[prop]
             value = self._calculate_attribute_value(vstart, vend, t)
             self._set_value_from(value, prop)
+        # the widget drawing changed
+        mark_dirty = getattr(self.widget, 'mark_dirty', None)
+        if mark_dirty is not None:
+            mark_dirty()
 
     def _calculate_attribute_value(self, vstart, vend, t):
         '''A recursive function to calculate the resultant value of property.'''
@@ -177,6 +189,13 @@ class AnimationBase(object):
                 self.animator.stop(self.widget)
             return False
 
+    def cancel(self):
+        '''Stops animating the AnimationBase Object, without completing the
+        animation and without raising events'''
+        if self._running:
+            self._running = False
+            getClock().unschedule(self._next_frame)
+
     def pause(self):
         #not yet implemented
         pass
@@ -409,6 +428,14 @@ class Animation(EventDispatcher):
     def pause(self):
         pass
 
+    def cancel(self, widget):
+        '''Stops animating the widget without completing the animation and
+        without raising events. The widget is released by the animation.'''
+        if widget not in self.children:
+            return
+        self.children[widget].cancel()
+        self._del_child(widget)
+
     def reset(self, widget):
         '''Calls AnimationBase objects reset function.'''
         self.children[widget].reset()
@@ -506,6 +533,11 @@ class ComplexAnimation(Animation):
             animation.children[widgetx] = new_animobj
         return True
 
+    def cancel(self, widget):
+        '''Cancel the child animations of the widget'''
+        for animation in self.animations:
+            animation.cancel(widget)
+
     def generate_single_event(self, value):
         '''If a user wants to generate only one event for the entire complex
         animation he can use this function.
@@ -548,6 +580,11 @@ class SequenceAnimation(ComplexAnimation):
             self.animations[self.anim_counter]._repopulate_attrib(widget)
         self.start(widget)
 
+    def cancel(self, widget):
+        '''Cancel the sequential animation'''
+        self.anim_counter = 0
+        super(SequenceAnimation, self).cancel(widget)
+
     def reset(self, widget):
         '''Resets the sequential animation'''
         self.anim_counter = 0
@@ -592,6 +629,11 @@ class ParallelAnimation(ComplexAnimation):
         if animobj.generate_event and not self.single_event:
             widget.dispatch_event('on_animation_complete', self)
 
+    def cancel(self, widget):
+        '''Cancel the parallel animation'''
+        self.dispatch_counter = 0
+        super(ParallelAnimation, self).cancel(widget)
+
     def reset(self, widget):
         '''Resets the parallel animation'''
         self.dispatch_counter = 0
@@ -666,6 +708,11 @@ class Repeat(EventDispatcher):
         if not (isinstance(self.animations, ParallelAnimation) or isinstance(self.animations, SequenceAnimation)):
             self.animations._del_child(widget)
 
+    def cancel(self, widget):
+        '''Cancel the animation, without raising events'''
+        self._repeat_counter = 0
+        self.animations.cancel(widget)
+
     def repeat(self, widget):
         '''Internal function used by the Repeat controller to check for
           repetitions
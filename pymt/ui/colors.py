@@ -22,29 +22,29 @@ please look on the widget documentation.
 '''
 
 __all__ = (
-    'css_get_style', 'get_truncated_classname',
+    'css_get_style', 'css_get_styles', 'get_truncated_classname',
     'pymt_sheet', 'css_add_sheet', 'css_add_file', 'css_get_widget_id',
     'css_register_state', 'css_add_keyword', 'css_register_prefix',
-    'css_reload'
+    'css_reload', 'CSSStyle', 'CSSStyleProxy', 'CSSWidgetStyle'
 )
 
 from pymt.logger import pymt_logger
-from pymt.cache import Cache
 from pymt.resources import resource_add_path
 from pymt.parser import parse_color, parse_image, parse_float4, \
         parse_float, parse_bool, parse_int, parse_int2, parse_string, \
         parse_filename
-from pymt import pymt_data_dir, pymt_home_dir
+from pymt import pymt_data_dir, pymt_home_dir, __version__
+from pymt.clock import getClock
 import os
 import sys
 import shutil
 import logging
 import re
+import time
+import hashlib
+import cPickle
 import weakref
 
-# Register CSS cache
-Cache.register('pymt.css', limit=500, timeout=60)
-
 #: Instance of the CSS sheet
 pymt_sheet = None
 
@@ -55,10 +55,28 @@ pymt_css_states = ['-down', '-move', '-dragging', '-active', '-error',
 #: Prefix allowed to CSS rules
 pymt_css_prefix = ['key-', 'slider-', 'title-', 'cursor-', 'selection-']
 
+#: Version of the precompiled CSS cache format
+CSS_CACHE_VERSION = 1
+
+#: Parsers depending of the runtime (resources path, image loading). Values
+#: converted with them are stored raw in the precompiled cache, and converted
+#: when the cache is loaded.
+css_deferred_parsers = [parse_image, parse_filename]
+
 # Privates vars for reload features
 _css_sources = []
 _css_widgets = set()
 
+#: Number of widgets restyled per frame after a css_reload()
+css_reload_batch = 200
+
+# Widgets waiting to be restyled after a reload
+_css_pending = set()
+
+# Privates vars for precompiled cache
+_css_cache = None
+_css_cache_fn = None
+
 # Auto conversion from css to a special type.
 css_keyword_convert = {
     'color':                    parse_color,
@@ -118,18 +136,183 @@ css_keyword_convert = {
     'selected-color':           parse_color,
 }
 
+class CSSStyle(dict):
+    '''Computed style, shared between all the widgets that match the same
+    rules. It can't be modified: widgets access it through a
+    :class:`CSSStyleProxy`, that copy it on the first change.
+    '''
+    __slots__ = ()
+
+    def _readonly(self, *largs, **kwargs):
+        raise TypeError('CSSStyle is shared between widgets and read-only, '
+                        'use widget.apply_css() to change a widget style')
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def copy(self):
+        return dict(self)
+
+    def __reduce__(self):
+        return (dict, (dict(self), ))
+
+class CSSWidgetStyle(dict):
+    '''Style owned by a widget, copied from the shared :class:`CSSStyle`.
+    The drawing of the widget is marked dirty when the style is changed.
+    '''
+    __slots__ = ('_widget', )
+
+    def __init__(self, widget, style):
+        super(CSSWidgetStyle, self).__init__(style)
+        self._widget = weakref.ref(widget)
+
+    def _changed(self):
+        widget = self._widget()
+        if widget is not None:
+            widget.mark_dirty()
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._changed()
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._changed()
+    def clear(self):
+        dict.clear(self)
+        self._changed()
+    def pop(self, *largs):
+        value = dict.pop(self, *largs)
+        self._changed()
+        return value
+    def popitem(self):
+        item = dict.popitem(self)
+        self._changed()
+        return item
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        dict.__setitem__(self, key, default)
+        self._changed()
+        return default
+    def update(self, *largs, **kwargs):
+        dict.update(self, *largs, **kwargs)
+        self._changed()
+
+    def copy(self):
+        return dict(self)
+
+class CSSStyleProxy(object):
+    '''Style of a widget, as returned by `widget.style`. It read the shared
+    :class:`CSSStyle` of the widget, until the style is changed: then the
+    shared style is copied into a :class:`CSSWidgetStyle`, that replace the
+    proxy in the widget.
+    '''
+    __slots__ = ('_style', '_widget')
+
+    def __init__(self, widget, style):
+        self._style = style
+        self._widget = weakref.ref(widget)
+
+    @property
+    def shared(self):
+        '''Return the style actually read by the proxy: the shared
+        :class:`CSSStyle`, or the copy once the style have been changed'''
+        return self._style
+
+    def _get_writable(self):
+        style = self._style
+        if type(style) is CSSStyle:
+            widget = self._widget()
+            if widget is None:
+                style = self._style = dict(style)
+            else:
+                style = self._style = CSSWidgetStyle(widget, style)
+                if widget._style is self:
+                    widget._style = style
+        return style
+
+    # read, from the shared style
+    def __getitem__(self, key):
+        return self._style[key]
+    def get(self, key, default=None):
+        return self._style.get(key, default)
+    def __contains__(self, key):
+        return key in self._style
+    def has_key(self, key):
+        return key in self._style
+    def __iter__(self):
+        return iter(self._style)
+    def __len__(self):
+        return len(self._style)
+    def __eq__(self, other):
+        if type(other) is CSSStyleProxy:
+            other = other._style
+        return self._style == other
+    def __ne__(self, other):
+        return not self == other
+    def __repr__(self):
+        return repr(self._style)
+    def keys(self):
+        return self._style.keys()
+    def values(self):
+        return self._style.values()
+    def items(self):
+        return self._style.items()
+    def iterkeys(self):
+        return self._style.iterkeys()
+    def itervalues(self):
+        return self._style.itervalues()
+    def iteritems(self):
+        return self._style.iteritems()
+    def copy(self):
+        return dict(self._style)
+
+    # write, on a copy
+    def __setitem__(self, key, value):
+        self._get_writable()[key] = value
+    def __delitem__(self, key):
+        del self._get_writable()[key]
+    def clear(self):
+        self._get_writable().clear()
+    def pop(self, *largs):
+        return self._get_writable().pop(*largs)
+    def popitem(self):
+        return self._get_writable().popitem()
+    def setdefault(self, key, default=None):
+        if key in self._style:
+            return self._style[key]
+        return self._get_writable().setdefault(key, default)
+    def update(self, *largs, **kwargs):
+        self._get_writable().update(*largs, **kwargs)
+
 class CSSSheet(object):
+    '''A CSS sheet: parse CSS text, and search the style of widgets.
+
+    Rules are indexed by selector kind (<objectname>, .<classname>,
+    <objectname>.<classname>, #<objectid>), and the merged style of each
+    (class chain, cls, id) combination is computed only once, and shared
+    between widgets as a :class:`CSSStyle`. The index and the merged styles
+    are invalidated when a new text is parsed.
+    '''
     def __init__(self):
-        self._rule = ''
-        self._content = ''
-        self._state = 'rule'
-        self._css = {}
+        self._deferred = None
+        self.reset()
 
     def reset(self):
         self._rule = ''
         self._content = ''
         self._state = 'rule'
         self._css = {}
+        self._invalidate()
+
+    def _invalidate(self):
+        self._index = None
+        self._styles = {}
+
+    def _build_index(self):
+        '''Index rules by selector kind'''
+        self._index = _css_index_rules(self._css)
+        return self._index
 
     def parse_text(self, text):
         '''Parse a CSS text, and inject in the current sheet'''
@@ -190,13 +373,19 @@ class CSSSheet(object):
                         name = name[len(prefix):]
                         break
             if name in css_keyword_convert:
+                convert = css_keyword_convert[name]
+                if self._deferred is not None and \
+                   convert in css_deferred_parsers:
+                    deferred.append((sname.strip(), name))
+                    return sname.strip(), value
                 try:
-                    value = css_keyword_convert[name](value)
+                    value = convert(value)
                 except Exception:
                     pymt_logger.exception(
                         'Error while convert %s: %s' % (name, value))
             return sname.strip(), value
 
+        deferred = []
         rules = [x.strip() for x in rulestr.split(',') if x.strip() != '']
         keys = [extract(x.strip()) for x in contentstr.split(';') if x.strip() != '']
         for rule in rules:
@@ -204,51 +393,129 @@ class CSSSheet(object):
                 self._css[rule].update(dict(keys[:]))
             else:
                 self._css[rule] = dict(keys[:])
+            if self._deferred is not None:
+                self._deferred.extend([(rule, k, n) for k, n in deferred])
+        self._invalidate()
+
+    def merge(self, css):
+        '''Merge a rule table (rule -> style dict) into the current sheet'''
+        for rule, style in css.iteritems():
+            if rule in self._css:
+                self._css[rule].update(style)
+            else:
+                self._css[rule] = dict(style)
+        self._invalidate()
 
     def get_style(self, widget):
-        '''Return the style of a widget'''
+        '''Return the style of a widget, as a read-only :class:`CSSStyle`
+        shared with all the widgets matching the same rules.'''
+        index = self._index
+        if index is None:
+            index = self._build_index()
+        types, classes, typeclasses, ids = index
+
         widget_classes = get_widget_parents(widget)
-        widget_classes.append('*')
+        widget_cls = get_widget_cls(widget)
+
+        # an id is part of the key only if a rule exist for it
+        widget_id = getattr(widget, 'id', None)
+        if widget_id is not None and widget_id not in ids:
+            widget_id = None
+
+        key = (widget_classes, widget_cls, widget_id)
+        styles = self._styles.get(key)
+        if styles is not None:
+            return styles
+        return self._merge_style(index, key)
+
+    def get_styles(self, widgets):
+        '''Return the styles of a list of widgets, like :meth:`get_style`.
+        The class names and css classes are searched only once for the
+        consecutive widgets of the same class and css class.'''
+        index = self._index
+        if index is None:
+            index = self._build_index()
+        ids = index[3]
+        result = []
+        group = None
+        for widget in widgets:
+            group_key = (widget.__class__, widget.cls)
+            if group_key != group:
+                group = group_key
+                widget_classes = get_widget_parents(widget)
+                widget_cls = get_widget_cls(widget)
+            widget_id = getattr(widget, 'id', None)
+            if widget_id is not None and widget_id not in ids:
+                widget_id = None
+            key = (widget_classes, widget_cls, widget_id)
+            styles = self._styles.get(key)
+            if styles is None:
+                styles = self._merge_style(index, key)
+            result.append(styles)
+        return result
+
+    def _merge_style(self, index, key):
+        '''Merge the rules matching a (classes, cls, id) key'''
+        types, classes, typeclasses, ids = index
+        widget_classes, widget_cls, widget_id = key
         styles = {}
 
-        # 
-        # TODO rework this part to match
-        # #<objectid>  uniq
-        # <objectname> uniq
-        # .<class>     multiple
-        #
-
         # match <objectname>
-        for cls in reversed(widget_classes):
-            for r, v in self._css.iteritems():
-                if r == cls:
-                    styles.update(v)
-
-        # match .<classname>
-        widget_cls = widget.cls
-        if type(widget_cls) in (unicode, str):
-            widget_cls = [widget.cls]
-        if type(widget_cls) in (list, tuple):
-            for kcls in widget_cls:
-                cls = '.%s' % kcls
-                if cls in self._css:
-                    styles.update(self._css[cls])
-
-                # match <objectname>.<classname>
-                for name in reversed(widget_classes):
-                    lcls = '%s%s' % (name, cls)
-                    for r, v in self._css.iteritems():
-                        if r == lcls:
-                            styles.update(v)
+        for name in widget_classes:
+            if name in types:
+                styles.update(types[name])
+
+        for kcls in widget_cls:
+            # match .<classname>
+            if kcls in classes:
+                styles.update(classes[kcls])
+
+            # match <objectname>.<classname>
+            for name in widget_classes:
+                lcls = (name, kcls)
+                if lcls in typeclasses:
+                    styles.update(typeclasses[lcls])
 
         # match #<objectname>
-        if hasattr(widget, 'id') and widget.id is not None:
-            widgetid = '#%s' % widget.id
-            if widgetid in self._css:
-                styles.update(self._css[widgetid])
+        if widget_id is not None:
+            styles.update(ids[widget_id])
 
+        styles = CSSStyle(styles)
+        self._styles[key] = styles
         return styles
 
+def _css_index_rules(rules):
+    # split rules (a dict or a set) by selector kind:
+    # <objectname>, .<classname>, <objectname>.<classname>, #<objectid>
+    types = {}
+    classes = {}
+    typeclasses = {}
+    ids = {}
+    isdict = type(rules) is dict
+    for rule in rules:
+        style = None
+        if isdict:
+            style = rules[rule]
+        if rule.startswith('#'):
+            ids[rule[1:]] = style
+        elif rule.startswith('.'):
+            classes[rule[1:]] = style
+        elif '.' in rule:
+            name, cls = rule.split('.', 1)
+            typeclasses[(name, cls)] = style
+        else:
+            types[rule] = style
+    return types, classes, typeclasses, ids
+
+def get_widget_cls(widget):
+    '''Return the css classes of a widget as a tuple'''
+    widget_cls = widget.cls
+    if type(widget_cls) in (unicode, str):
+        return (widget_cls, )
+    elif type(widget_cls) in (list, tuple):
+        return tuple(widget_cls)
+    return ()
+
 def get_truncated_classname(name):
     '''Return the css-ized name of a class
     (remove the MT prefix, and all in lowercase)'''
@@ -258,18 +525,25 @@ def get_truncated_classname(name):
 
 widgets_parents = {}
 def get_widget_parents(widget):
+    '''Return the css-ized names of the widget classes, from the most generic
+    ('*') to the widget class'''
+    try:
+        return widgets_parents[widget.__class__]
+    except KeyError:
+        pass
     parent = [widget.__class__]
-    if not widget.__class__ in widgets_parents:
-        widget_classes = list()
-        while parent and len(parent):
-            # take only the first parent...
-            widget_classes.append(get_truncated_classname(parent[0].__name__))
-            # don't back too far
-            if parent[0].__name__ in ['MTWidget', 'MTWindow']:
-                break
-            parent = parent[0].__bases__
-        widgets_parents[widget.__class__] = widget_classes
-    return widgets_parents[widget.__class__]
+    widget_classes = list()
+    while parent and len(parent):
+        # take only the first parent...
+        widget_classes.append(get_truncated_classname(parent[0].__name__))
+        # don't back too far
+        if parent[0].__name__ in ['MTWidget', 'MTWindow']:
+            break
+        parent = parent[0].__bases__
+    widget_classes.append('*')
+    widget_classes = tuple(reversed(widget_classes))
+    widgets_parents[widget.__class__] = widget_classes
+    return widget_classes
 
 def css_get_widget_id(widget):
     '''Return the css id of a widget'''
@@ -285,7 +559,8 @@ def css_get_widget_id(widget):
     return idwidget
 
 def css_get_style(widget):
-    '''Return a dict() with all the style for the widget.
+    '''Return a read-only dict (:class:`CSSStyle`) with all the style for the
+    widget. The dict is shared between widgets matching the same rules.
 
     :Parameters:
         `widget`: class
@@ -298,14 +573,16 @@ def css_get_style(widget):
     if not ref in _css_widgets:
         _css_widgets.add(ref)
 
-    idwidget = css_get_widget_id(widget)
-    styles = Cache.get('pymt.css', idwidget)
-    if styles is not None:
-        return styles
+    return pymt_sheet.get_style(widget)
 
-    styles = pymt_sheet.get_style(widget)
-    Cache.append('pymt.css', idwidget, styles)
-    return styles
+def css_get_styles(widgets):
+    '''Return the styles of a list of widgets, like :func:`css_get_style`.
+    Faster for a list of widgets of the same class and css class.'''
+    for widget in widgets:
+        ref = weakref.ref(widget)
+        if not ref in _css_widgets:
+            _css_widgets.add(ref)
+    return pymt_sheet.get_styles(widgets)
 
 def css_add_sheet(text, _reload=False):
     '''Add a css text to use.
@@ -319,6 +596,70 @@ def css_add_sheet(text, _reload=False):
     if not _reload:
         _css_sources.append((css_add_sheet, (text, )))
 
+def css_compile(text):
+    '''Parse a CSS text, and return the rule table and the list of deferred
+    values (rule, key, keyword) that are not converted yet.'''
+    sheet = CSSSheet()
+    sheet._deferred = []
+    sheet.parse_text(text)
+    return sheet._css, sheet._deferred
+
+def _css_signature(text):
+    # the parsed result depend of the text, of the conversion rules, and of
+    # the parsers implementation (changed between pymt versions)
+    keywords = ['%s:%s' % (k, getattr(v, '__name__', v))
+                for k, v in css_keyword_convert.iteritems()]
+    keywords.sort()
+    h = hashlib.sha1(text)
+    h.update(__version__)
+    h.update('|'.join(keywords))
+    h.update('|'.join(pymt_css_states))
+    h.update('|'.join(pymt_css_prefix))
+    h.update('|'.join([getattr(x, '__name__', str(x))
+                       for x in css_deferred_parsers]))
+    return h.hexdigest()
+
+def _css_cache_load():
+    global _css_cache
+    _css_cache = {}
+    if _css_cache_fn is None or not os.path.exists(_css_cache_fn):
+        return
+    try:
+        with open(_css_cache_fn, 'rb') as fd:
+            version, cache = cPickle.load(fd)
+        if version == CSS_CACHE_VERSION:
+            _css_cache = cache
+    except Exception:
+        pymt_logger.warning('CSS: unable to read precompiled cache <%s>' %
+                            _css_cache_fn)
+
+def _css_cache_save():
+    if _css_cache_fn is None:
+        return
+    try:
+        with open(_css_cache_fn, 'wb') as fd:
+            cPickle.dump((CSS_CACHE_VERSION, _css_cache), fd,
+                         cPickle.HIGHEST_PROTOCOL)
+    except Exception:
+        pymt_logger.warning('CSS: unable to write precompiled cache <%s>' %
+                            _css_cache_fn)
+
+def css_get_compiled(cssfile, text):
+    '''Return the rule table and deferred values of a css file, from the
+    precompiled cache if the file content is the same, or parse it and
+    update the cache.'''
+    if _css_cache is None:
+        _css_cache_load()
+    cssfile = os.path.abspath(cssfile)
+    signature = _css_signature(text)
+    entry = _css_cache.get(cssfile)
+    if entry is not None and entry[0] == signature:
+        return entry[1], entry[2]
+    css, deferred = css_compile(text)
+    _css_cache[cssfile] = (signature, css, deferred)
+    _css_cache_save()
+    return css, deferred
+
 def css_add_file(cssfile, _reload=False):
     '''Add a css file to use.
     Adds all the css rules in the given file to the pymt css rule set being
@@ -326,10 +667,24 @@ def css_add_file(cssfile, _reload=False):
 
         css_add_sheet(cssfile)
 
+    The parsed rules are stored in a precompiled cache, and reused as long
+    as the file content doesn't change.
     '''
     resource_add_path(os.path.dirname(cssfile))
     with open(cssfile, 'r') as fd:
-        pymt_sheet.parse_text(fd.read())
+        text = fd.read()
+    css, deferred = css_get_compiled(cssfile, text)
+    if deferred:
+        # don't alter the cached table
+        css = dict([(rule, dict(style)) for rule, style in css.iteritems()])
+        for rule, key, keyword in deferred:
+            value = css[rule][key]
+            try:
+                css[rule][key] = css_keyword_convert[keyword](value)
+            except Exception:
+                pymt_logger.exception(
+                    'Error while convert %s: %s' % (keyword, value))
+    pymt_sheet.merge(css)
     if not _reload:
         _css_sources.append((css_add_file, (cssfile, )))
 
@@ -346,22 +701,83 @@ def css_add_keyword(keyword, convertfunc):
     Convert function can be found in parser.py'''
     css_keyword_convert[keyword] = convertfunc
 
-def css_reload():
+def css_match_widget(widget, index):
+    '''Return True if the widget is matched by one of the rules of an index
+    (as returned by _css_index_rules())'''
+    types, classes, typeclasses, ids = index
+    widget_classes = get_widget_parents(widget)
+    for name in widget_classes:
+        if name in types:
+            return True
+    for kcls in get_widget_cls(widget):
+        if kcls in classes:
+            return True
+        for name in widget_classes:
+            if (name, kcls) in typeclasses:
+                return True
+    widget_id = getattr(widget, 'id', None)
+    return widget_id is not None and widget_id in ids
+
+def _css_reload_step(*largs):
+    # restyle a batch of pending widgets
+    count = css_reload_batch
+    while _css_pending and count > 0:
+        o = _css_pending.pop()()
+        if o is None:
+            continue
+        o.reload_css()
+        count -= 1
+    if not _css_pending:
+        pymt_logger.info('CSS: CSS Reloaded')
+        return False
+
+def css_reload(batch=True):
+    '''Reload all the css sources, and restyle only the widgets matched by a
+    rule that changed. If `batch` is True, the widgets are restyled over the
+    next frames, `css_reload_batch` per frame.'''
     pymt_logger.debug('CSS: Reloading CSS in progress')
+    old = pymt_sheet._css
     pymt_sheet.reset()
     for callback, args in _css_sources[:]:
         callback(*args, _reload=True)
-    Cache.remove('pymt.css')
+    new = pymt_sheet._css
+
+    # search changed rules
+    changed = set()
+    for rule in set(old.keys() + new.keys()):
+        if old.get(rule) != new.get(rule):
+            changed.add(rule)
+    index = _css_index_rules(changed)
+
+    # search affected widgets, and remove the dead ones
+    count = 0
     for r in _css_widgets.copy():
         o = r()
         if o is None:
             _css_widgets.remove(r)
             continue
-        o.reload_css()
-    pymt_logger.info('CSS: CSS Reloaded')
+        if changed and css_match_widget(o, index):
+            _css_pending.add(r)
+            count += 1
+    pymt_logger.debug('CSS: %d rules changed, %d widgets to restyle' % (
+        len(changed), count))
+
+    if not batch:
+        while _css_pending:
+            o = _css_pending.pop()()
+            if o is not None:
+                o.reload_css()
+        pymt_logger.info('CSS: CSS Reloaded')
+        return
+    getClock().unschedule(_css_reload_step)
+    if _css_reload_step() is not False:
+        getClock().schedule_interval(_css_reload_step, 0)
 
 # Autoload the default css + user css
 if 'PYMT_DOC' not in os.environ:
+    _css_start = time.time()
+    _css_cache_fn = os.path.join(pymt_home_dir, 'css.cache')
+
     # Add default CSSheet
     pymt_sheet = CSSSheet()
     css_add_file(os.path.join(pymt_data_dir, 'default.css'))
@@ -371,6 +787,9 @@ if 'PYMT_DOC' not in os.environ:
     if os.path.exists(css_filename):
         css_add_file(css_filename)
 
+    pymt_logger.info('CSS: Stylesheets loaded in %.2fms' % (
+        (time.time() - _css_start) * 1000.))
+
 
 if __name__ == '__main__':
     from pymt import MTWidget, css_get_style, MTWindow
@@ -0,0 +1,56 @@
+'''
+Retained drawing: record the draw() of a widget, and replay it
+
+The drawing of a widget is recorded in a display list the first time, and
+the display list is called on the next frames, until one of the watched
+properties of the widget changes ::
+
+    class MyWidget(MTWidget):
+        retained_properties = ('pos', 'size', 'color')
+        def draw(self):
+            set_color(*self.color)
+            drawRectangle(pos=self.pos, size=self.size)
+
+    w = MyWidget(retained=True)
+
+The watched properties are listed in the `retained_properties` class
+attribute, and compared on each frame. A change of the widget style is also
+detected. If the drawing depend on something else, call
+:meth:`MTWidget.mark_dirty`.
+
+When the `retained_draw` token of the `graphics` section is set in the
+configuration, the retained drawing is used by default for all the widgets
+that declare the properties used by their drawing methods.
+'''
+
+__all__ = ('RetainedDraw', )
+
+from pymt.graphx import GlDisplayList
+
+class RetainedDraw(object):
+    '''Display list of a widget drawing, recorded again when the watched
+    properties of the widget change.'''
+
+    __slots__ = ('dl', 'key', 'dirty')
+
+    def __init__(self):
+        self.dl = None
+        self.key = None
+        self.dirty = True
+
+    def draw(self, widget):
+        '''Replay the drawing of the widget, or record it again if it
+        changed'''
+        key = tuple([getattr(widget, x) for x in widget.retained_properties])
+        dl = self.dl
+        if dl is None:
+            dl = self.dl = GlDisplayList(mode='execute')
+        if self.dirty or key != self.key or not dl.is_compiled():
+            self.key = key
+            self.dirty = False
+            dl.clear()
+            # recorded and executed at the same time
+            with dl:
+                widget.draw()
+        else:
+            dl.draw()
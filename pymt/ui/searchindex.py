@@ -0,0 +1,139 @@
+'''
+Search index: find the items containing a text without scanning all of them
+
+The index store the n-grams (3 characters by default) of the text of each
+item. A search only check the items having all the n-grams of the pattern.
+It's used by :class:`MTKineticList` to filter the children while the user
+type in the search input ::
+
+    index = SearchIndex()
+    for item in items:
+        index.add(item, item.label)
+    result = index.query('hello')
+
+When a pattern contain the previous one (the user typed one more
+character), only the previous result is filtered.
+
+.. warning::
+
+    The text is copied when the item is added. If the text of an item
+    change, call :meth:`SearchIndex.add` again.
+'''
+
+__all__ = ('SearchIndex', )
+
+class SearchIndex(object):
+    '''N-gram index of the text of items, for substring search. Items are
+    returned in the order they have been added.
+
+    :Parameters:
+        `n`: int, default to 3
+            Length of the n-grams. Patterns shorter than this are searched
+            by scanning all the items.
+    '''
+
+    __slots__ = ('n', '_grams', '_entries', '_order', '_ordered',
+                 '_last_pattern', '_last_result')
+
+    def __init__(self, n=3):
+        self.n = n
+        self.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, item):
+        return item in self._entries
+
+    def clear(self):
+        '''Remove all the items from the index'''
+        self._grams = {}
+        self._entries = {}
+        self._order = 0
+        self._ordered = []
+        self._last_pattern = None
+        self._last_result = None
+
+    def _get_grams(self, text):
+        n = self.n
+        return set([text[i:i + n] for i in xrange(len(text) - n + 1)])
+
+    def _invalidate(self):
+        self._last_pattern = None
+        self._last_result = None
+
+    def _unlink(self, item, text):
+        grams = self._grams
+        for gram in self._get_grams(text):
+            content = grams[gram]
+            content.discard(item)
+            if not content:
+                del grams[gram]
+
+    def add(self, item, text):
+        '''Add an item in the index, or update its text'''
+        entry = self._entries.get(item)
+        if entry is not None:
+            order = entry[0]
+            self._unlink(item, entry[1])
+        else:
+            self._order += 1
+            order = self._order
+            if self._ordered is not None:
+                self._ordered.append(item)
+        self._entries[item] = (order, text)
+        grams = self._grams
+        for gram in self._get_grams(text):
+            try:
+                grams[gram].add(item)
+            except KeyError:
+                grams[gram] = set((item, ))
+        self._invalidate()
+
+    def remove(self, item):
+        '''Remove an item from the index'''
+        entry = self._entries.pop(item, None)
+        if entry is None:
+            return
+        self._ordered = None
+        self._unlink(item, entry[1])
+        self._invalidate()
+
+    def _get_ordered(self):
+        if self._ordered is None:
+            entries = self._entries
+            self._ordered = sorted(entries, key=entries.__getitem__)
+        return self._ordered
+
+    def _get_candidates(self, pattern):
+        # return the items that can contain the pattern, and if they are
+        # in order
+        last = self._last_pattern
+        if last is not None and last in pattern:
+            # narrowing: the result is a subset of the previous one
+            return self._last_result, True
+        if len(pattern) < self.n:
+            return self._get_ordered(), True
+        grams = self._grams
+        sets = []
+        for gram in self._get_grams(pattern):
+            content = grams.get(gram)
+            if content is None:
+                return (), True
+            sets.append(content)
+        sets.sort(key=len)
+        if len(sets[0]) * 16 > len(self._entries):
+            # too many candidates, scanning is faster than sorting them
+            return self._get_ordered(), True
+        return sets[0].intersection(*sets[1:]), False
+
+    def query(self, pattern):
+        '''Return the list of items whose text contain the pattern'''
+        entries = self._entries
+        candidates, ordered = self._get_candidates(pattern)
+        result = [item for item in candidates if pattern in entries[item][1]]
+        if not ordered:
+            result.sort(key=entries.__getitem__)
+        self._last_pattern = pattern
+        self._last_result = result
+        return result
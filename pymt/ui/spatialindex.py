@@ -0,0 +1,139 @@
+'''
+Spatial index: search children under a point without iterating all of them
+
+The index is an uniform grid over the bounding boxes of the children, in the
+parent space. It's used by :class:`MTWidget` when the `spatial_index`
+parameter is set, to dispatch touch events only to the children under the
+touch ::
+
+    plane = MTScatterPlane(spatial_index=True)
+    for x in xrange(3000):
+        plane.add_widget(MTScatterImage(filename=...))
+
+.. warning::
+
+    With an index, a child receive touch events only when the touch is in
+    its bounding box. Widgets that handle touches outside their bounds must
+    grab them.
+'''
+
+__all__ = ('SpatialIndex', )
+
+class SpatialIndex(object):
+    '''Uniform grid of widgets bounding boxes.
+
+    :Parameters:
+        `cell_size`: int, default to 256
+            Size of a grid cell
+        `max_cells`: int, default to 64
+            Widgets covering more cells than this are not stored in the
+            grid, but tested for every query.
+    '''
+
+    __slots__ = ('cell_size', 'max_cells', '_cells', '_entries', '_large',
+                 '_order_front', '_order_back')
+
+    def __init__(self, cell_size=256, max_cells=64):
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self._cells = {}
+        self._entries = {}
+        self._large = set()
+        self._order_front = 0
+        self._order_back = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, widget):
+        return widget in self._entries
+
+    def clear(self):
+        '''Remove all the widgets from the index'''
+        self._cells = {}
+        self._entries = {}
+        self._large = set()
+        self._order_front = self._order_back = 0
+
+    def _get_cells(self, bbox):
+        (x, y), (w, h) = bbox
+        cs = self.cell_size
+        x1, y1 = int(x // cs), int(y // cs)
+        x2, y2 = int((x + w) // cs), int((y + h) // cs)
+        if (x2 - x1 + 1) * (y2 - y1 + 1) > self.max_cells:
+            return None
+        return tuple([(cx, cy) for cx in xrange(x1, x2 + 1)
+                      for cy in xrange(y1, y2 + 1)])
+
+    def _link(self, widget, cells):
+        if cells is None:
+            self._large.add(widget)
+            return
+        for cell in cells:
+            try:
+                self._cells[cell].add(widget)
+            except KeyError:
+                self._cells[cell] = set((widget, ))
+
+    def _unlink(self, widget, cells):
+        if cells is None:
+            self._large.discard(widget)
+            return
+        for cell in cells:
+            content = self._cells[cell]
+            content.discard(widget)
+            if not content:
+                del self._cells[cell]
+
+    def add(self, widget, front=True):
+        '''Add a widget in the index. The widget order is used to return
+        the widgets from the front to the back.'''
+        if widget in self._entries:
+            self.remove(widget)
+        if front:
+            self._order_front += 1
+            order = self._order_front
+        else:
+            self._order_back -= 1
+            order = self._order_back
+        bbox = widget.bbox
+        cells = self._get_cells(bbox)
+        self._entries[widget] = [order, bbox, cells]
+        self._link(widget, cells)
+
+    def remove(self, widget):
+        '''Remove a widget from the index'''
+        entry = self._entries.pop(widget, None)
+        if entry is not None:
+            self._unlink(widget, entry[2])
+
+    def update(self, widget):
+        '''Update the bounding box of a widget'''
+        entry = self._entries.get(widget)
+        if entry is None:
+            return
+        bbox = widget.bbox
+        cells = self._get_cells(bbox)
+        if cells != entry[2]:
+            self._unlink(widget, entry[2])
+            self._link(widget, cells)
+            entry[2] = cells
+        entry[1] = bbox
+
+    def query(self, x, y):
+        '''Return the widgets whose bounding box contain the point, from the
+        front to the back'''
+        cs = self.cell_size
+        candidates = self._cells.get((int(x // cs), int(y // cs)))
+        if candidates is None:
+            candidates = self._large
+        elif self._large:
+            candidates = candidates.union(self._large)
+        entries = self._entries
+        result = []
+        for widget in candidates:
+            order, ((wx, wy), (ww, wh)), cells = entries[widget]
+            if wx <= x <= wx + ww and wy <= y <= wy + wh:
+                result.append((order, widget))
+        result.sort(reverse=True)
+        return [widget for order, widget in result]
@@ -0,0 +1,87 @@
+'''
+Texture cache: render a widget and its children once in a Fbo
+
+The cache is used by :class:`MTWidget` when the `cache_as_texture` parameter
+is set. The widget and its children are rendered in a Fbo, and the texture is
+drawn on the next frames, until the widget or one of its children is marked
+as dirty ::
+
+    panel = MTWidget(size=(400, 300), cache_as_texture=True)
+    for x in xrange(100):
+        panel.add_widget(MTButton(...))
+
+A widget is marked dirty when its position, size, style, visibility or
+children change, when it's animated, or when it handle a touch. If the
+drawing change for another reason, call :meth:`MTWidget.mark_dirty`.
+
+.. warning::
+
+    Only the widget bounds are cached: children drawn outside are clipped.
+'''
+
+__all__ = ('TextureCache', )
+
+from math import ceil
+from pymt.logger import pymt_logger
+from pymt.graphx import Fbo
+
+class TextureCache(object):
+    '''Fbo of a widget, with memory accounting.
+
+    The memory used by all the caches is available in
+    `TextureCache.memory_used`. No new Fbo is allocated when the total
+    exceeds `TextureCache.memory_limit`: the widget is drawn without cache.
+    '''
+
+    __slots__ = ('fbo', 'size', 'dirty', 'memory')
+
+    #: Number of texture caches alive
+    instances = 0
+
+    #: Memory used by all the Fbo, in bytes
+    memory_used = 0
+
+    #: Maximum memory used by all the Fbo, in bytes. 0 for no limit.
+    memory_limit = 64 * 1024 * 1024
+
+    def __init__(self):
+        self.fbo = None
+        self.size = None
+        self.dirty = True
+        self.memory = 0
+        TextureCache.instances += 1
+
+    def __del__(self):
+        self.release()
+        TextureCache.instances -= 1
+
+    def update(self, width, height):
+        '''Allocate the Fbo for a widget size, if needed.
+        Return False if the Fbo can't be allocated.'''
+        size = max(1, int(ceil(width))), max(1, int(ceil(height)))
+        if size == self.size:
+            return self.fbo is not None
+        self.release()
+        self.size = size
+        memory = size[0] * size[1] * 4
+        limit = TextureCache.memory_limit
+        if limit and TextureCache.memory_used + memory > limit:
+            pymt_logger.warning('TextureCache: memory limit reached, '
+                                'unable to cache a %dx%d widget' % size)
+            return False
+        self.fbo = Fbo(size=size, with_depthbuffer=False)
+        w, h = self.fbo.realsize
+        self.memory = w * h * 4
+        TextureCache.memory_used += self.memory
+        pymt_logger.debug('TextureCache: %dx%d allocated, %d KB used' % (
+            size[0], size[1], TextureCache.memory_used / 1024))
+        return True
+
+    def release(self):
+        '''Free the Fbo. It will be allocated again on the next draw.'''
+        if self.fbo is not None:
+            TextureCache.memory_used -= self.memory
+            self.memory = 0
+            self.fbo = None
+        self.size = None
+        self.dirty = True
@@ -0,0 +1,89 @@
+'''
+Widget pool: reuse widgets instead of creating them again
+
+Creating a widget is expensive (style lookup, event registration, label
+creation...). Views that create and remove lot of widgets can release them
+in a pool, and acquire them later instead of creating new ones ::
+
+    from pymt.ui.widgetpool import pymt_widget_pool as pool
+
+    button = pool.acquire(MTButton, label='Hello', cls='item')
+    container.add_widget(button)
+    ...
+    pool.release(button)
+
+Widgets are stored by class and CSS class. When a widget is released,
+:meth:`MTWidget.reset` remove its parent, children, animations and event
+handlers. When it's acquired, :meth:`MTWidget.reuse` apply the parameters
+given to `acquire()`. Widgets with a custom state must extend these methods.
+
+.. warning::
+
+    A released widget must not be used anymore: it can be given to another
+    view at any time.
+'''
+
+__all__ = ('WidgetPool', 'pymt_widget_pool')
+
+class WidgetPool(object):
+    '''Released widgets, stored by class and CSS class.
+
+    :Parameters:
+        `limit`: int, default to 256
+            Maximum number of widgets kept for each class and CSS class.
+            Widgets released when the limit is reached are discarded.
+    '''
+
+    __slots__ = ('limit', '_widgets')
+
+    def __init__(self, limit=256):
+        self.limit = limit
+        self._widgets = {}
+
+    def __len__(self):
+        return sum(map(len, self._widgets.itervalues()))
+
+    @staticmethod
+    def _get_key(widgetclass, cls):
+        if not isinstance(cls, basestring):
+            cls = tuple(cls)
+        return widgetclass, cls
+
+    def acquire(self, widgetclass, **kwargs):
+        '''Return a widget of the class `widgetclass`, from the pool if
+        available, or a new one. The parameters are the same as the
+        constructor.'''
+        key = self._get_key(widgetclass, kwargs.get('cls', ''))
+        widgets = self._widgets.get(key)
+        if not widgets:
+            return widgetclass(**kwargs)
+        widget = widgets.pop()
+        widget.reuse(**kwargs)
+        return widget
+
+    def release(self, widget):
+        '''Reset the widget and put it in the pool. Return False if the pool
+        is full and the widget is discarded.'''
+        widget.reset()
+        key = self._get_key(widget.__class__, widget.cls)
+        try:
+            widgets = self._widgets[key]
+        except KeyError:
+            widgets = self._widgets[key] = []
+        if len(widgets) >= self.limit:
+            return False
+        widgets.append(widget)
+        return True
+
+    def clear(self, widgetclass=None):
+        '''Remove all the widgets of the pool, or only the widgets of a
+        class'''
+        if widgetclass is None:
+            self._widgets = {}
+            return
+        for key in self._widgets.keys():
+            if key[0] is widgetclass:
+                del self._widgets[key]
+
+#: Default widget pool
+pymt_widget_pool = WidgetPool()
@@ -8,6 +8,7 @@ import pymt
 import weakref
 from pymt.graphx import GlDisplayList, set_color, gx_blending, drawCSSRectangle
 from pymt.utils import SafeList
+from pymt.loader import ProxyImage
 from pymt.ui.widgets.label import MTLabel
 
 class MTButton(MTLabel):
@@ -65,6 +66,10 @@ class MTButton(MTLabel):
         `on_release` (touch object, )
             Fired when the button are released
     '''
+    __events__ = ('on_press', 'on_release', 'on_state_change')
+
+    retained_properties = MTLabel.retained_properties + ('state', )
+
     def __init__(self, **kwargs):
         kwargs.setdefault('autosize', False)
         kwargs.setdefault('autowidth', False)
@@ -81,10 +86,6 @@ class MTButton(MTLabel):
 
         super(MTButton, self).__init__(**kwargs)
 
-        self.register_event_type('on_press')
-        self.register_event_type('on_release')
-        self.register_event_type('on_state_change')
-
     def on_press(self, *largs):
         pass
 
@@ -121,6 +122,12 @@ class MTButton(MTLabel):
             self.dispatch_event('on_release', touch)
         return True
 
+    def reset(self):
+        super(MTButton, self).reset()
+        self._state         = 'normal'
+        self._state_color   = 'color'
+        self._current_touch = None
+
     def _get_state(self):
         return self._state
     def _set_state(self, state):
@@ -129,7 +136,7 @@ class MTButton(MTLabel):
         self._state = state
         self._state_color = 'color-%s' % state
         if not self._state_color in self.style:
-            self.style[self._state_color] = self.style['color']
+            self.apply_css({self._state_color: self.style['color']})
         self.dispatch_event('on_state_change', state)
         return True
     state = property(_get_state, _set_state,
@@ -274,6 +281,18 @@ class MTImageButton(MTButton):
         self.filename       = kwargs.get('filename')
         self.size           = self.image.size
 
+    def _get_image(self):
+        return self._image
+    def _set_image(self, image):
+        self._image = image
+        # the image of the loader is replaced when loaded
+        if isinstance(image, ProxyImage) and not image.loaded:
+            image.push_handlers(on_load=self._on_image_load)
+    image = property(_get_image, _set_image)
+
+    def _on_image_load(self):
+        self.mark_dirty()
+
     def _get_filename(self):
         return self._filename
     def _set_filename(self, filename):
@@ -29,6 +29,8 @@ class MTButtonMatrix(MTWidget):
         `on_press` (row,column,state)
             Returns the state and cell position of a button when touched
     '''
+    __events__ = ('on_value_change', 'on_press')
+
     def __init__(self, **kwargs):
         kwargs.setdefault('matrix_size', (3, 3))
         kwargs.setdefault('border', 5)
@@ -36,9 +38,6 @@ class MTButtonMatrix(MTWidget):
         kwargs.setdefault('downcolor', (0, 0.5, 1, 1))
         super(MTButtonMatrix, self).__init__(**kwargs)
 
-        self.register_event_type('on_value_change')
-        self.register_event_type('on_press')
-
         self._matrix_size = kwargs.get('matrix_size')
         self.border = kwargs.get('border')
         self.buttoncolor = kwargs.get('buttoncolor')
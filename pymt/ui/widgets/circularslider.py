@@ -51,6 +51,8 @@ class MTCircularSlider(MTWidget):
         `on_value_change`
             Fired when slider value is changed
     '''
+    __events__ = ('on_value_change', )
+
     def __init__(self, **kwargs):
         kwargs.setdefault('min', 0)
         kwargs.setdefault('max', 100)
@@ -64,9 +66,6 @@ class MTCircularSlider(MTWidget):
 
         super(MTCircularSlider, self).__init__(**kwargs)
 
-        # register event
-        self.register_event_type('on_value_change')
-
         # privates
         self._last_touch    = (0, 0)
         self._slider_angle  = 0.
@@ -10,8 +10,15 @@ __all__ = (
 
 import os
 import re
+import time
+import threading
+import collections
+from Queue import Queue
 import pymt
 from pymt.utils import curry
+from pymt.cache import Cache
+from pymt.clock import getClock
+from pymt.logger import pymt_logger
 from pymt.loader import Loader
 from pymt.graphx import drawCSSRectangle, set_color, drawLabel, getLabel
 from pymt.ui.factory import MTWidgetFactory
@@ -23,6 +30,98 @@ from pymt.ui.widgets.composed.popup import MTPopup
 # Search icons in data/icons/filetype
 icons_filetype_dir = os.path.join(pymt.pymt_data_dir, 'icons', 'filetype')
 
+#: Extensions of files shown as thumbnails in icon view
+thumbnail_extensions = ('jpg', 'jpeg', 'png', 'bmp')
+
+#: Number of entries checked by the worker before sending them to the view
+LISTING_CHUNK = 256
+
+# listing of the directories, reused until the directory is modified
+Cache.register('pymt.filebrowser', limit=50, timeout=120)
+
+def scan_directory(path, cached=None, callback=None):
+    '''List a directory, and return (mtime, entries). Entries are a list of
+    (name, isdir) sorted by name.
+
+    :Parameters:
+        `cached`: tuple, default to None
+            Previous result for this directory. If the directory is not
+            modified since, it's returned without listing it again.
+        `callback`: function, default to None
+            Called with each chunk of entries. If it returns False, the scan
+            is stopped and None is returned.
+    '''
+    mtime = os.path.getmtime(path)
+    if cached is not None and cached[0] == mtime:
+        if callback is not None:
+            callback(cached[1])
+        return cached
+    names = os.listdir(path)
+    names.sort()
+    isdir = os.path.isdir
+    join = os.path.join
+    entries = []
+    for i in xrange(0, len(names), LISTING_CHUNK):
+        chunk = [(name, isdir(join(path, name)))
+                 for name in names[i:i + LISTING_CHUNK]]
+        entries.extend(chunk)
+        if callback is not None and callback(chunk) is False:
+            return None
+    return mtime, entries
+
+# asynchronous listing: directories are scanned in a worker thread, and the
+# entry views are created from the main thread.
+_listing_queue = Queue()
+_listing_done = collections.deque()
+_listing_active = []
+_listing_worker = None
+
+def _listing_run():
+    while True:
+        view, job, path, cached = _listing_queue.get()
+        if view._listing_job != job:
+            continue
+        def send(chunk):
+            if view._listing_job != job:
+                return False
+            _listing_done.append((view, job, chunk, None))
+        try:
+            result = scan_directory(path, cached, send)
+        except Exception:
+            pymt_logger.exception('FileBrowser: unable to list <%s>' % path)
+            result = None
+        _listing_done.append((view, job, None, result))
+
+def _listing_update(dt):
+    # give the listed entries to the views, and create the entry views until
+    # the frame budget is reached
+    while _listing_done:
+        view, job, chunk, result = _listing_done.popleft()
+        if view._listing_job != job:
+            continue
+        if chunk is not None:
+            view._listing_pending.extend(chunk)
+        else:
+            view._listing_finished = True
+            if result is not None:
+                Cache.append('pymt.filebrowser', view.path, result)
+        if view not in _listing_active:
+            _listing_active.append(view)
+    deadline = time.time() + MTFileBrowserView.listing_budget
+    for view in _listing_active[:]:
+        if view._process_listing(deadline):
+            _listing_active.remove(view)
+
+def _listing_start():
+    global _listing_worker
+    if _listing_worker is not None:
+        return
+    _listing_worker = threading.Thread(target=_listing_run,
+                                       name='FileBrowserLister')
+    _listing_worker.daemon = True
+    _listing_worker.start()
+    getClock().schedule_interval(_listing_update, 0)
+
 class FileTypeFactory:
     '''
     FileType Factory: Maintains a Dictionary of all filetypes and its icons.
@@ -55,25 +154,49 @@ class FileTypeFactory:
             return FileTypeFactory.__filetypes__['unknown']
 
 class MTFileEntryView(MTKineticItem):
-    '''Base view class for every file entry'''
+    '''Base view class for every file entry
+
+    :Parameters:
+        `isdir` : bool, default to None
+            Indicate if the entry is a directory. If None, the filesystem is
+            checked.
+    '''
     def __init__(self, **kwargs):
+        self._image     = None
         super(MTFileEntryView, self).__init__(**kwargs)
         self.type_image = None
         self.filename   = kwargs.get('filename')
         self.browser    = kwargs.get('browser')
         self.label_txt  = kwargs.get('label')
+        self.isdir      = kwargs.get('isdir')
         self.selected   = False
 
+        if self.isdir is None:
+            self.isdir = os.path.isdir(self.filename)
         self.get_image_for_filename()
 
     def get_image_for_filename(self):
         '''Return image for current filename'''
-        if os.path.isdir(self.filename):
+        if self.isdir:
             self.type_image = FileTypeFactory.get('folder')
         else:
             ext = self.label_txt.split('.')[-1]
             self.type_image = FileTypeFactory.get(ext)
 
+    def load_image(self):
+        '''Return the image of the entry. Called on the first draw, the image
+        is loaded with the :class:`~pymt.loader.Loader`.'''
+        return Loader.image(self.type_image)
+
+    def _get_image(self):
+        if self._image is None:
+            self._image = self.load_image()
+        return self._image
+    def _set_image(self, image):
+        self._image = image
+    image = property(_get_image, _set_image,
+        doc='Image of the entry, loaded on first use')
+
     def striptext(self, text, number=10):
         '''Strip a text to `number` characters, without space/tab'''
         return str(text)[:number].strip("\t ")
@@ -84,12 +207,15 @@ class MTFileListEntryView(MTFileEntryView):
     def __init__(self, **kwargs):
         super(MTFileListEntryView, self).__init__(**kwargs)
         self.height         = 25
-        self.image          = Loader.image(self.type_image)
-        self.image.scale    = 0.5
         if self.browser._w_limit is None:
             self.browser.w_limit    = 1
         self.font_size = self.style['font-size']
 
+    def load_image(self):
+        image = super(MTFileListEntryView, self).load_image()
+        image.scale = 0.5
+        return image
+
     def draw(self):
         pos = self.image.width, self.y
         # Max number of chars for this entry's label
@@ -113,10 +239,17 @@ class MTFileIconEntryView(MTFileEntryView):
     def __init__(self, **kwargs):
         super(MTFileIconEntryView, self).__init__(**kwargs)
         self.size           = (80, 80)
-        self.image          = Loader.image(self.type_image)
+        self.thumbnail      = not self.isdir and \
+                self.browser is not None and self.browser.thumbnails and \
+                self.label_txt.split('.')[-1].lower() in thumbnail_extensions
         if self.browser._w_limit is None:
             self.browser.w_limit = 4
 
+    def load_image(self):
+        if self.thumbnail:
+            return Loader.image(self.filename)
+        return super(MTFileIconEntryView, self).load_image()
+
     def draw(self):
         if self.selected:
             selected_color = self.style.get('selected-color', (0.4,) * 4)
@@ -124,9 +257,16 @@ class MTFileIconEntryView(MTFileEntryView):
             drawCSSRectangle(pos=self.pos, size=self.size, style=self.style)
         pos = int(self.x + self.width / 2.), int(self.y + 10)
         drawLabel(label=self.striptext(self.label_txt, 10), pos=pos)
-        self.image.x        = self.x + int(self.image.width / 2) - 5
-        self.image.y        = self.y + int(self.image.height / 2) - 5
-        self.image.draw()
+        image = self.image
+        if self.thumbnail:
+            # fit the thumbnail above the label
+            image.scale = min(1., 56. / max(image.width, image.height, 1))
+            image.x = int(self.x + (self.width - image.width * image.scale) / 2)
+            image.y = int(self.y + 22)
+        else:
+            image.x = self.x + int(image.width / 2) - 5
+            image.y = self.y + int(image.height / 2) - 5
+        image.draw()
 
 
 class MTFileBrowserView(MTKineticList):
@@ -146,13 +286,32 @@ class MTFileBrowserView(MTKineticList):
             Allow multiple selection of files
         `invert_order` : bool, default to False
             Indicates whether the order the files are displayed in should be reversed
+        `async` : bool, default to True
+            List the directory in a worker thread, and add the entries
+            progressively on the next frames. Otherwise, the entries are
+            added immediately by `update()`.
+        `thumbnails` : bool, default to False
+            Show images as thumbnails in icon view, instead of the file type
+            icon
 
     :Events:
         `on_path_change` : (str)
             Fired when path changed
         `on_selection_change` : list of str
             Fired when selection change
+        `on_listing_progress` : (int, bool)
+            Fired when entries are added, with the number of entries and
+            True when the listing is finished
     '''
+    __events__ = ('on_path_change', 'on_selection_change',
+                  'on_listing_progress')
+
+    #: Maximum time spent to create entry views on each frame, in seconds.
+    #: At least one entry is added per frame.
+    listing_budget = 0.008
+
+    _listing_counter = 0
+
     def __init__(self, **kwargs):
         kwargs.setdefault('deletable', False)
         kwargs.setdefault('searchable', False)
@@ -162,14 +321,13 @@ class MTFileBrowserView(MTKineticList):
         kwargs.setdefault('view', MTFileIconEntryView)
         kwargs.setdefault('filters', [])
         kwargs.setdefault('multipleselection', False)
+        kwargs.setdefault('async', True)
+        kwargs.setdefault('thumbnails', False)
 
         self._w_limit = kwargs.get('w_limit', None)
 
         super(MTFileBrowserView, self).__init__(**kwargs)
 
-        self.register_event_type('on_path_change')
-        self.register_event_type('on_selection_change')
-
         self._selection     = []
         self._path          = '(invalid path)'
         self.show_hidden    = kwargs.get('show_hidden')
@@ -177,77 +335,131 @@ class MTFileBrowserView(MTKineticList):
         self.filters        = kwargs.get('filters')
         self.multipleselection = kwargs.get('multipleselection')
         self.invert_order = kwargs.get('invert_order', False)
+        self.async          = kwargs.get('async')
+        self.thumbnails     = kwargs.get('thumbnails')
+
+        # listing in progress
+        self.loading            = False
+        self._listing_job       = None
+        self._listing_pending   = collections.deque()
+        self._listing_finished  = False
+        self._listing_views     = ([], [])
+        self._parent_view       = None
 
         # only at the end, set path to the user path
         self.path           = kwargs.get('path')
 
     def update(self):
         '''Update the content of view. You must call this function after
-        any change of a property. (except path.)'''
+        any change of a property. (except path.)
+
+        In asynchronous mode, the directory is listed in a worker thread, and
+        the entries are added on the next frames. The listing is cached until
+        the directory is modified.'''
         # remove all actual entries
         self.clear()
         self.selection = []
 
-        children = []
-        listfiles = os.listdir(self.path)
-        listfiles.sort()
+        # cancel the previous listing
+        MTFileBrowserView._listing_counter += 1
+        self._listing_job = MTFileBrowserView._listing_counter
+        self._listing_pending = collections.deque()
+        self._listing_finished = False
+        self._listing_views = ([], [])
+        self.loading = True
+
+        # add always "to parent", first
+        self._parent_view = self._create_entry(
+            '..', os.path.join(self.path, '../'), True)
+
+        cached = Cache.get('pymt.filebrowser', self.path)
+        if self.async:
+            _listing_start()
+            _listing_queue.put((self, self._listing_job, self.path, cached))
+            self._update_listing_order()
+            return
 
-        # add each file from directory
-        # only files are filtred with filters
-        for name in reversed(listfiles):
-            filename = os.path.join(self.path, name)
+        try:
+            result = scan_directory(self.path, cached)
+        except OSError:
+            pymt_logger.exception('FileBrowser: unable to list <%s>' %
+                                  self.path)
+            result = None
+        if result is not None:
+            Cache.append('pymt.filebrowser', self.path, result)
+            self._listing_pending.extend(result[1])
+        self._listing_finished = True
+        self._process_listing(None)
+
+    def _create_entry(self, name, filename, isdir):
+        view = self.view(label=name, filename=filename, isdir=isdir,
+                         browser=self, size=self.size)
+        view.push_handlers(on_press=curry(self._on_file_selected, view))
+        self.add_widget(view)
+        return view
+
+    def _process_listing(self, deadline):
+        # create the views of the pending entries, until the deadline.
+        # return True when the listing is finished.
+        pending = self._listing_pending
+        dirs, files = self._listing_views
+        show_hidden = self.show_hidden
+        filters = self.filters
+        path = self.path
+        count = len(dirs) + len(files)
+        while pending:
+            name, isdir = pending.popleft()
 
             # filter on hidden file if requested
-            if not self.show_hidden:
-                if name != '..' and name[0] == '.':
-                    continue
-
-            if os.path.isdir(filename):
+            if not show_hidden and name[0] == '.':
                 continue
 
-            # filtering
-            if len(self.filters):
-                match = False
-                for regex in self.filters:
+            # filtering, only files are filtred with filters
+            if not isdir and len(filters):
+                for regex in filters:
                     if re.match(regex, name):
-                        match = True
-                if not match:
+                        break
+                else:
                     continue
 
-            # add this file as new file.
-            children.append(self.view(
-                label=name, filename=filename,
-                browser=self, size=self.size
-            ))
-
-        # second time, do directories
-        for name in reversed(listfiles):
-            filename = os.path.join(self.path, name)
-
-            # filter on hidden file if requested
-            if not self.show_hidden:
-                if name != '..' and name[0] == '.':
-                    continue
+            view = self._create_entry(name, os.path.join(path, name), isdir)
+            if isdir:
+                dirs.append(view)
+            else:
+                files.append(view)
+            if deadline is not None and time.time() > deadline:
+                break
+
+        finished = self._listing_finished and not pending
+        if len(dirs) + len(files) != count or finished:
+            self._update_listing_order()
+            if finished:
+                self.loading = False
+            self.dispatch_event('on_listing_progress',
+                                len(dirs) + len(files), finished)
+        return finished
+
+    def _update_listing_order(self):
+        # parent, directories then files, sorted by name
+        dirs, files = self._listing_views
+        children = [self._parent_view] + dirs + files
+        if self.invert_order:
+            children.reverse()
+        self.children[:] = children
+        self.pchildren[:] = children
+
+    @property
+    def entries_count(self):
+        '''Number of entries shown, without the parent entry'''
+        dirs, files = self._listing_views
+        return len(dirs) + len(files)
 
-            if not os.path.isdir(filename):
-                continue
-
-            # add this file as new file.
-            children.append(self.view(
-                label=name, filename=filename,
-                browser=self, size=self.size
-            ))
-
-        # add always "to parent"
-        children.append(self.view(
-            label='..', filename=os.path.join(self.path, '../'),
-            browser=self, size=self.size
-        ))
-
-        # attach handlers
-        for child in children:
-            child.push_handlers(on_press=curry(self._on_file_selected, child))
-            self.add_widget(child, front=self.invert_order)
+    def draw(self):
+        super(MTFileBrowserView, self).draw()
+        if self.loading:
+            drawLabel(label='%d...' % self.entries_count,
+                      pos=(self.x + self.width - 10, self.y + 10),
+                      anchor_x='right', anchor_y='bottom')
 
     def _get_path(self):
         return self._path
@@ -270,7 +482,7 @@ class MTFileBrowserView(MTKineticList):
     def _on_file_selected(self, fileview, touch):
         # auto change for directory
         filename = fileview.filename
-        if os.path.isdir(filename) and touch.is_double_tap:
+        if fileview.isdir and touch.is_double_tap:
             # Enter that directory
             self.path = filename
             # Forget about any selection we did before
@@ -312,6 +524,9 @@ class MTFileBrowserView(MTKineticList):
     def on_path_change(self, path):
         pass
 
+    def on_listing_progress(self, count, finished):
+        pass
+
 
 class MTFileBrowserToggle(MTToggleButton):
     '''Internal Button for FileBrowser'''
@@ -358,6 +573,8 @@ class MTFileBrowser(MTPopup):
             A list of files selected are also passed as a parameter to this function
     '''
 
+    __events__ = ('on_select', )
+
     def __init__(self, **kwargs):
         kwargs.setdefault('title', 'Open a file')
         kwargs.setdefault('label_submit', 'Open')
@@ -369,8 +586,6 @@ class MTFileBrowser(MTPopup):
         kwargs.setdefault('show_toggles', True)
         super(MTFileBrowser, self).__init__(**kwargs)
 
-        self.register_event_type('on_select')
-
         # Title
         self.w_path = MTLabel(label='.', autoheight=True, size=(self.width, 30),
                               color=(.7, .7, .7, .5))
@@ -13,7 +13,7 @@ from pymt.utils import SafeList
 from pymt.ui.widgets.rectangle import MTRectangularWidget
 from pymt.ui.widgets.scatter import MTScatterWidget
 from pymt.ui.widgets.button import MTImageButton, MTButton
-from pymt.ui.widgets.widget import MTWidget
+from pymt.ui.widgets.widget import MTWidget, culling_push, culling_pop
 
 class MTInnerWindowContainer(MTRectangularWidget):
     '''Container used to simulate a window for children of MTInnerWindow.
@@ -240,7 +240,11 @@ class MTInnerWindow(MTScatterWidget):
             with gx_stencil:
                 drawRectangle((0, 0), size=self.size)
                 stencilUse()
-                self.container.dispatch_event('on_draw')
+                culling_push(self.get_window_bbox())
+                try:
+                    self.container.dispatch_event('on_draw')
+                finally:
+                    culling_pop()
 
     def on_move(self, x, y):
         # no move on children
@@ -4,15 +4,19 @@ Kinetic List: Custom list with kinetic interaction
 
 __all__ = (
     'MTKineticList', 'MTKineticObject',
-    'MTKineticItem', 'MTKineticImage'
+    'MTKineticItem', 'MTKineticImage',
+    'KineticListAdapter'
 )
 
 import pymt
+from bisect import bisect_right
+from numpy import array, zeros, tile, cumsum
 from pymt.config import pymt_config
 from pymt.utils import boundary
 from pymt.graphx import set_color, drawRectangle, drawCSSRectangle
 from pymt.base import getFrameDt
 from pymt.utils import SafeList
+from pymt.ui.searchindex import SearchIndex
 from pymt.ui.widgets.stencilcontainer import MTStencilContainer
 from pymt.ui.widgets.widget import MTWidget
 from pymt.ui.widgets.button import MTButton, MTToggleButton, MTImageButton
@@ -67,6 +71,14 @@ class MTKineticList(MTStencilContainer):
         `trigger_distance` : int, default to 3
             Maximum trigger distance to dispatch event on children
             (this mean if you move too much, trigger will not happen.)
+        `adapter` : KineticListAdapter, default to None
+            Virtualized mode: the items are given by the adapter, and only
+            the views of the visible items exist, as children of the list.
+            The views not visible anymore are given back to the adapter to
+            show other items. See :class:`KineticListAdapter`.
+        `virtual_margin` : int, default to 100
+            In virtualized mode, size in pixels around the visible area where
+            views are created before they become visible.
 
     :Styles:
         `bg-color` : color
@@ -82,6 +94,8 @@ class MTKineticList(MTStencilContainer):
         `on_delete` (child)
             Fired when an item gets deleted.
     '''
+    __events__ = ('on_delete', )
+
     def __init__(self, **kwargs):
         kwargs.setdefault('padding_x', 4)
         kwargs.setdefault('padding_y', 4)
@@ -93,11 +107,11 @@ class MTKineticList(MTStencilContainer):
         kwargs.setdefault('deletable', True)
         kwargs.setdefault('searchable', True)
         kwargs.setdefault('align', 'center')
+        kwargs.setdefault('adapter', None)
+        kwargs.setdefault('virtual_margin', 100)
 
         super(MTKineticList, self).__init__(**kwargs)
 
-        self.register_event_type('on_delete')
-
         self._a_sinput_out  = None
         self._a_sinput_in   = None
         self.title          = Label('')
@@ -118,6 +132,7 @@ class MTKineticList(MTStencilContainer):
             pymt_config.getint('widgets', 'list_trigger_distance'))
         self.friction = kwargs.get('friction',
             pymt_config.getint('widgets', 'list_friction'))
+        self.virtual_margin = kwargs.get('virtual_margin')
 
         if self.w_limit and self.h_limit:
             raise Exception('You cannot limit both axes')
@@ -140,6 +155,21 @@ class MTKineticList(MTStencilContainer):
         self._scrollbar_index = 0
         self._scrollbar_size = 0
 
+        # virtualized mode: views by item index, views to recycle, and
+        # cached extents of the rows
+        self._adapter = None
+        self._virtual_views = {}
+        self._virtual_recycled = []
+        self._virtual_sizes = None
+        self._virtual_rows = None
+        self._virtual_row_widths = None
+        self._virtual_layout_key = None
+        self.adapter = kwargs.get('adapter')
+
+        # index of the children for search, built on the first search
+        self._search_index = None
+        self._search_attr = None
+
         # create the UI part.
         self._create_ui()
 
@@ -195,19 +225,50 @@ class MTKineticList(MTStencilContainer):
     def on_delete(self, child):
         pass
 
+    def _get_adapter(self):
+        return self._adapter
+    def _set_adapter(self, adapter):
+        self._adapter = adapter
+        self._virtual_recycled = []
+        for view in self._virtual_views.itervalues():
+            super(MTKineticList, self).remove_widget(view)
+        self._virtual_views = {}
+        self.refresh()
+    adapter = property(_get_adapter, _set_adapter,
+        doc='Adapter of the virtualized mode, or None')
+
+    def refresh(self):
+        '''In virtualized mode, indicate that the items of the adapter
+        changed. The extents of the rows are calculated again, and the views
+        are updated on the next frame.'''
+        for view in self._virtual_views.itervalues():
+            super(MTKineticList, self).remove_widget(view)
+            self._virtual_recycled.append(view)
+        self._virtual_views = {}
+        self._virtual_rows = None
+        self._virtual_layout_key = None
+
     def clear(self):
         self.children = SafeList()
         self.pchildren = SafeList()
         self.xoffset = self.yoffset = 0
+        self._virtual_views = {}
+        self._virtual_layout_key = None
+        self._search_index = None
 
     def add_widget(self, widget, **kwargs):
         super(MTKineticList, self).add_widget(widget, **kwargs)
         self.pchildren.append(widget)
+        if self._search_index is not None:
+            self._search_index.add(widget,
+                                   str(getattr(widget, self._search_attr)))
 
     def remove_widget(self, widget):
         super(MTKineticList, self).remove_widget(widget)
         if widget in self.pchildren:
             self.pchildren.remove(widget)
+        if self._search_index is not None:
+            self._search_index.remove(widget)
         self.dispatch_event('on_delete', widget)
 
     def toggle_delete(self, touch):
@@ -243,24 +304,41 @@ class MTKineticList(MTStencilContainer):
         self.yoffset = self.padding_y
         self.xoffset = self.padding_x
 
+    def get_search_index(self, attr):
+        '''Return the :class:`~pymt.ui.searchindex.SearchIndex` of the
+        children on the attribute `attr`. The index is built on the first
+        call, and updated when children are added or removed. If the
+        attribute of a child change, call `reindex()`.'''
+        if self._search_index is None or self._search_attr != attr:
+            index = SearchIndex()
+            for child in self.pchildren:
+                index.add(child, str(getattr(child, attr)))
+            self._search_index = index
+            self._search_attr = attr
+        return self._search_index
+
+    def reindex(self, child=None):
+        '''Update the search index for a child, or for all the children'''
+        if self._search_index is None:
+            return
+        if child is None:
+            self._search_index = None
+        else:
+            self._search_index.add(child, str(getattr(child, self._search_attr)))
+
     def filter(self, pattern, attr):
         '''Given an attribute of the children, and a pattern, return
         a list of the children with which pattern is in attr
         '''
-        return filter(lambda c: pattern in str(getattr(c, attr)), self.pchildren)
+        return self.get_search_index(attr).query(pattern)
 
     def search(self, pattern, attr):
         '''Apply a search pattern to the current set of children'''
-        result = self.filter(pattern, attr)
-        self.children.clear()
-        for item in result:
-            self.children.append(item)
+        self.children[:] = self.filter(pattern, attr)
 
     def endsearch(self):
         '''Resets the children set to the full set'''
-        self.children.clear()
-        for item in self.pchildren:
-            self.children.append(item)
+        self.children[:] = self.pchildren
 
     def _get_total_width(self, items, axis):
         '''Given a list of items and an axis, return the space
@@ -284,6 +362,8 @@ class MTKineticList(MTStencilContainer):
 
     def do_layout(self):
         '''Apply layout to all the items'''
+        if self._adapter is not None:
+            return self._do_virtual_layout()
 
         t = index = 0
 
@@ -314,13 +394,11 @@ class MTKineticList(MTStencilContainer):
             sx          = self.y
 
         # calculate size of actual content
+        children = self.children[:]
         size = 0
-        for i in xrange(len(self.children)):
-            if i % limit == 0:
-                maxrange = min(i + limit, len(self.children))
-                childrens = [self.children[z] for z in range(i, maxrange)]
-                h = max((c.__getattribute__(height_attr) for c in childrens))
-                size += h + padding_y
+        for i in xrange(0, len(children), limit):
+            h = max([getattr(c, height_attr) for c in children[i:i + limit]])
+            size += h + padding_y
         self._last_content_size = size
 
         # add little padding for good looking.
@@ -328,7 +406,7 @@ class MTKineticList(MTStencilContainer):
         ny = y
 
         # recalculate position for each children
-        for child in self.children[:]:
+        for child in children:
 
             # each row, calculate the height, advance y and reset x
             if index % limit == 0:
@@ -337,8 +415,7 @@ class MTKineticList(MTStencilContainer):
                 y = ny
 
                 # get children in the row
-                maxrange = min(t + limit, len(self.children))
-                childrens = [self.children[z] for z in range(t, maxrange)]
+                childrens = children[t:t + limit]
 
                 # take the largest height in the current row
                 if len(childrens):
@@ -371,6 +448,112 @@ class MTKineticList(MTStencilContainer):
             # Increment index
             index += 1
 
+    def _update_virtual_extents(self):
+        # size of each item, and cumulative extent of the rows
+        adapter = self._adapter
+        count = adapter.count()
+        limit = self.w_limit or self.h_limit
+        if not self.w_limit:
+            w_axis, h_axis = 1, 0
+            padding_x, padding_y = self.padding_y, self.padding_x
+        else:
+            w_axis, h_axis = 0, 1
+            padding_x, padding_y = self.padding_x, self.padding_y
+
+        if getattr(adapter.get_item_size, 'im_func', None) is \
+           KineticListAdapter.get_item_size.im_func:
+            sizes = tile(array(adapter.item_size, dtype=float), (count, 1))
+        else:
+            sizes = array([adapter.get_item_size(i) for i in xrange(count)],
+                          dtype=float).reshape((count, 2))
+
+        nrows = (count + limit - 1) / limit
+        cells = zeros((nrows * limit, 2))
+        cells[:count] = sizes
+        heights = cells[:, h_axis].reshape((nrows, limit)).max(axis=1)
+        widths = cells[:, w_axis] + padding_x
+        widths[count:] = 0
+        widths = widths.reshape((nrows, limit)).sum(axis=1)
+
+        rows = [0.] + cumsum(heights + padding_y).tolist()
+        self._virtual_sizes = sizes[:, w_axis].tolist()
+        self._virtual_rows = rows
+        self._virtual_row_widths = widths.tolist()
+        self._last_content_size = rows[-1]
+
+    def _do_virtual_layout(self):
+        # create the views of the visible items only, and place them from
+        # the cached extents of the rows
+        key = (self.xoffset, self.yoffset, self.pos, self.size)
+        if key == self._virtual_layout_key:
+            return
+        self._virtual_layout_key = key
+        if self._virtual_rows is None:
+            self._update_virtual_extents()
+
+        limit = self.w_limit
+        w2 = self.width / 2.
+        xoffset = self.xoffset
+        sx = self.x
+        y = self.y + self.yoffset
+        view_start, view_size = self.y, self.height
+        padding_x = self.padding_x
+        padding_y = self.padding_y
+        inverse = not self.w_limit
+        if inverse:
+            limit = self.h_limit
+            w2 = self.height / 2.
+            xoffset = self.yoffset
+            sx = self.y
+            y = self.x + self.xoffset
+            view_start, view_size = self.x, self.width
+            padding_x, padding_y = padding_y, padding_x
+        y += padding_y
+
+        # visible rows
+        rows = self._virtual_rows
+        sizes = self._virtual_sizes
+        count = len(sizes)
+        margin = self.virtual_margin
+        first = max(0, bisect_right(rows, view_start - margin - y) - 1)
+        last = min(len(rows) - 1,
+                   bisect_right(rows, view_start + view_size + margin - y))
+        start, stop = first * limit, min(last * limit, count)
+
+        # recycle the views of the items not visible anymore
+        views = self._virtual_views
+        recycled = self._virtual_recycled
+        for index in views.keys():
+            if index < start or index >= stop:
+                view = views.pop(index)
+                super(MTKineticList, self).remove_widget(view)
+                recycled.append(view)
+
+        adapter = self._adapter
+        align = self.align
+        row_widths = self._virtual_row_widths
+        for row in xrange(first, last):
+            ry = y + rows[row]
+            start = row * limit
+            if align == 'center':
+                x = sx + w2 + xoffset - row_widths[row] / 2.
+            elif align == 'left':
+                x = 0
+            elif align == 'right':
+                x = w2 * 2 - sizes[start] - xoffset
+            for index in xrange(start, min(start + limit, count)):
+                view = views.get(index)
+                if view is None:
+                    view = adapter.get_view(index,
+                                            recycled.pop() if recycled else None)
+                    views[index] = view
+                    super(MTKineticList, self).add_widget(view)
+                if not inverse:
+                    view.kx, view.ky = x + padding_x, ry
+                else:
+                    view.ky, view.kx = x + padding_x, ry
+                x += sizes[index] + padding_x
+
     def on_touch_down(self, touch):
         if not self.collide_point(touch.x, touch.y):
             return
@@ -496,16 +679,18 @@ class MTKineticList(MTStencilContainer):
 
         # draw children
         self.stencil_push()
-        for w in self.children[:]:
-            # internal update of children
-            w.update()
-            # optimization to draw only viewed children
-            if self.do_y and (w.y + w.height < self.y or w.y > self.y + self.height):
-                continue
-            if self.do_x and (w.x + w.width < self.x or w.x > self.x + self.width):
-                continue
-            w.on_draw()
-        self.stencil_pop()
+        try:
+            for w in self.children[:]:
+                # internal update of children
+                w.update()
+                # optimization to draw only viewed children
+                if self.do_y and (w.y + w.height < self.y or w.y > self.y + self.height):
+                    continue
+                if self.do_x and (w.x + w.width < self.x or w.x > self.x + self.width):
+                    continue
+                w.on_draw()
+        finally:
+            self.stencil_pop()
 
         # draw widgets
         for w in self.widgets:
@@ -565,7 +750,6 @@ class MTKineticObject(MTWidget):
         kwargs.setdefault('deletable', True)
         super(MTKineticObject, self).__init__(**kwargs)
         self.deletable = kwargs.get('deletable')
-        self.register_event_type('on_animation_complete')
         self.push_handlers(on_animation_complete=self.on_animation_complete)
 
         # List of attributes that can be searched
@@ -628,7 +812,7 @@ class MTKineticObject(MTWidget):
             self.pos = self.kx + self.xoffset, self.ky + self.yoffset
         if self.deletable:
             self.db.pos = (self.x + self.width-40, self.y + self.height-40)
-            self.db.style['bg-color'] = (1, 0, 0, self.db_alpha)
+            self.db.apply_css({'bg-color': (1, 0, 0, self.db_alpha)})
 
     def on_press(self, touch):
         if self.db.visible and self.db.on_touch_down(touch):
@@ -663,3 +847,48 @@ class MTKineticImage(MTImageButton, MTKineticObject):
         if self.deletable and self.db.visible and self.db.on_touch_down(touch):
             return True
 
+
+
+class KineticListAdapter(object):
+    '''Items of a virtualized :class:`MTKineticList`. The list ask to the
+    adapter the number of items, their size, and a view for each visible
+    item ::
+
+        adapter = KineticListAdapter(data=['item %d' % x for x in xrange(100000)])
+        klist = MTKineticList(adapter=adapter, size=(400, 600))
+
+    The default implementation show a list of strings with
+    :class:`MTKineticItem`. Override `get_view()` to show other data, and
+    `get_item_size()` if the items don't have the same size. When the data
+    change, call :meth:`MTKineticList.refresh`.
+
+    :Parameters:
+        `data` : list, default to []
+            Items of the list
+        `item_size` : tuple, default to (100, 40)
+            Size of the views
+    '''
+    def __init__(self, data=None, item_size=(100, 40)):
+        if data is None:
+            data = []
+        self.data = data
+        self.item_size = item_size
+
+    def count(self):
+        '''Return the number of items'''
+        return len(self.data)
+
+    def get_item_size(self, index):
+        '''Return the size of the view of an item'''
+        return self.item_size
+
+    def get_view(self, index, recycled_view):
+        '''Return the view of an item. `recycled_view` is a view not used
+        anymore, that can be updated for this item and returned, or None.'''
+        label = str(self.data[index])
+        if recycled_view is None:
+            return MTKineticItem(label=label, size=self.get_item_size(index),
+                                 deletable=False)
+        recycled_view.label = label
+        recycled_view.size = self.get_item_size(index)
+        return recycled_view
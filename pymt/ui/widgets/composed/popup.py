@@ -35,6 +35,8 @@ class MTPopup(MTScatterWidget):
             Fired when the popup cancel button is pressed.
             In default behavior, the widget remove himself from parent.
     '''
+    __events__ = ('on_submit', 'on_cancel')
+
     def __init__(self, **kwargs):
         kwargs.setdefault('do_scale', False)
         kwargs.setdefault('size', (400, 400))
@@ -45,9 +47,6 @@ class MTPopup(MTScatterWidget):
         kwargs.setdefault('exit_on_submit', True)
         super(MTPopup, self).__init__(**kwargs)
 
-        self.register_event_type('on_submit')
-        self.register_event_type('on_cancel')
-
         self.exit_on_submit = kwargs.get('exit_on_submit')
 
         # Create layouts
@@ -55,6 +55,8 @@ class MTTextInput(MTButton):
     _group_id = 0
     _group = {}
 
+    __events__ = ('on_text_change', 'on_text_validate')
+
     def __init__(self, **kwargs):
         kwargs.setdefault('anchor_x', 'left')
         kwargs.setdefault('anchor_y', 'center')
@@ -68,9 +70,6 @@ class MTTextInput(MTButton):
 
         super(MTTextInput, self).__init__(**kwargs)
 
-        self.register_event_type('on_text_change')
-        self.register_event_type('on_text_validate')
-
         self._scroll_x = 0
         self._can_deactive = True
         self._keyboard = kwargs.get('keyboard')
@@ -193,8 +192,8 @@ class MTTextInput(MTButton):
         error_color = self.style['bg-color-error']
         if self._notify_animation is not None:
             self._notify_animation.stop()
-        self.style['bg-color'] = self._notify_bg_color
-        self.style['bg-color-active'] = self._notify_bg_color_active
+        self.apply_css({'bg-color': self._notify_bg_color,
+                        'bg-color-active': self._notify_bg_color_active})
         self._notify_animation = self.do(Animation(
             style={'bg-color': error_color, 'bg-color-active': error_color},
             f=lambda x: 1 - AnimationAlpha.ease_in_out_quart(x)))
@@ -227,6 +227,8 @@ class MTVKeyboard(MTScatterWidget):
     DEFAULT_SIZE = (700, 200)
     DEFAULT_POS = (0, 0)
 
+    __events__ = ('on_key_down', 'on_key_up', 'on_text_change')
+
     def __init__(self, **kwargs):
         kwargs.setdefault('size', MTVKeyboard.DEFAULT_SIZE)
         kwargs.setdefault('pos', MTVKeyboard.DEFAULT_POS)
@@ -239,10 +241,6 @@ class MTVKeyboard(MTScatterWidget):
 
         super(MTVKeyboard, self).__init__(**kwargs)
 
-        self.register_event_type('on_key_down')
-        self.register_event_type('on_key_up')
-        self.register_event_type('on_text_change')
-
         self.time_lazy_update   = kwargs.get('time_lazy_update')
         self.layout             = kwargs.get('layout')
         self.container_width, self.container_height   = self.size
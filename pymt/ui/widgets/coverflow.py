@@ -2,7 +2,7 @@
 Coverflow: a coverflow widget
 '''
 
-__all__ = ('MTCoverFlow', )
+__all__ = ('MTCoverFlow', 'MTCoverFlowItem')
 
 from OpenGL.GL import glRotatef, glTranslatef
 from pymt.graphx import set_color, drawRectangle, drawTexturedRectangle, \
@@ -10,7 +10,9 @@ from pymt.graphx import set_color, drawRectangle, drawTexturedRectangle, \
 from pymt.utils import boundary, interpolate
 from pymt.vector import Vector
 from pymt.config import pymt_config
-from pymt.ui.widgets.widget import MTWidget
+from pymt.loader import Loader
+from pymt.ui.texturecache import TextureCache
+from pymt.ui.widgets.widget import MTWidget, culling_push, culling_pop
 
 class MTCoverFlow(MTWidget):
     '''A coverflow widget, that support mostly any widget in :)
@@ -61,6 +63,11 @@ class MTCoverFlow(MTWidget):
             screen
         `title_position` : int, default to -50
             Y position of title (starting from the bottom of the cover)
+        `cover_cache` : bool, default to True
+            Render each cover and its reflection once in a texture, until the
+            cover is marked dirty (see :meth:`MTWidget.mark_dirty`), leaves
+            the visible area, or `refresh_cover()` is called. Set it to False
+            if the covers change their drawing continuously (video...).
 
     :Events:
         `on_change` : widget
@@ -68,6 +75,8 @@ class MTCoverFlow(MTWidget):
         `on_select` : widget
             Fired when the user "click" on the current cover
     '''
+    __events__ = ('on_select', 'on_change')
+
     def __init__(self, **kwargs):
         kwargs.setdefault('cover_angle', 90)
         kwargs.setdefault('cover_distance', 400)
@@ -84,12 +93,10 @@ class MTCoverFlow(MTWidget):
         kwargs.setdefault('title_draw', True)
         kwargs.setdefault('title_position', -50)
         kwargs.setdefault('trigger_cover_distance', 30)
+        kwargs.setdefault('cover_cache', True)
 
         super(MTCoverFlow, self).__init__(**kwargs)
 
-        self.register_event_type('on_select')
-        self.register_event_type('on_change')
-
         self.cover_angle            = kwargs.get('cover_angle')
         self.cover_distance         = kwargs.get('cover_distance')
         self.cover_spacing          = kwargs.get('cover_spacing')
@@ -105,6 +112,7 @@ class MTCoverFlow(MTWidget):
         self.title_draw             = kwargs.get('title_draw')
         self.title_position         = kwargs.get('title_position')
         self.trigger_cover_distance = kwargs.get('trigger_cover_distance')
+        self.cover_cache            = kwargs.get('cover_cache')
         self.trigger_distance = kwargs.get('trigger_distance',
             pymt_config.getint('widgets', 'list_trigger_distance'))
 
@@ -117,6 +125,16 @@ class MTCoverFlow(MTWidget):
         self._transition            = 0
         self._internal_position     = 0
 
+        # covers to draw, with their transformation, updated only when the
+        # selection or the transition change
+        self._transforms            = []
+        self._transforms_key        = None
+        # texture of the visible covers, and textures to reuse
+        self._covers                = {}
+        self._covers_free           = []
+        self._covers_key            = None
+        self._calculate_coords()
+
     def on_touch_down(self, touch):
         if not len(self.children) or \
            self._touch or \
@@ -197,19 +215,107 @@ class MTCoverFlow(MTWidget):
     selection = property(_get_selection, _set_selection,
             doc='''Get/set the selected children index''')
 
-    def _get_cover_position(self, index, alpha=0):
+    def _get_slot_position(self, slot):
+        # angle and x of a cover, from its index relative to the selection
         x2 = self.center[0]
-        if index < self._selection:
+        if slot < 0:
             angle = self.cover_angle
-            x = x2 - self.cover_distance - (self._selection - index) * self.cover_spacing
-        elif index > self._selection:
+            x = x2 - self.cover_distance + slot * self.cover_spacing
+        elif slot > 0:
             angle = 90 + (90 - self.cover_angle)
-            x = x2 + self.cover_distance + (index - self._selection) * self.cover_spacing
+            x = x2 + self.cover_distance + slot * self.cover_spacing
         else:
             angle = 0
             x = x2 - self.thumbnail_size[0] / 2.
         return angle, x
 
+    def _get_cover_position(self, index, alpha=0):
+        return self._get_slot_position(index - self._selection)
+
+    def _get_visible_range(self):
+        # index of the first and last covers in the widget bounds, with one
+        # more cover on each side for the transition
+        count = len(self.children)
+        spacing = self.cover_spacing
+        if spacing <= 0:
+            return 0, count - 1
+        x2 = self.center[0]
+        tw = self.thumbnail_size[0]
+        nleft = int((x2 - self.cover_distance + tw - self.x) / spacing) + 2
+        nright = int((self.x + self.width - x2 - self.cover_distance + tw) /
+                     spacing) + 2
+        return max(0, self._selection - max(1, nleft)), \
+               min(count - 1, self._selection + max(1, nright))
+
+    def _update_transforms(self):
+        # calculate the position, angle and color of the visible covers, in
+        # drawing order
+        key = (self._selection, self._transition, self.pos, self.size,
+               len(self.children), self.cover_angle, self.cover_distance,
+               self.cover_spacing, self.thumbnail_size)
+        if key == self._transforms_key:
+            return
+        self._transforms_key = key
+
+        first, last = self._get_visible_range()
+        selection = self._selection
+        transition = self._transition
+        order = range(first, selection) + \
+                range(last, selection, -1) + [selection]
+        transforms = []
+        for index in order:
+            slot = index - selection
+            angle, x = self._get_slot_position(slot)
+
+            # if a transition is in way,
+            # use it to calculate angle/position from
+            # current position and future position
+            if transition != 0:
+                if transition > 0:
+                    angle2, x2 = self._get_slot_position(slot - 1)
+                else:
+                    angle2, x2 = self._get_slot_position(slot + 1)
+                # do linear alpha
+                angle   += abs(transition) * (angle2 - angle)
+                x       += abs(transition) * (x2 - x)
+
+            # calculate alpha coordinate
+            # this is to make cover more darker on the farest side
+            # and make brighter the current displayed cover
+            a = 1. - .7 * (angle / 90.)
+            alpha_coords = (
+                (1, 1, 1, 0), (a, a, a, 0),
+                (a, a, a, 0), (1, 1, 1, 0))
+            transforms.append((index, angle, x, alpha_coords))
+        self._transforms = transforms
+
+        # release the textures of the covers not visible anymore
+        visible = set(self.children[first:last + 1])
+        for child in self._covers.keys():
+            if child in visible:
+                continue
+            self._release_cover(child)
+            if hasattr(child, 'unload'):
+                child.unload()
+
+    def _release_cover(self, child):
+        cache = self._covers.pop(child, None)
+        if cache is not None:
+            cache.dirty = True
+            self._covers_free.append(cache)
+
+    def refresh_cover(self, widget=None):
+        '''Render again the texture of a cover, or of all the covers'''
+        if widget is None:
+            for cache in self._covers.itervalues():
+                cache.dirty = True
+        elif widget in self._covers:
+            self._covers[widget].dirty = True
+
+    def _on_child_dirty(self, child):
+        # the drawing of a child, or of one of its children, changed
+        self.refresh_cover(child)
+
     def _calculate_coords(self):
         # calculate reflection coordinate
         c1, c2 = self.reflection_start, self.reflection_stop
@@ -227,46 +333,76 @@ class MTCoverFlow(MTWidget):
             drawLabel(str(getattr(widget, 'title')),
                       pos=(self.center[0], y2 + self.title_position))
 
-    def _render_cover(self, index):
-        # render the children on a fbo
-        child = self.children[index]
+    def _render_child(self, child):
+        # render the children on the fbo
         with self._fbo:
             self._fbo.clear()
-            child.dispatch_event('on_draw')
-
-        # pre-calculate
-        y2 = self.center[1] - self.thumbnail_size[1] / 2.
-        angle, x = self._get_cover_position(index, 0)
-
-        # if a transition is in way,
-        # use it to calculate angle/position from
-        # current position and future position
-        if self._transition != 0:
-            i2 = index
-            if self._transition > 0:
-                i2 -= 1
-            elif self._transition < 0:
-                i2 += 1
-
-            i2          = min(max(-1, i2), len(self.children))
-            angle2, x2  = self._get_cover_position(i2, self._transition)
-
-            # do linear alpha
-            if self._transition > 0:
-                angle   += self._transition * (angle2 - angle)
-                x       += self._transition * (x2 - x)
-            else:
-                angle   -= self._transition * (angle2 - angle)
-                x       -= self._transition * (x2 - x)
+            culling_push(None)
+            try:
+                child.dispatch_event('on_draw')
+            finally:
+                culling_pop()
+        return self._fbo.texture
+
+    def _draw_reflection(self, texture, pos, size):
+        # for reflection, don't do matrix transformation
+        # just invert texcoord + play with color
+        p = self.reflection_percent
+        tex_coords = (0, p, 1, p, 1, 0, 0, 0)
 
-        # calculate alpha coordinate
-        # this is to make cover more darker on the farest side
-        # and make brighter the current displayed cover
+        # activate blending with background ?
+        if self.reflection_blend:
+            set_color(*self.style['bg-color'])
+            drawRectangle(pos=pos, size=size)
+            set_color(1, 1, 1, blend=True)
 
-        a = 1. - .7 * (angle / 90.)
-        alpha_coords = (
-            (1, 1, 1, 0), (a, a, a, 0),
-            (a, a, a, 0), (1, 1, 1, 0))
+        drawTexturedRectangle(
+            texture=texture, pos=pos, size=size, tex_coords=tex_coords,
+            color_coords=self._reflection_coords)
+
+    def _get_cover_texture(self, child):
+        # return the texture of the cover, with the reflection below, or None
+        # if no texture can be allocated
+        tw, th = self.thumbnail_size
+        rh = th * self.reflection_percent
+        cache = self._covers.get(child)
+        if cache is None:
+            if self._covers_free:
+                cache = self._covers_free.pop()
+            else:
+                cache = TextureCache()
+            self._covers[child] = cache
+        if not cache.update(tw, th + rh):
+            return None
+        if cache.dirty:
+            cache.dirty = False
+            texture = self._render_child(child)
+            with cache.fbo:
+                cache.fbo.clear()
+                set_color(1)
+                drawTexturedRectangle(texture=texture, pos=(0, rh),
+                                      size=(tw, th))
+                self._draw_reflection(texture, (0, 0), (tw, rh))
+        return cache.fbo.texture
+
+    def _draw_cover(self, index, angle, x, alpha_coords):
+        child = self.children[index]
+        tw, th = self.thumbnail_size
+        rh = th * self.reflection_percent
+        y2 = self.center[1] - th / 2.
+
+        texture = None
+        if self.cover_cache:
+            texture = self._get_cover_texture(child)
+        if texture is not None:
+            # split the texture in cover and reflection
+            u1, v1, u2, v2 = texture.tex_coords[0], texture.tex_coords[1], \
+                             texture.tex_coords[4], texture.tex_coords[5]
+            vr = v1 + (v2 - v1) * rh / (th + rh)
+            cover_coords = (u1, vr, u2, vr, u2, v2, u1, v2)
+        else:
+            texture = self._render_child(child)
+            cover_coords = None
 
         # draw !
         glTranslatef(x, y2, 0)
@@ -276,41 +412,28 @@ class MTCoverFlow(MTWidget):
         if self.cover_blend:
             set_color(1, blend=True)
             drawTexturedRectangle(
-                texture=self._fbo.texture,
+                texture=texture,
                 size=self.thumbnail_size,
+                tex_coords=cover_coords,
                 color_coords=self._cover_blend_coords)
         else:
             set_color(1)
             drawTexturedRectangle(
-                texture=self._fbo.texture,
+                texture=texture,
                 size=self.thumbnail_size,
+                tex_coords=cover_coords,
                 color_coords=alpha_coords)
 
-        # now, for reflection, don't do matrix transformation
-        # just invert texcoord + play with color
-        old_texcoords = self._fbo.texture.tex_coords
-        self._fbo.texture.flip_vertical()
-        self._fbo.texture.tex_coords = list(self._fbo.texture.tex_coords)
-        self._fbo.texture.tex_coords[1] = self.reflection_percent
-        self._fbo.texture.tex_coords[3] = self.reflection_percent
-
         # draw reflection
-        pos = (0, -self.thumbnail_size[1] * self.reflection_percent)
-        size = (self.thumbnail_size[0], self.thumbnail_size[1] * self.reflection_percent)
-
-        # activate blending with background ?
-        if self.reflection_blend:
-            set_color(*self.style['bg-color'])
-            drawRectangle(pos=pos, size=size)
-            set_color(1, 1, 1, blend=True)
-
-        drawTexturedRectangle(
-            texture=self._fbo.texture,
-            pos=pos, size=size,
-            color_coords=self._reflection_coords)
-
-        # restore fbo tex_coords
-        self._fbo.texture.tex_coords = old_texcoords
+        pos = (0, -rh)
+        size = (tw, rh)
+        if cover_coords is None:
+            self._draw_reflection(texture, pos, size)
+        else:
+            set_color(1)
+            drawTexturedRectangle(
+                texture=texture, pos=pos, size=size,
+                tex_coords=(u1, v1, u2, v1, u2, vr, u1, vr))
 
         # reset our position changes
         glRotatef(angle, 0, -1, 0)
@@ -337,16 +460,18 @@ class MTCoverFlow(MTWidget):
         if not len(self.children):
             return
 
-        # draw left side
-        for i in xrange(0, self._selection):
-            self._render_cover(i)
+        # textures must be rendered again if the reflection change
+        key = (self.reflection_percent, self.reflection_start,
+               self.reflection_stop, self.reflection_blend,
+               self.thumbnail_size)
+        if key != self._covers_key:
+            self._covers_key = key
+            self.refresh_cover()
 
-        # draw right side in reverse order
-        for i in xrange(len(self.children) - 1, self._selection, - 1):
-            self._render_cover(i)
-
-        # draw cover
-        self._render_cover(self._selection)
+        # draw left side, right side in reverse order, then the cover
+        self._update_transforms()
+        for index, angle, x, alpha_coords in self._transforms:
+            self._draw_cover(index, angle, x, alpha_coords)
 
         # draw title ?
         if self.title_draw:
@@ -354,6 +479,7 @@ class MTCoverFlow(MTWidget):
             self._draw_title(child)
     def remove_widget(self, widget):
         super(MTCoverFlow,self).remove_widget(widget)
+        self._release_cover(widget)
         _len = len(self.children)
         if self._selection >=  _len:
             self._selection = _len -1
@@ -361,3 +487,55 @@ class MTCoverFlow(MTWidget):
             #No more children
             #Do something appropriate (maybe hide, maybe nothing)            
             pass
+
+
+class MTCoverFlowItem(MTWidget):
+    '''A cover showing an image, for :class:`MTCoverFlow`. The image is
+    loaded with the :class:`~pymt.loader.Loader` when the cover is displayed,
+    and released when the cover leaves the visible area, so large libraries
+    only keep the visible images in memory ::
+
+        coverflow = MTCoverFlow(size=(800, 600))
+        for filename in albums:
+            coverflow.add_widget(MTCoverFlowItem(
+                filename=filename, size=coverflow.thumbnail_size))
+
+    :Parameters:
+        `filename` : str
+            Filename of the image
+        `title` : str, default to None
+            Title drawn by the coverflow under the selected cover
+    '''
+    def __init__(self, **kwargs):
+        kwargs.setdefault('filename', None)
+        kwargs.setdefault('title', None)
+        super(MTCoverFlowItem, self).__init__(**kwargs)
+        self.filename   = kwargs.get('filename')
+        if kwargs.get('title') is not None:
+            self.title  = kwargs.get('title')
+        self.image      = None
+
+    def load(self):
+        '''Load the image, if not already done'''
+        if self.image is None:
+            self.image = Loader.image(self.filename)
+            if not self.image.loaded:
+                self.image.push_handlers(on_load=self._on_image_load)
+
+    def unload(self):
+        '''Release the image. It will be loaded again on the next draw.'''
+        self.image = None
+
+    def _on_image_load(self):
+        self.mark_dirty()
+
+    def draw(self):
+        self.load()
+        image = self.image
+        # fit the image in the widget
+        w, h = self.size
+        image.scale = min(w / float(max(1, image.width)),
+                          h / float(max(1, image.height)))
+        image.x = self.x + (w - image.width * image.scale) / 2.
+        image.y = self.y + (h - image.height * image.scale) / 2.
+        image.draw()
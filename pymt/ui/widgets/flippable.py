@@ -7,7 +7,7 @@ __all__ = ('MTFlippableWidget', )
 
 from OpenGL.GL import glTranslatef, glRotatef
 from pymt.graphx import gx_matrix, drawCSSRectangle, set_color
-from pymt.ui.widgets.widget import MTWidget
+from pymt.ui.widgets.widget import MTWidget, culling_push, culling_pop
 from pymt.ui.animation import Animation
 from pymt.utils import SafeList
 
@@ -140,4 +140,9 @@ class MTFlippableWidget(MTWidget):
             else:
                 glRotatef(self.zangle + 180, 0, 1, 0)
             glTranslatef(-self.width / 2, 0, 0)
-            super(MTFlippableWidget, self).on_draw()
+            # drawing is done in a rotated space
+            culling_push(None)
+            try:
+                super(MTFlippableWidget, self).on_draw()
+            finally:
+                culling_pop()
@@ -14,9 +14,10 @@ class MTGestureWidget(MTWidget):
         `on_gesture` (Gesture g, Touch touch)
             Fired when a stroke is finished
     '''
+    __events__ = ('on_gesture', )
+
     def __init__(self):
         super(MTGestureWidget, self).__init__()
-        self.register_event_type('on_gesture')
         self.points = {}
         self.db = []
 
@@ -7,7 +7,7 @@ __all__ = ('MTList', 'MTListContainer')
 from pymt.graphx import gx_matrix
 from pymt.utils import boundary
 from pymt.base import getFrameDt
-from pymt.ui.widgets.widget import MTWidget
+from pymt.ui.widgets.widget import MTWidget, culling_push, culling_pop
 from pymt.ui.widgets.stencilcontainer import MTStencilContainer
 from pymt.config import pymt_config
 from OpenGL.GL import glTranslatef
@@ -36,10 +36,16 @@ class MTListContainer(MTWidget):
             self.size = self.children[0].size
 
     def on_draw(self):
-        with gx_matrix:
-            glTranslatef(self.x + self.content_x, self.y + self.content_y, 0)
-            for children in self.children[:]:
-                children.dispatch_event('on_draw')
+        # children positions don't include the content translation,
+        # MTList already skip the children outside.
+        culling_push(None)
+        try:
+            with gx_matrix:
+                glTranslatef(self.x + self.content_x, self.y + self.content_y, 0)
+                for children in self.children[:]:
+                    children.dispatch_event('on_draw')
+        finally:
+            culling_pop()
 
 class MTList(MTStencilContainer):
     '''List with kinetic. This is the replacement of old MTKineticList().
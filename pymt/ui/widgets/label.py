@@ -21,12 +21,20 @@ class MTLabel(MTWidget):
             Update height information with the label content height
         `multiline`: bool, default to False
             If True, the text will be fit inside the width
+        `async`: bool, default to False
+            If True, the text is rasterized in a worker thread. The label
+            size is known immediately, but the text is drawn some frames
+            later. Ignored when `markup` is True.
 
     MTLabel support all parameters from the Core label. Check 
     :py:class:`~pymt.core.text.LabelBase` class to known all availables
     parameters.
     '''
 
+    retained_properties = ('pos', 'size', 'label', 'color', 'font_size',
+                           'font_name', 'bold', 'italic', 'padding',
+                           'anchor_x', 'anchor_y', 'markup', 'multiline')
+
     # TODO reactivate slots
     #__slots__ = ('autowidth', 'autoheight', 'autosize', 'label',
     #    '_used_label', 'kwargs', 'anchor_x', 'anchor_y')
@@ -69,31 +77,50 @@ class MTLabel(MTWidget):
         self.kwargs = kwargs
 
         # copy style to inline one (needed for css reloading)
+        self._apply_inline_kwargs(kwargs)
+
+        # update this label size
+        label = getLabel(label=self.label, **kwargs)
+        if not size_specified:
+            self.size = label.size
+        self._update_size(*label.size)
+        self._used_label = label
+
+    def _apply_inline_kwargs(self, kwargs):
+        inline = {}
         if 'color' in kwargs:
-            self._inline_style['color'] = kwargs['color']
+            inline['color'] = kwargs['color']
         if 'font_name' in kwargs:
-            self._inline_style['font-name'] = kwargs['font_name']
+            inline['font-name'] = kwargs['font_name']
         if 'font_size' in kwargs:
-            self._inline_style['font-size'] = kwargs['font_size']
+            inline['font-size'] = kwargs['font_size']
         if 'bold' in kwargs and 'italic' in kwargs and \
             kwargs['bold'] and kwargs['italic']:
-            self._inline_style['font-weight'] = 'bolditalic'
+            inline['font-weight'] = 'bolditalic'
         elif 'bold' in kwargs and kwargs['bold']:
-            self._inline_style['font-weight'] = 'bold'
+            inline['font-weight'] = 'bold'
         elif 'italic' in kwargs and kwargs['italic']:
-            self._inline_style['font-weight'] = 'italic'
+            inline['font-weight'] = 'italic'
         if 'padding' in kwargs:
-            self._inline_style['padding'] = kwargs['padding']
-
-        # update from inline
-        self.apply_css(self._inline_style)
-
-        # update this label size
-        label = getLabel(label=self.label, **kwargs)
-        if not size_specified:
-            self.size = label.size
-        self._update_size(*label.size)
-        self._used_label = label
+            inline['padding'] = kwargs['padding']
+
+        # update from inline. Even without inline style, the attributes are
+        # copied from the style to the label kwargs.
+        if inline:
+            if self._inline_style:
+                style = dict(self._inline_style)
+                style.update(inline)
+                inline = style
+            self._inline_style = inline
+        self.apply_css(inline)
+
+    def reuse(self, **kwargs):
+        super(MTLabel, self).reuse(**kwargs)
+        for key in ('label', 'multiline', 'autowidth', 'autoheight',
+                    'autosize', 'anchor_x', 'anchor_y', 'markup'):
+            if key in kwargs:
+                setattr(self, key, kwargs[key])
+        self._apply_inline_kwargs(kwargs)
 
     def apply_css(self, styles):
         super(MTLabel, self).apply_css(styles)
@@ -161,9 +188,15 @@ class MTLabel(MTWidget):
             kwargs['viewport_size'] = (w, h)
 
         w, h = drawLabel(label=self.label, pos=pos, **kwargs)
-        self._used_label = getLastLabel()
+        label = self._used_label = getLastLabel()
         self._update_size(w, h)
 
+        # an asynchronous label draw only a placeholder until its texture is
+        # uploaded: don't keep this drawing in the retained drawing or the
+        # texture caches
+        if len(label.label) and not label.is_rendered:
+            self.mark_dirty()
+
     def draw_background(self):
         '''Draw the background of the widget'''
         set_color(*self.style['bg-color'])
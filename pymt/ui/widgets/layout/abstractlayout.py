@@ -7,6 +7,25 @@ __all__ = ('MTAbstractLayout', )
 from pymt.ui.widgets.widget import MTWidget
 from pymt.ui.animation import Animation, AnimationAlpha
 
+_widget_set_pos = MTWidget.__dict__['_set_pos']
+_widget_set_size = MTWidget.__dict__['_set_size']
+_default_geometry = {}
+
+def _has_default_geometry(klass):
+    # the position and size of a widget can be set directly only if its
+    # class use the MTWidget setters
+    try:
+        return _default_geometry[klass]
+    except KeyError:
+        pass
+    def get_setter(name):
+        fset = getattr(getattr(klass, name, None), 'fset', None)
+        return getattr(fset, 'im_func', fset)
+    result = get_setter('pos') is _widget_set_pos and \
+             get_setter('size') is _widget_set_size
+    _default_geometry[klass] = result
+    return result
+
 class MTAbstractLayout(MTWidget):
     '''Abstract layout. Base class used to implement layout.
 
@@ -23,6 +42,15 @@ class MTAbstractLayout(MTWidget):
     :Events:
         `on_layout`
             Fired when layout function have been called
+
+    The layout is done in two passes. When the children of a layout change,
+    the layout and its parent layouts are marked dirty, up to the layout
+    root (the first layout without a parent layout). On the next frame, the
+    layout root run the layout of the dirty layouts only: the minimum size
+    of a layout is measured (`update_minimum_size()`) when its size is read,
+    then its children are arranged (`do_layout()`). A layout that is moved or
+    resized by its parent is arranged without asking its parents to do the
+    layout again.
     '''
 
     def __init__(self, **kwargs):
@@ -39,13 +67,15 @@ class MTAbstractLayout(MTWidget):
         kwargs.setdefault('animation_duration', 1)
 
         self._minimum_size = (1, 1)
+        self._need_measure = False
+        self._need_arrange = False
+        self._layout_pending = False
 
         super(MTAbstractLayout, self).__init__(**kwargs)
 
         self._animation_type    = kwargs.get('animation_type')
         self.animation_duration = kwargs.get('animation_duration')
         self.auto_layout        = kwargs.get('auto_layout')
-        self.need_update        = False
         self.need_update_set    = False
 
 
@@ -56,6 +86,8 @@ class MTAbstractLayout(MTWidget):
         '''
         returns minimum size of layout (based on size of fixed/minimum size of children)
         '''
+        if self._need_measure:
+            self._measure()
         return self._minimum_size
     def _set_minimum_size(self, size):
         '''
@@ -69,6 +101,93 @@ class MTAbstractLayout(MTWidget):
             self.height = size[1]
     minimum_size = property(_get_minimum_size, _set_minimum_size)
 
+    # the size of a layout depend of its minimum size, measure it before
+    def _get_size(self):
+        if self._need_measure:
+            self._measure()
+        return self._size
+    size = property(_get_size, MTWidget._set_size)
+
+    def _get_width(self):
+        if self._need_measure:
+            self._measure()
+        return self._size[0]
+    width = property(_get_width, MTWidget._set_width)
+
+    def _get_height(self):
+        if self._need_measure:
+            self._measure()
+        return self._size[1]
+    height = property(_get_height, MTWidget._set_height)
+
+    def _get_need_update(self):
+        return self._need_arrange or self._need_measure
+    def _set_need_update(self, value):
+        if value:
+            self.invalidate_layout()
+    need_update = property(_get_need_update, _set_need_update,
+        doc='True if the layout will be done on the next frame. Set it to '
+            'True to request a layout.')
+
+    def invalidate_layout(self, measure=True, arrange=True):
+        '''Request a layout on the next frame.
+
+        :Parameters:
+            `measure` : bool, default to True
+                The minimum size changed: measure it again, and do the layout
+                of the parent layouts too.
+            `arrange` : bool, default to True
+                Arrange the children of this layout.
+        '''
+        if arrange:
+            self._need_arrange = True
+        if measure:
+            self._need_measure = True
+        # propagate up to the layout root. Stop on a parent that is already
+        # dirty: its parents are already dirty too.
+        parent = self._parent
+        while isinstance(parent, MTAbstractLayout):
+            if measure:
+                if parent._need_measure:
+                    break
+                parent._need_measure = True
+                parent._need_arrange = True
+            else:
+                if parent._layout_pending:
+                    break
+                parent._layout_pending = True
+            parent = parent._parent
+
+    def _measure(self):
+        # measure pass: minimum size of the children layouts is measured when
+        # update_minimum_size() read it
+        self._need_measure = False
+        self.update_minimum_size()
+
+    def _arrange(self):
+        # arrange pass: layout of this layout if needed, then of the children
+        # layouts that need it. While the children are arranged, the pending
+        # flag stop their invalidation to go up.
+        self._layout_pending = True
+        if self._need_measure:
+            self._measure()
+        if self._need_arrange:
+            self._need_arrange = False
+            self.do_layout()
+        layouts = [c for c in self.children if isinstance(c, MTAbstractLayout)]
+        for c in layouts:
+            if c._need_arrange or c._layout_pending:
+                c._arrange()
+        # a child can be invalidated by the layout of one of its sibling
+        self._layout_pending = False
+        for c in layouts:
+            if c._need_arrange or c._layout_pending:
+                self._layout_pending = True
+                break
+
+    def _is_layout_root(self):
+        return not isinstance(self._parent, MTAbstractLayout)
+
     def _set_animation_type(self, anim_type):
         if anim_type in AnimationAlpha.__dict__ :
             self._animation_type = anim_type
@@ -83,15 +202,11 @@ class MTAbstractLayout(MTWidget):
 
     def add_widget(self, widget, front=True, do_layout=None):
         super(MTAbstractLayout, self).add_widget(widget, front=front)
-        self.update_minimum_size()
-        if do_layout or (not do_layout and self.auto_layout):
-            self.need_update = True
+        self.invalidate_layout(arrange=bool(do_layout or self.auto_layout))
 
     def remove_widget(self, widget, do_layout=None):
         super(MTAbstractLayout, self).remove_widget(widget)
-        self.need_layout = True
-        if do_layout or (not do_layout and self.auto_layout):
-            self.need_update = True
+        self.invalidate_layout(arrange=bool(do_layout or self.auto_layout))
 
     def reposition_child(self, child, **kwargs):
         if self.animation_type and len(kwargs):
@@ -102,6 +217,37 @@ class MTAbstractLayout(MTWidget):
             for prop in kwargs:
                 child.__setattr__(prop, kwargs[prop])
 
+    def reposition_children(self, children, positions, sizes):
+        '''Move and resize a list of children at once, like
+        :meth:`reposition_child`. The position and size of a child are set
+        together, and its events are dispatched only if they changed.'''
+        if self.animation_type:
+            for c, pos, size in zip(children, positions, sizes):
+                self.reposition_child(c, pos=pos, size=size)
+            return
+        last_class = None
+        for c, pos, size in zip(children, positions, sizes):
+            klass = c.__class__
+            if klass is not last_class:
+                last_class = klass
+                default_geometry = _has_default_geometry(klass)
+            if not default_geometry:
+                c.pos = pos
+                c.size = size
+                continue
+            cpos, csize = c._pos, c._size
+            moved = cpos[0] != pos[0] or cpos[1] != pos[1]
+            resized = csize[0] != size[0] or csize[1] != size[1]
+            if not moved and not resized:
+                continue
+            c._pos = tuple(pos)
+            c._size = tuple(size)
+            c._update_parent_index()
+            if moved:
+                c.dispatch_event('on_move', *c._pos)
+            if resized:
+                c.dispatch_event('on_resize', *c._size)
+
     def get_parent_layout(self):
         return self
 
@@ -113,26 +259,24 @@ class MTAbstractLayout(MTWidget):
         self.minimum_size = self.size
 
     def on_move(self, x, y):
-        self.need_update = True
+        self.invalidate_layout(measure=False)
 
     def on_resize(self, w, h):
         self.size = max(w, self.minimum_size[0]), max(h, self.minimum_size[1])
-        self.need_update = True
+        self.invalidate_layout(measure=False)
 
     def on_update(self):
-        # layout must be done 2 time, in case of children
-        # are changing anythign between on_update.
-        # it must be done before too, to call minimum size before apply to
-        # children
-        if self.need_update:
-            self.need_update = False
-            self.update_minimum_size()
-            self.do_layout()
-        super(MTAbstractLayout, self).on_update()
-        if self.need_update:
-            self.need_update = False
-            self.update_minimum_size()
-            self.do_layout()
+        # the layout root do the layout of the dirty layouts under it. It
+        # must be done before the update of the children, and again after in
+        # case they changed anything.
+        if self._is_layout_root():
+            if self._need_arrange or self._layout_pending:
+                self._arrange()
+            super(MTAbstractLayout, self).on_update()
+            if self._need_arrange or self._layout_pending:
+                self._arrange()
+        else:
+            super(MTAbstractLayout, self).on_update()
 
     def on_layout(self):
         pass
@@ -4,8 +4,16 @@ Grid layout: arrange widget in a grid
 
 __all__ = ('MTGridLayout', 'GridLayoutException')
 
+from itertools import chain
+from numpy import array, zeros, arange, cumsum, concatenate, column_stack, \
+        where, fromiter
 from pymt.ui.widgets.layout.abstractlayout import MTAbstractLayout
 
+def _pairs_to_array(pairs):
+    # convert a list of (a, b) into a (n, 2) float array, None become 0
+    values = [x or 0 for x in chain.from_iterable(pairs)]
+    return fromiter(values, float, len(values)).reshape((len(pairs), 2))
+
 class GridLayoutException(Exception):
     pass
 
@@ -58,89 +66,86 @@ class MTGridLayout(MTAbstractLayout):
             raise Exception('Too much children in MTGridLayout. Increase your rows/cols!')
         super(MTGridLayout, self).add_widget(widget, front=front, do_layout=do_layout)
 
+    def _get_grid_shape(self):
+        # number of rows and columns used by the children
+        rows, cols = self.rows, self.cols
+        if cols is None:
+            cols = 1 + (len(self.children) / rows)
+        elif rows is None:
+            rows = 1 + (len(self.children) / cols)
+        return rows, cols
+
     def update_minimum_size(self):
-        current_cols = self.cols
-        current_rows = self.rows
-        if current_cols is None:
-            current_cols = 1 + (len(self.children) / current_rows)
-        elif current_rows is None:
-            current_rows = 1 + (len(self.children) / current_cols)
+        children = self.children
+        current_rows, current_cols = self._get_grid_shape()
+        count = min(len(children), current_rows * current_cols)
 
-        cols = dict(zip(xrange(current_cols), [0] * current_cols))
-        rows = dict(zip(xrange(current_rows), [0] * current_rows))
+        # sizes of the children, in a (rows, cols) array filled row by row
+        sizes = [c.minimum_size if isinstance(c, MTAbstractLayout) else c.size
+                 for c in children[:count]]
+        cells = zeros((current_rows * current_cols, 2))
+        cells[:count] = _pairs_to_array(sizes)
+        cells = cells.reshape((current_rows, current_cols, 2))
 
         # calculate maximum size for each columns and rows
-        i = 0
-        max_width = max_height = 0
-        for row in range(current_rows):
-            for col in range(current_cols):
-                if i >= len(self.children):
-                    break
-
-                #get needed size for that child
-                c = self.children[i]
-                w, h = c.size
-                if isinstance(c, MTAbstractLayout):
-                    w, h = c.minimum_size
-
-                cols[col] = max(cols[col], w)
-                self.max_col_width = max(max_width, cols[col])
-
-                rows[row] = max(rows[row], h)
-                self.max_row_height = max(max_height, rows[row])
-
-                i = i + 1
+        cols = cells[:, :, 0].max(axis=0)
+        rows = cells[:, :, 1].max(axis=1)
+        self.max_col_width = cols.max().item()
+        self.max_row_height = rows.max().item()
 
         # consider uniform sizeing
         if self.uniform_width:
-            for col in range(current_cols):
-                cols[col] = self.max_col_width
+            cols[:] = self.max_col_width
         if self.uniform_height:
-            for row in range(current_rows):
-                rows[row] = self.max_row_height
-
+            rows[:] = self.max_row_height
 
         # calculate minimum width/height for this widget
-        width = self.spacing * (len(cols) + 1)
-        height = self.spacing * (len(rows) + 1)
-        for i in cols:
-            width += cols[i]
-        for i in rows:
-            height += rows[i]
+        width = self.spacing * (current_cols + 1) + cols.sum()
+        height = self.spacing * (current_rows + 1) + rows.sum()
 
         #remeber for layout
-        self.col_widths  = cols
-        self.row_heights = rows
-
-        self.minimum_size = (width, height)
+        self.col_widths  = dict(enumerate(cols.tolist()))
+        self.row_heights = dict(enumerate(rows.tolist()))
 
+        self.minimum_size = (width.item(), height.item())
 
     def do_layout(self):
-        if len(self.children) == 0:
+        children = self.children
+        if len(children) == 0:
             return
 
-
-        spacing = self.spacing
+        # reading the size measure the columns and rows if needed
         _x, _y = self.pos
-        # reposition every child
-        i = 0
-        y = _y + spacing
-        for row_height in self.row_heights.itervalues():
-            x = _x + spacing
-            for col_width in self.col_widths.itervalues():
-                if i >= len(self.children):
-                    break
-                c = self.children[i]
-                # special y, we inverse order of children at reposition
-                c_pos = (x, self.top - row_height - (y - _y))
-                c_size = list(self.children[i].size)
-                if self.uniform_width or c.size_hint[0]:
-                    c_size[0] = col_width * (c.size_hint[0] or 1.0)
-                if self.uniform_height or c.size_hint[1]:
-                    c_size[1] = row_height * (c.size_hint[1] or 1.0)
-                self.reposition_child(c, pos=c_pos, size=c_size)
-                i = i + 1
-                x = x + col_width + spacing
-            y = y + row_height + spacing
-
+        top = self.top
+        col_widths, row_heights = self.col_widths, self.row_heights
+        cols = array([col_widths[i] for i in xrange(len(col_widths))])
+        rows = array([row_heights[i] for i in xrange(len(row_heights))])
+        count = min(len(children), len(cols) * len(rows))
+        children = children[:count]
+
+        # position of each column and row. rows are placed from the top.
+        spacing = self.spacing
+        xs = _x + spacing + concatenate(([0], cumsum(cols + spacing)[:-1]))
+        ys = top - rows - spacing - \
+                concatenate(([0], cumsum(rows + spacing)[:-1]))
+
+        # cell of each child
+        index = arange(count)
+        col_index = index % len(cols)
+        row_index = index // len(cols)
+        positions = column_stack((xs[col_index], ys[row_index]))
+
+        # stretch the children with a size hint, or all if uniform
+        sizes = _pairs_to_array([c.size for c in children])
+        hints = _pairs_to_array([c.size_hint for c in children])
+        for axis, extents, uniform in ((0, cols[col_index], self.uniform_width),
+                                       (1, rows[row_index], self.uniform_height)):
+            hint = hints[:, axis]
+            stretch = hint != 0
+            if uniform:
+                stretch[:] = True
+            hint[hint == 0] = 1.
+            sizes[:, axis] = where(stretch, extents * hint, sizes[:, axis])
+
+        self.reposition_children(children, positions.tolist(), sizes.tolist())
         self.dispatch_event('on_layout')
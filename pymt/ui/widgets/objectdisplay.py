@@ -12,6 +12,8 @@ from math import pi
 class MTObjectDisplay(MTWidget):
     '''MTObjectDisplay is a widget who draw objects on table'''
     def __init__(self, **kwargs):
+        # objects are drawn anywhere on the table
+        kwargs.setdefault('draw_culling', False)
         super(MTObjectDisplay, self).__init__(**kwargs)
         self.objects = {}
 
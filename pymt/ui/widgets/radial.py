@@ -53,8 +53,13 @@ class MTVectorSlider(MTWidget):
             Background color of the slider
     '''
 
+    __events__ = ('on_amplitude_change', 'on_angle_change',
+                  'on_vector_change')
+
     def __init__(self, **kwargs):
         kwargs.setdefault('radius', 200)
+        # the circle is drawn around the widget position, outside the bbox
+        kwargs.setdefault('draw_culling', False)
 
         super(MTVectorSlider, self).__init__(**kwargs)
 
@@ -64,10 +69,6 @@ class MTVectorSlider(MTWidget):
         self.amplitude = 0
         self.angle = 0
 
-        self.register_event_type('on_amplitude_change')
-        self.register_event_type('on_angle_change')
-        self.register_event_type('on_vector_change')
-
     def on_amplitude_change(self, *largs):
         pass
 
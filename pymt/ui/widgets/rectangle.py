@@ -11,6 +11,8 @@ class MTRectangularWidget(MTWidget):
     '''A rectangular widget that only propagates and handles
     events if the event was within its bounds.
     '''
+    retained_properties = ('pos', 'size')
+
     def __init__(self, **kwargs):
         super(MTRectangularWidget, self).__init__(**kwargs)
 
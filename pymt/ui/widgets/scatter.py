@@ -5,19 +5,59 @@ Scatter package: provide lot of widgets based on scatter (base, svg, plane, imag
 __all__ = ('MTScatterWidget', 'MTScatterSvg', 'MTScatterPlane',
            'MTScatterImage', 'MTScatter')
 
-from numpy import ascontiguousarray
-from pymt.lib.transformations import matrix_multiply, identity_matrix, \
-        translation_matrix, rotation_matrix, scale_matrix, inverse_matrix
+from numpy import ascontiguousarray, array
+from pymt.lib.transformations import matrix_multiply, \
+        translation_matrix, inverse_matrix
 from pymt.core.image import Image
 from pymt.logger import pymt_logger
 from pymt.ui.widgets.svg import MTSvg
-from pymt.ui.widgets.widget import MTWidget
+from pymt.ui.widgets.widget import MTWidget, _affine_mul
 from pymt.utils import deprecated, serialize_numpy, deserialize_numpy
 from pymt.vector import Vector
-from math import radians
+from math import radians, cos, sin, sqrt
 from OpenGL.GL import glMultMatrixf
 from pymt.graphx import drawCSSRectangle, set_color, gx_matrix
 
+# 2D affine transformations are stored as (a, b, c, d, e, f), for
+# x' = ax + by + c and y' = dx + ey + f.
+_affine_identity = (1., 0., 0., 0., 1., 0.)
+
+def _affine_translation(x, y):
+    return (1., 0., float(x), 0., 1., float(y))
+
+def _affine_rotation(angle):
+    c, s = cos(angle), sin(angle)
+    return (c, -s, 0., s, c, 0.)
+
+def _affine_scale(scale):
+    scale = float(scale)
+    return (scale, 0., 0., 0., scale, 0.)
+
+def _affine_anchor(t, x, y):
+    # same as translation(x, y) * t * translation(-x, -y)
+    a, b, c, d, e, f = t
+    return (a, b, c + x - a * x - b * y, d, e, f + y - d * x - e * y)
+
+def _affine_inverse(t):
+    a, b, c, d, e, f = t
+    det = float(a * e - b * d)
+    ia, ib, id, ie = e / det, -b / det, -d / det, a / det
+    return (ia, ib, -ia * c - ib * f, id, ie, -id * c - ie * f)
+
+def _affine_from_matrix(m):
+    # return the 2D affine of a 4x4 matrix, or None if the matrix is not a
+    # 2D transformation. The z scale is ignored.
+    if m[0][2] or m[1][2] or m[2][0] or m[2][1] or m[2][3] or \
+       m[3][0] or m[3][1] or m[3][2] or m[3][3] != 1:
+        return None
+    return (float(m[0][0]), float(m[0][1]), float(m[0][3]),
+            float(m[1][0]), float(m[1][1]), float(m[1][3]))
+
+def _affine_to_matrix(t):
+    a, b, c, d, e, f = t
+    return array(((a, b, 0., c), (d, e, 0., f),
+                  (0., 0., 1., 0.), (0., 0., 0., 1.)))
+
 
 class MTScatter(MTWidget):
     '''MTScatter is a scatter widget based on MTWidget.
@@ -49,11 +89,11 @@ class MTScatter(MTWidget):
             Fired whenever the Scatter Widget is transformed (rotate, scale, moved, or zoomed).
     '''
 
+    __events__ = ('on_transform', )
+
     def __init__(self, **kwargs):
         super(MTScatter, self).__init__(**kwargs)
 
-        self.register_event_type('on_transform')
-
         # private properties
         self._touches = []
         self._last_touch_pos = {}
@@ -63,12 +103,15 @@ class MTScatter(MTWidget):
         self._do_translation_x = True
         self._do_translation_y = True
 
-        self._transform        = identity_matrix()
-        self._transform_inv    = identity_matrix()
-        self._transform_gl     = ascontiguousarray(identity_matrix().T,
-                                                   dtype='float32')
-        self._transform_inv_gl = ascontiguousarray(identity_matrix().T,
-                                                   dtype='float32')
+        # the transformation is stored as a 2D affine, the numpy/OpenGL
+        # matrices are created only when needed. If a non 2D matrix is set,
+        # _affine is None and _matrix is used instead.
+        self._affine        = _affine_identity
+        self._affine_inv    = _affine_identity
+        self._matrix        = None
+        self._matrix_inv    = None
+        self._matrix_gl     = None
+        self._matrix_inv_gl = None
         self.update_matrices()
 
         #enable/dissable features
@@ -148,8 +191,7 @@ class MTScatter(MTWidget):
         if center == self.center:
             return False
         t = Vector(*center) - self.center
-        trans = translation_matrix( (t.x, t.y, 0) )
-        self.apply_transform(trans)
+        self.apply_affine(_affine_translation(t.x, t.y))
     center = property(_get_center, _set_center)
 
     def _get_pos(self):
@@ -159,8 +201,7 @@ class MTScatter(MTWidget):
         if pos == _pos:
             return
         t = Vector(*pos) - _pos
-        trans = translation_matrix( (t.x, t.y, 0) )
-        self.apply_transform(trans)
+        self.apply_affine(_affine_translation(t.x, t.y))
     pos = property(_get_pos, _set_pos, doc='Object position (x, y).  Lower left of bounding box for rotated scatter')
 
     def _get_x(self):
@@ -187,12 +228,15 @@ class MTScatter(MTWidget):
         return -1.0 *(v1.angle(v2) + 180) % 360
     def _set_rotation(self, rotation):
         angle_change = self.rotation - rotation
-        r = rotation_matrix(-radians(angle_change), (0, 0, 1))
-        self.apply_transform(r, post_multiply=True, anchor=self.to_local(*self.center))
+        r = _affine_rotation(-radians(angle_change))
+        self.apply_affine(r, post_multiply=True, anchor=self.to_local(*self.center))
     rotation = property(_get_rotation, _set_rotation,
         doc='''Get/set the rotation around center of the object (in degree)''')
 
     def _get_scale(self):
+        if self._affine is not None:
+            a, b, c, d, e, f = self._affine
+            return sqrt(a * a + d * d)
         p1 = Vector(*self.to_parent(0, 0))
         p2 = Vector(*self.to_parent(1, 0))
         scale = p1.distance(p2)
@@ -200,7 +244,7 @@ class MTScatter(MTWidget):
     def _set_scale(self, scale):
         #scale = boundary(scale, self.scale_min, self.scale_max) 
         rescale = scale * 1.0/self.scale
-        self.apply_transform(scale_matrix(rescale), post_multiply=True, anchor=self.to_local(*self.center))
+        self.apply_affine(_affine_scale(rescale), post_multiply=True, anchor=self.to_local(*self.center))
     scale = property(_get_scale, _set_scale,
         doc='''Get/set the scale factor of the object''')
     _scale = property(_get_scale, _set_scale, doc='''
@@ -235,10 +279,44 @@ class MTScatter(MTWidget):
         '''
         return self._transform_inv
 
+    @property
+    def _transform(self):
+        if self._matrix is None:
+            self._matrix = _affine_to_matrix(self._affine)
+        return self._matrix
+
+    @property
+    def _transform_inv(self):
+        if self._matrix_inv is None:
+            self._matrix_inv = _affine_to_matrix(self._affine_inv)
+        return self._matrix_inv
+
+    @property
+    def _transform_gl(self):
+        if self._matrix_gl is None:
+            self._matrix_gl = ascontiguousarray(self._transform.T,
+                                                dtype='float32')
+        return self._matrix_gl
+
+    @property
+    def _transform_inv_gl(self):
+        if self._matrix_inv_gl is None:
+            self._matrix_inv_gl = ascontiguousarray(self._transform_inv.T,
+                                                    dtype='float32')
+        return self._matrix_inv_gl
+
+    @property
+    def affine(self):
+        '''2D affine transformation (a, b, c, d, e, f) of the widget, with
+        x' = ax + by + c and y' = dx + ey + f. None if the transformation
+        matrix is not a 2D transformation. Read only.
+        '''
+        return self._affine
+
     def _get_transform(self):
         return self._transform
     def _set_transform(self, x):
-        self._transform = x
+        self._matrix = x
         self.update_matrices()
     transform = property(_get_transform, _set_transform,
         doc='Get/Set transformation matrix (numpy matrix)')
@@ -260,13 +338,32 @@ class MTScatter(MTWidget):
         else:
             return False
 
+    def _get_local_affine(self):
+        cls = self.__class__
+        if self._affine is None or \
+           cls.to_local.im_func is not MTScatter.to_local.im_func or \
+           cls.to_parent.im_func is not MTScatter.to_parent.im_func:
+            return False
+        return self._affine_inv, self._affine
+
+    def _get_draw_origin(self):
+        return (0, 0)
+
     def to_parent(self, x, y, **k):
-        p = matrix_multiply(self._transform, (x, y, 0, 1))
-        return (p[0], p[1])
+        t = self._affine
+        if t is None:
+            p = matrix_multiply(self._matrix, (x, y, 0, 1))
+            return (p[0], p[1])
+        a, b, c, d, e, f = t
+        return (a * x + b * y + c, d * x + e * y + f)
 
     def to_local(self, x, y, **k):
-        p = matrix_multiply(self._transform_inv, (x, y, 0, 1))
-        return (p[0], p[1])
+        t = self._affine_inv
+        if t is None:
+            p = matrix_multiply(self._matrix_inv, (x, y, 0, 1))
+            return (p[0], p[1])
+        a, b, c, d, e, f = t
+        return (a * x + b * y + c, d * x + e * y + f)
 
     def apply_angle_scale_trans(self, angle, scale, trans, point=Vector(0, 0)):
         '''Update matrix transformation by adding new angle, scale and translate.
@@ -286,12 +383,11 @@ class MTScatter(MTWidget):
         if new_scale < self.scale_min or old_scale > self.scale_max:
             scale = 1
 
-        t = translation_matrix((trans[0]*self._do_translation_x, trans[1]*self._do_translation_y, 0))
-        t = matrix_multiply(t, translation_matrix( (point[0], point[1], 0)))
-        t = matrix_multiply(t, rotation_matrix(angle, (0, 0, 1)))
-        t = matrix_multiply(t, scale_matrix(scale))
-        t = matrix_multiply(t, translation_matrix((-point[0], -point[1], 0)))
-        self.apply_transform(t)
+        t = _affine_mul(_affine_rotation(angle), _affine_scale(scale))
+        t = _affine_anchor(t, point[0], point[1])
+        t = _affine_mul(_affine_translation(trans[0] * self._do_translation_x,
+                                            trans[1] * self._do_translation_y), t)
+        self.apply_affine(t)
 
         self.dispatch_event('on_transform', None)
 
@@ -309,6 +405,11 @@ class MTScatter(MTWidget):
                 If true the transform matrix is post multiplied
                 (as if applied before the current transform)
         '''
+        if self._affine is not None:
+            affine = _affine_from_matrix(trans)
+            if affine is not None:
+                return self.apply_affine(affine, post_multiply, anchor)
+
         t = translation_matrix( (anchor[0], anchor[1], 0) )
         t = matrix_multiply(t, trans)
         t = matrix_multiply(t, translation_matrix( (-anchor[0], -anchor[1], 0) ))
@@ -318,22 +419,48 @@ class MTScatter(MTWidget):
         else:
             self.transform = matrix_multiply(t, self._transform)
 
+    def apply_affine(self, affine, post_multiply=False, anchor=(0, 0)):
+        '''
+        Same as :meth:`apply_transform`, with a 2D affine transformation
+        (a, b, c, d, e, f), for x' = ax + by + c and y' = dx + ey + f.
+        No matrix is created.
+        '''
+        if anchor[0] or anchor[1]:
+            affine = _affine_anchor(affine, anchor[0], anchor[1])
+        if self._affine is None:
+            return self.apply_transform(_affine_to_matrix(affine),
+                                        post_multiply)
+        if post_multiply:
+            self._affine = _affine_mul(self._affine, affine)
+        else:
+            self._affine = _affine_mul(affine, self._affine)
+        self._matrix = None
+        self.update_matrices()
+
     def update_matrices(self):
         '''Update inverse and OpenGL matrices, from the current transformation.
         If you change manually the transformation, you should call this
         function, or the drawing will failed.
         '''
-        self._transform_inv = inverse_matrix(self._transform)
-        self._transform_gl = ascontiguousarray(self._transform.T,
-                                               dtype='float32')
-        self._transform_inv_gl = ascontiguousarray(self._transform.T,
-                                                   dtype='float32')
+        matrix = self._matrix
+        if matrix is not None:
+            # the transformation matrix have been set or changed manually
+            self._affine = _affine_from_matrix(matrix)
+        if self._affine is None:
+            self._affine_inv = None
+            self._matrix_inv = inverse_matrix(matrix)
+        else:
+            self._affine_inv = _affine_inverse(self._affine)
+            self._matrix = self._matrix_inv = None
+        self._matrix_gl = self._matrix_inv_gl = None
+        self._invalidate_window_affine()
+        self._update_parent_index()
 
     def _apply_drag(self, touch):
         #_last_touch_pos has last pos in correct parent space, just liek incoming touch
         dx = (touch.x - self._last_touch_pos[touch][0]) * self._do_translation_x
         dy = (touch.y - self._last_touch_pos[touch][1]) * self._do_translation_y
-        self.apply_transform(translation_matrix((dx, dy, 0)))
+        self.apply_affine(_affine_translation(dx, dy))
         self.dispatch_event('on_transform', touch)
 
     def transform_with_touch(self, touch):
@@ -366,8 +493,8 @@ class MTScatter(MTWidget):
         if new_scale < self.scale_min or new_scale > self.scale_max:
             scale = 1.0
 
-        self.apply_transform(rotation_matrix(angle, (0, 0, 1)), anchor=anchor)
-        self.apply_transform(scale_matrix(scale), anchor=anchor)
+        self.apply_affine(_affine_mul(_affine_scale(scale),
+                                      _affine_rotation(angle)), anchor=anchor)
 
         #dispatch on_transform with th touch that caused it
         self.dispatch_event('on_transform', touch)
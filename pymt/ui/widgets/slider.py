@@ -43,6 +43,8 @@ class MTSlider(MTWidget):
         `on_value_change` (value)
             Fired when slider value is changed
     '''
+    __events__ = ('on_value_change', )
+
     def __init__(self, **kwargs):
         kwargs.setdefault('min', 0)
         kwargs.setdefault('max', 100)
@@ -57,7 +59,6 @@ class MTSlider(MTWidget):
         kwargs.setdefault('value', None)
 
         super(MTSlider, self).__init__(**kwargs)
-        self.register_event_type('on_value_change')
         self.touchstarts    = [] # only react to touch input that originated on this widget
         self.orientation    = kwargs.get('orientation')
         self.min            = kwargs.get('min')
@@ -174,6 +175,8 @@ class MTXYSlider(MTWidget):
         `on_value_change` (value X, value Y)
             Fired when slider x/y value is changed
     '''
+    __events__ = ('on_value_change', )
+
     def __init__(self, **kwargs):
         kwargs.setdefault('min_x', 20)
         kwargs.setdefault('max_x', 100)
@@ -185,7 +188,6 @@ class MTXYSlider(MTWidget):
         kwargs.setdefault('value_y', kwargs.get('min_y'))
 
         super(MTXYSlider, self).__init__(**kwargs)
-        self.register_event_type('on_value_change')
         self.touchstarts = [] # only react to touch input that originated on this widget
         self.radius     = kwargs.get('radius')
         self.padding    = kwargs.get('radius')
@@ -281,6 +283,8 @@ class MTBoundarySlider(MTWidget):
         `on_value_change` (value_min, value_max)
             Fired when min or max is changed
     '''
+    __events__ = ('on_value_change', )
+
     def __init__(self, **kwargs):
         kwargs.setdefault('min', 0)
         kwargs.setdefault('max', 100)
@@ -292,7 +296,6 @@ class MTBoundarySlider(MTWidget):
             kwargs.setdefault('size', (400, 30))
 
         super(MTBoundarySlider, self).__init__(**kwargs)
-        self.register_event_type('on_value_change')
         self.touchstarts    = [] # only react to touch input that originated on this widget
         self.orientation    = kwargs.get('orientation')
         if self.orientation not in ('horizontal', 'vertical'):
@@ -454,6 +457,8 @@ class MTMultiSlider(MTWidget):
             Fired when the value of one slider change
 
     '''
+    __events__ = ('on_value_change', )
+
     def __init__(self, **kwargs):
         kwargs.setdefault('sliders', 20)
         kwargs.setdefault('size', (400, 300))
@@ -461,7 +466,6 @@ class MTMultiSlider(MTWidget):
         kwargs.setdefault('init_value', 0.5)
         super(MTMultiSlider, self).__init__(**kwargs)
 
-        self.register_event_type('on_value_change')
         self.touchstarts = [] # only react to touch input that originated on this widget
         self._sliders = kwargs.get('sliders')
         self._spacing = kwargs.get('spacing')
@@ -44,6 +44,8 @@ class MTSpeechBubble(MTLabel):
         kwargs.setdefault('relpos', (-30, 20))
         kwargs.setdefault('trisize', 8)
         kwargs.setdefault('trirelpos', (0, 0))
+        # the bubble is drawn relative to the widget position
+        kwargs.setdefault('draw_culling', False)
         super(MTSpeechBubble, self).__init__(**kwargs)
         self.bordercolor    = kwargs.get('bordercolor')
         self.bordersize     = kwargs.get('bordersize')
@@ -4,7 +4,7 @@ Stencil container: clip drawing of children to his container
 
 __all__ = ('MTStencilContainer', )
 
-from pymt.ui.widgets.widget import MTWidget
+from pymt.ui.widgets.widget import MTWidget, culling_push, culling_pop
 from pymt.graphx import drawRectangle, stencilPush, stencilPop, stencilUse
 
 stencil_stack = 0
@@ -23,6 +23,7 @@ class MTStencilContainer(MTWidget):
     '''
     def __init__(self, **kwargs):
         super(MTStencilContainer, self).__init__(**kwargs)
+        self._culling_bbox = None
 
     def stencil_push(self):
         stencilPush()
@@ -30,13 +31,24 @@ class MTStencilContainer(MTWidget):
         drawRectangle(pos=self.pos, size=self.size)
         # switch drawing to color buffer.
         stencilUse()
+        # children outside the container are not visible
+        self._culling_bbox = self.get_window_bbox()
+        if self._culling_bbox is not None:
+            culling_push(self._culling_bbox)
 
     def stencil_pop(self):
+        if self._culling_bbox is not None:
+            culling_pop()
         stencilPop()
 
     def on_draw(self):
+        # nothing can be drawn outside the container
+        if self.is_culled():
+            return
         self.stencil_push()
-        # draw childrens
-        for w in self.children[:]:
-            w.dispatch_event('on_draw')
-        self.stencil_pop()
+        try:
+            # draw childrens
+            for w in self.children[:]:
+                w.dispatch_event('on_draw')
+        finally:
+            self.stencil_pop()
@@ -2,17 +2,107 @@
 Widget: Base of every widget implementation.
 '''
 
-__all__ = ('getWidgetById', 'MTWidget')
+__all__ = ('getWidgetById', 'MTWidget', 'culling_push', 'culling_pop')
 
 import weakref
 from pymt.event import EventDispatcher
 from pymt.logger import pymt_logger
 from pymt.utils import SafeList
 from pymt.ui.factory import MTWidgetFactory
-from pymt.ui.colors import css_get_style
-from pymt.graphx import set_color, drawCSSRectangle
+from pymt.ui.colors import css_get_style, css_get_styles, CSSStyle, \
+        CSSStyleProxy
+from pymt.ui.spatialindex import SpatialIndex
+from pymt.ui.texturecache import TextureCache
+from pymt.ui.retained import RetainedDraw
+from pymt.graphx import set_color, drawCSSRectangle, drawTexturedRectangle, \
+        gx_matrix_identity
+from OpenGL.GL import glTranslatef
 
 _id_2_widget = dict()
+_retained_draw = None
+_empty_style = CSSStyle()
+
+def _affine_mul(a, b):
+    # compose two 2D affine transforms (a, b, c, d, e, f), where
+    # x' = ax + by + c, y' = dx + ey + f. b is applied first.
+    # None is the identity.
+    if a is None:
+        return b
+    if b is None:
+        return a
+    a1, b1, c1, d1, e1, f1 = a
+    a2, b2, c2, d2, e2, f2 = b
+    return (a1 * a2 + b1 * d2, a1 * b2 + b1 * e2, a1 * c2 + b1 * f2 + c1,
+            d1 * a2 + e1 * d2, d1 * b2 + e1 * e2, d1 * c2 + e1 * f2 + f1)
+
+def _affine_points(affine, points):
+    if affine is None:
+        return [tuple(p) for p in points]
+    a, b, c, d, e, f = affine
+    return [(a * x + b * y + c, d * x + e * y + f) for x, y in points]
+
+#: Stack of visible areas (x1, y1, x2, y2) in window coordinates, used to skip
+#: the drawing of widgets outside. None disable the culling.
+_culling_stack = []
+
+def culling_push(bbox):
+    '''Restrict the visible area to a bounding box ((x, y), (w, h)) in window
+    coordinates, until :func:`culling_pop` is called. Widgets fully outside
+    the visible area are not drawn.
+    Use None to disable the culling (when drawing in a Fbo...)'''
+    rect = None
+    if bbox is not None:
+        (x, y), (w, h) = bbox
+        rect = (x, y, x + w, y + h)
+        if _culling_stack and _culling_stack[-1] is not None:
+            x1, y1, x2, y2 = _culling_stack[-1]
+            rect = (max(x1, rect[0]), max(y1, rect[1]),
+                    min(x2, rect[2]), min(y2, rect[3]))
+    _culling_stack.append(rect)
+
+def culling_pop():
+    '''Restore the previous visible area'''
+    _culling_stack.pop()
+
+def _mark_dirty(widget, child=None):
+    # invalidate the texture caches of the widget and its parents. widgets
+    # caching the drawing of each child (coverflow) are told which one changed
+    if not TextureCache.instances:
+        return
+    while widget is not None:
+        cache = getattr(widget, '_texture_cache', None)
+        if cache is not None:
+            cache.dirty = True
+        if child is not None:
+            on_child_dirty = getattr(widget, '_on_child_dirty', None)
+            if on_child_dirty is not None:
+                on_child_dirty(child)
+        child = widget
+        widget = getattr(widget, '_parent', None)
+
+def _get_retained_draw():
+    # default value of the retained parameter, from configuration
+    global _retained_draw
+    if _retained_draw is None:
+        import pymt
+        _retained_draw = pymt.pymt_config is not None and \
+            pymt.pymt_config.has_option('graphics', 'retained_draw') and \
+            pymt.pymt_config.getboolean('graphics', 'retained_draw')
+    return _retained_draw
+
+def _resolve_styles(widget):
+    # resolve the pending style of a widget, and of its siblings of the same
+    # class and css class at the same time
+    siblings = getattr(widget._parent, '_children', None)
+    widgets = None
+    if siblings:
+        klass, cls = widget.__class__, widget._cls
+        widgets = [w for w in siblings if w.__class__ is klass and
+                   w._style is None and w._cls == cls]
+    if not widgets or widget not in widgets:
+        widgets = [widget]
+    for w, style in zip(widgets, css_get_styles(widgets)):
+        w._load_style(style)
 
 def getWidgetById(widget_id):
     '''Get a widget by ID'''
@@ -33,6 +123,32 @@ class MTWidgetMetaclass(type):
     '''
     def __init__(mcs, name, bases, attrs):
         super(MTWidgetMetaclass, mcs).__init__(name, bases, attrs)
+        # collect event types declared by the class and its bases
+        events = set()
+        for klass in mcs.__mro__:
+            events.update(klass.__dict__.get('__events__', ()))
+        for event_type in events:
+            if not hasattr(mcs, event_type):
+                raise Exception('Missing default handler <%s> in <%s>' % (
+                                event_type, name))
+        mcs._class_event_types = frozenset(events)
+        mcs._class_event_types_hidden = frozenset(
+            events.difference(getattr(mcs, 'visible_events', ())))
+        # retained drawing can be used by default only if the properties
+        # are declared by the class defining the drawing methods
+        for klass in mcs.__mro__:
+            if 'retained_properties' in klass.__dict__:
+                mcs._retained_default = True
+                break
+            if [x for x in klass.__dict__ if x.startswith('draw')]:
+                mcs._retained_default = False
+                break
+        # the style can be resolved lazily only if apply_css() don't derive
+        # attributes from it, or if the class allow it
+        for klass in mcs.__mro__:
+            if 'apply_css' in klass.__dict__ or 'reload_css' in klass.__dict__:
+                mcs._lazy_style = klass.__dict__.get('_lazy_style', False)
+                break
         # auto registration in factory
         MTWidgetFactory.register(name, mcs)
 
@@ -59,10 +175,26 @@ class MTWidget(EventDispatcher):
             Visibility of widget
         `draw_children` : bool, default is True
             Indicate if children will be draw, or not
+        `draw_culling` : bool, default is True
+            Skip the drawing of the widget when its bounding box is outside
+            the window or the current stencil. Set to False for widgets that
+            draw outside their bounding box. Children are still drawn.
         `style` : dict, default to {}
             Add inline CSS
         `cls` : str, default is ''
             CSS class of this widget
+        `spatial_index` : bool or int, default is False
+            Index the children by position, to dispatch touch events only to
+            the children under the touch. Can be the grid cell size.
+            See :class:`~pymt.ui.spatialindex.SpatialIndex`.
+        `cache_as_texture` : bool, default is False
+            Render the widget and its children in a texture, and draw the
+            texture until the widget is marked dirty.
+            See :class:`~pymt.ui.texturecache.TextureCache`.
+        `retained` : bool, default from configuration
+            Record the widget drawing in a display list, replayed until
+            one of the `retained_properties` of the widget change.
+            See :class:`~pymt.ui.retained.RetainedDraw`.
 
     :Events:
         `on_update` ()
@@ -83,13 +215,16 @@ class MTWidget(EventDispatcher):
 
     __metaclass__ = MTWidgetMetaclass
 
-    __slots__ = ('children', 'style', 'draw_children',
+    # Keep the core compact: subclasses that don't define __slots__ still
+    # get a __dict__ for their own attributes.
+    __slots__ = ('_children', '_style', 'draw_children', 'draw_culling',
                  '_cls',
                  '_root_window_source', '_root_window',
                  '_parent_window_source', '_parent_window',
                  '_parent_layout_source', '_parent_layout',
                  '_size_hint', '_id', '_parent',
-                 '_visible', '_inline_style',
+                 '_visible', '_inline_style', '_spatial_index',
+                 '_window_affine', '_texture_cache', '_retained',
                  '__animationcache__',
                  '__weakref__')
 
@@ -99,6 +234,19 @@ class MTWidget(EventDispatcher):
         'on_touch_move',
         'on_touch_down'
     ]
+
+    #: Properties used by the drawing methods, watched by the retained drawing
+    retained_properties = ('pos', 'size')
+
+    #: The style is resolved on first access instead of in the constructor.
+    #: Disabled for the classes overriding apply_css(), except if they
+    #: declare it.
+    _lazy_style = True
+
+    __events__ = ('on_update', 'on_animation_complete', 'on_resize',
+                  'on_parent_resize', 'on_move', 'on_parent', 'on_draw',
+                  'on_touch_up', 'on_touch_move', 'on_touch_down')
+
     def __init__(self, **kwargs):
         kwargs.setdefault('pos', (0, 0))
         kwargs.setdefault('x', None)
@@ -109,8 +257,8 @@ class MTWidget(EventDispatcher):
         kwargs.setdefault('height', None)
         kwargs.setdefault('visible', True)
         kwargs.setdefault('draw_children', True)
+        kwargs.setdefault('draw_culling', True)
         kwargs.setdefault('cls', '')
-        kwargs.setdefault('style', {})
 
         self._id = None
         if 'id' in kwargs:
@@ -118,23 +266,22 @@ class MTWidget(EventDispatcher):
 
         super(MTWidget, self).__init__(**kwargs)
 
-        # Registers events
-        for ev in MTWidget.visible_events:
-            self.register_event_type(ev)
-
         # privates
-        self.__animationcache__   = set()
+        self.__animationcache__   = None
         self._parent              = None
         self._visible             = None
+        self._spatial_index       = None
+        self._window_affine       = None
+        self._texture_cache       = None
+        self._retained            = None
         self._size_hint           = kwargs.get('size_hint')
 
 
-        #: List of children (SafeList)
-        self.children             = SafeList()
+        self._children            = None
         #: If False, childrens are not drawed. (deprecated)
         self.draw_children        = kwargs.get('draw_children')
-        #: Dictionnary that contains the widget style
-        self.style = {}
+        self.draw_culling         = kwargs.get('draw_culling')
+        self._style = _empty_style
 
         # apply visibility
         self.visible              = kwargs.get('visible')
@@ -147,12 +294,6 @@ class MTWidget(EventDispatcher):
         self._root_window           = None
         self._root_window_source    = None
 
-        # register events
-        register_event_type = self.register_event_type
-        for event in ('on_update', 'on_animation_complete', 'on_resize',
-                      'on_parent_resize', 'on_move', 'on_parent'):
-            register_event_type(event)
-
         if kwargs.get('x'):
             self._pos = (kwargs.get('x'), self.y)
         if kwargs.get('y'):
@@ -164,14 +305,39 @@ class MTWidget(EventDispatcher):
 
         # apply style
         self._cls = ''
-        self._inline_style = kwargs['style']
+        self._inline_style = kwargs.get('style') or None
 
-        # loading is done here automaticly
-        self.cls = kwargs.get('cls')
+        if self._lazy_style:
+            # resolved on first draw or first access, see _get_style()
+            self._cls = kwargs.get('cls')
+            self._style = None
+        else:
+            self.cls = kwargs.get('cls')
+
+        if kwargs.get('spatial_index'):
+            self.spatial_index = kwargs.get('spatial_index')
+        if kwargs.get('cache_as_texture'):
+            self.cache_as_texture = True
+        retained = kwargs.get('retained')
+        if retained is None:
+            retained = self._retained_default and _get_retained_draw()
+        if retained:
+            self.retained = True
+
+    def _get_children(self):
+        children = self._children
+        if children is None:
+            children = self._children = SafeList()
+        return children
+    def _set_children(self, children):
+        self._children = children
+    children = property(_get_children, _set_children,
+        doc='List of children (SafeList), allocated on first use')
 
     def _set_cls(self, cls):
         self._cls = cls
-        self.reload_css()
+        if self._style is not None:
+            self.reload_css()
     def _get_cls(self):
         return self._cls
     cls = property(_get_cls, _set_cls,
@@ -180,6 +346,7 @@ class MTWidget(EventDispatcher):
 
     def _set_parent(self, parent):
         self._parent = parent
+        self._invalidate_window_affine()
         self.dispatch_event('on_parent')
     def _get_parent(self):
         return self._parent
@@ -204,11 +371,20 @@ class MTWidget(EventDispatcher):
         if self._visible == visible:
             return
         self._visible = visible
-        # register or unregister event if the widget is visible or not
+        _mark_dirty(self._parent, self)
+        # register or unregister event if the widget is visible or not.
+        # if the instance still use the class event types, just swap them.
+        cls = self.__class__
         if visible:
+            if self._event_types is cls._class_event_types_hidden:
+                self._event_types = cls._class_event_types
+                return
             for ev in MTWidget.visible_events:
                 self.register_event_type(ev)
         else:
+            if self._event_types is cls._class_event_types:
+                self._event_types = cls._class_event_types_hidden
+                return
             for ev in MTWidget.visible_events:
                 self.unregister_event_type(ev)
     def _get_visible(self):
@@ -226,33 +402,248 @@ class MTWidget(EventDispatcher):
     size_hint = property(_get_size_hint, _set_size_hint,
                          doc='size_hint is used by layouts to determine size behaviour during layout')
 
+    def _get_style(self):
+        style = self._style
+        if style is None:
+            _resolve_styles(self)
+            style = self._style
+        return style
+    def _set_style(self, style):
+        self._style = style
+        if self._retained is not None:
+            self._retained.dirty = True
+        _mark_dirty(self)
+    style = property(_get_style, _set_style,
+        doc='Dictionnary that contains the widget style. Until the widget '
+            'change its style, it is shared with other widgets, and copied on '
+            'the first change (see :class:`CSSStyleProxy`).')
+
+    def _get_spatial_index(self):
+        return self._spatial_index
+    def _set_spatial_index(self, value):
+        if not value:
+            self._spatial_index = None
+            return
+        if value is True:
+            index = SpatialIndex()
+        else:
+            index = SpatialIndex(cell_size=value)
+        for w in self.children:
+            index.add(w)
+        self._spatial_index = index
+    spatial_index = property(_get_spatial_index, _set_spatial_index,
+        doc='SpatialIndex of the children, or None. Set to True or to a cell '
+            'size to enable it, to False to disable it.')
+
+    def _get_cache_as_texture(self):
+        return self._texture_cache is not None
+    def _set_cache_as_texture(self, value):
+        if not value:
+            self._texture_cache = None
+        elif self._texture_cache is None:
+            self._texture_cache = TextureCache()
+    cache_as_texture = property(_get_cache_as_texture, _set_cache_as_texture,
+        doc='If True, the widget and its children are rendered in a texture, '
+            'drawn until the widget is marked dirty.')
+
+    def _get_retained(self):
+        return self._retained is not None
+    def _set_retained(self, value):
+        if not value:
+            self._retained = None
+        elif self._retained is None:
+            self._retained = RetainedDraw()
+    retained = property(_get_retained, _set_retained,
+        doc='If True, the drawing of the widget is recorded, and replayed '
+            'until one of the retained_properties change.')
+
+    def mark_dirty(self):
+        '''Indicate that the drawing of the widget changed: the recorded
+        drawing of the widget and the texture caches of the widget and its
+        parents are rendered again on the next frame. Property changes,
+        animations and touches already mark the widget dirty.'''
+        if self._retained is not None:
+            self._retained.dirty = True
+        _mark_dirty(self)
+
+    @property
+    def bbox(self):
+        '''Return the bounding box of the widget in parent space ::
+
+            ((x, y), (w, h))
+        '''
+        return self._pos, self._size
+
+    def get_window_bbox(self):
+        '''Return the bounding box of the widget in window coordinates
+        ((x, y), (w, h)), or None if it can't be calculated.'''
+        parent = self._parent
+        if parent is None:
+            affine = None
+        elif hasattr(parent, '_get_window_affine'):
+            affine = parent._get_window_affine()
+            if affine is False:
+                return None
+            affine = affine[1]
+        else:
+            return None
+        (x, y), (w, h) = self.bbox
+        if affine is None:
+            return (x, y), (w, h)
+        points = _affine_points(affine,
+            ((x, y), (x + w, y), (x, y + h), (x + w, y + h)))
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        x, y = min(xs), min(ys)
+        return (x, y), (max(xs) - x, max(ys) - y)
+
+    def is_culled(self):
+        '''Return True if the widget is fully outside of the visible area,
+        and must not be drawn (see `draw_culling`).'''
+        if not self.draw_culling or not _culling_stack:
+            return False
+        rect = _culling_stack[-1]
+        if rect is None:
+            return False
+        bbox = self.get_window_bbox()
+        if bbox is None:
+            return False
+        (x, y), (w, h) = bbox
+        x1, y1, x2, y2 = rect
+        return x > x2 or y > y2 or x + w < x1 or y + h < y1
+
+    def _update_parent_index(self):
+        '''Update the position of the widget in the spatial index of the
+        parent, if any. Must be called when the bounding box changes.'''
+        index = getattr(self._parent, '_spatial_index', None)
+        if index is not None:
+            index.update(self)
+        _mark_dirty(self._parent, self)
+
     def apply_css(self, styles):
         '''Called at __init__ time to applied css attribute in current class.
+        The shared style is copied the first time the widget change it.
         '''
-        self.style.update(styles)
+        if self._style is None:
+            _resolve_styles(self)
+        if styles is self._style or not len(styles):
+            return
+        self._style.update(styles)
+        if self._retained is not None:
+            self._retained.dirty = True
+        _mark_dirty(self)
 
     def reload_css(self):
         '''Called when css want to be reloaded from scratch'''
-        self.style = {}
-        style = css_get_style(widget=self)
-        self.apply_css(style)
-        if len(self._inline_style):
+        self._load_style(css_get_style(widget=self))
+
+    def _load_style(self, style):
+        self._style = CSSStyleProxy(self, style)
+        self.apply_css(self._style)
+        if self._inline_style:
             self.apply_css(self._inline_style)
 
+    def _get_local_affine(self):
+        '''Return the (to_local, to_parent) transforms of the widget as 2D
+        affines (None for identity), or False if they can't be expressed as
+        affines (to_local/to_parent overloaded).'''
+        cls = self.__class__
+        if cls.to_local.im_func is not MTWidget.to_local.im_func or \
+           cls.to_parent.im_func is not MTWidget.to_parent.im_func:
+            return False
+        return None, None
+
+    def _get_window_affine(self):
+        '''Return the composed (window to local, local to window) transforms
+        as 2D affines, or False if one widget of the parent chain can't
+        express its transformation as an affine. The result is cached until
+        the transformation of the widget or of one of its parents change.'''
+        affine = self._window_affine
+        if affine is not None:
+            return affine
+        local = self._get_local_affine()
+        if local is False:
+            return False
+        parent = self._parent
+        if parent is None:
+            parent_affine = (None, None)
+        elif hasattr(parent, '_get_window_affine'):
+            parent_affine = parent._get_window_affine()
+            if parent_affine is False:
+                return False
+        else:
+            return False
+        affine = (_affine_mul(local[0], parent_affine[0]),
+                  _affine_mul(parent_affine[1], local[1]))
+        self._window_affine = affine
+        return affine
+
+    def _invalidate_window_affine(self):
+        '''Invalidate the cached window transforms of the widget and of its
+        children. Must be called when the to_local/to_parent transformation
+        of the widget change.'''
+        # a child can have a cache only if his parent have one.
+        if self._window_affine is None:
+            return
+        self._window_affine = None
+        if self._children:
+            for child in self._children:
+                try:
+                    child._invalidate_window_affine()
+                except AttributeError:
+                    pass
+
     def to_widget(self, x, y, relative=False):
         '''Return the coordinate from window to local widget'''
+        if not relative:
+            affine = self._get_window_affine()
+            if affine is not False:
+                affine = affine[0]
+                if affine is None:
+                    return (x, y)
+                a, b, c, d, e, f = affine
+                return (a * x + b * y + c, d * x + e * y + f)
         if self.parent:
             x, y = self.parent.to_widget(x, y)
         return self.to_local(x, y, relative=relative)
 
     def to_window(self, x, y, initial=True, relative=False):
         '''Transform local coordinate to window coordinate'''
+        parent = self._parent
+        if initial and not relative and \
+           hasattr(parent, '_get_window_affine'):
+            affine = parent._get_window_affine()
+            if affine is not False:
+                affine = affine[1]
+                if affine is None:
+                    return (x, y)
+                a, b, c, d, e, f = affine
+                return (a * x + b * y + c, d * x + e * y + f)
         if not initial:
             x, y = self.to_parent(x, y, relative=relative)
         if self.parent:
             return self.parent.to_window(x, y, initial=False, relative=relative)
         return (x, y)
 
+    def to_widget_points(self, points):
+        '''Transform a list of (x, y) from window to local widget coordinates
+        (like :meth:`to_widget`)'''
+        affine = self._get_window_affine()
+        if affine is False:
+            return [self.to_widget(x, y) for x, y in points]
+        return _affine_points(affine[0], points)
+
+    def to_window_points(self, points):
+        '''Transform a list of (x, y) to window coordinates
+        (like :meth:`to_window`)'''
+        parent = self._parent
+        if not hasattr(parent, '_get_window_affine'):
+            return [self.to_window(x, y) for x, y in points]
+        affine = parent._get_window_affine()
+        if affine is False:
+            return [self.to_window(x, y) for x, y in points]
+        return _affine_points(affine[1], points)
+
     def to_parent(self, x, y, relative=False):
         '''Transform local coordinate to parent coordinate
 
@@ -343,15 +734,65 @@ class MTWidget(EventDispatcher):
         self.visible = True
 
     def on_update(self):
-        for w in self.children[:]:
-            w.dispatch_event('on_update')
+        if self._children:
+            for w in self._children[:]:
+                w.dispatch_event('on_update')
 
     def on_draw(self):
-        self.draw()
-        if self.draw_children:
-            for w in self.children[:]:
+        if self._texture_cache is not None:
+            if not self.is_culled():
+                self.draw_texture_cache()
+            return
+        # children can be outside of their parent bounds, only skip the
+        # widget drawing.
+        if not self.is_culled():
+            if self._retained is not None:
+                self._retained.draw(self)
+            else:
+                self.draw()
+        if self.draw_children and self._children:
+            for w in self._children[:]:
                 w.dispatch_event('on_draw')
 
+    def _get_draw_origin(self):
+        # origin of the widget drawing, in local coordinates
+        return self._pos
+
+    def draw_texture_cache(self):
+        '''Draw the widget and its children from the texture cache. The
+        texture is rendered again if the widget have been marked dirty.'''
+        cache = self._texture_cache
+        x, y = self._get_draw_origin()
+        w, h = self._size
+        if not cache.update(w, h):
+            # no texture available, draw without cache
+            self.draw()
+            if self.draw_children and self._children:
+                for child in self._children[:]:
+                    child.dispatch_event('on_draw')
+            return
+        if cache.dirty:
+            cache.dirty = False
+            fbo = cache.fbo
+            # culling use window coordinates, disable it in the fbo
+            culling_push(None)
+            try:
+                with fbo:
+                    fbo.clear()
+                    with gx_matrix_identity:
+                        glTranslatef(-x, -y, 0)
+                        if self._retained is not None:
+                            self._retained.draw(self)
+                        else:
+                            self.draw()
+                        if self.draw_children and self._children:
+                            for child in self._children[:]:
+                                child.dispatch_event('on_draw')
+            finally:
+                culling_pop()
+        set_color(1, 1, 1, 1)
+        drawTexturedRectangle(cache.fbo.texture, pos=(x, y), size=(w, h))
+
     def draw(self):
         '''Handle the draw of widget.
         Derivate this method to draw your widget.'''
@@ -368,6 +809,9 @@ class MTWidget(EventDispatcher):
             w.parent = self
         except Exception:
             pass
+        if self._spatial_index is not None:
+            self._spatial_index.add(w, front)
+        _mark_dirty(self)
 
     def add_widgets(self, *widgets):
         for w in widgets:
@@ -376,8 +820,15 @@ class MTWidget(EventDispatcher):
 
     def remove_widget(self, w):
         '''Remove a widget from the children list'''
-        if w in self.children:
-            self.children.remove(w)
+        if self._children and w in self._children:
+            self._children.remove(w)
+            try:
+                w._invalidate_window_affine()
+            except AttributeError:
+                pass
+            if self._spatial_index is not None:
+                self._spatial_index.remove(w)
+            _mark_dirty(self)
 
     def on_animation_complete(self, *largs):
         pass
@@ -389,26 +840,49 @@ class MTWidget(EventDispatcher):
         pass
 
     def on_resize(self, w, h):
-        for c in self.children[:]:
-            c.dispatch_event('on_parent_resize', w, h)
+        if self._children:
+            for c in self._children[:]:
+                c.dispatch_event('on_parent_resize', w, h)
 
     def on_move(self, x, y):
-        for c in self.children[:]:
-            c.dispatch_event('on_move', x, y)
+        if self._children:
+            for c in self._children[:]:
+                c.dispatch_event('on_move', x, y)
 
     def on_touch_down(self, touch):
-        for w in reversed(self.children[:]):
+        if not self._children:
+            return
+        if self._spatial_index is not None:
+            children = self._spatial_index.query(touch.x, touch.y)
+        else:
+            children = reversed(self._children[:])
+        for w in children:
             if w.dispatch_event('on_touch_down', touch):
+                _mark_dirty(w)
                 return True
 
     def on_touch_move(self, touch):
-        for w in reversed(self.children[:]):
+        if not self._children:
+            return
+        if self._spatial_index is not None:
+            children = self._spatial_index.query(touch.x, touch.y)
+        else:
+            children = reversed(self._children[:])
+        for w in children:
             if w.dispatch_event('on_touch_move', touch):
+                _mark_dirty(w)
                 return True
 
     def on_touch_up(self, touch):
-        for w in reversed(self.children[:]):
+        if not self._children:
+            return
+        if self._spatial_index is not None:
+            children = self._spatial_index.query(touch.x, touch.y)
+        else:
+            children = reversed(self._children[:])
+        for w in children:
             if w.dispatch_event('on_touch_up', touch):
+                _mark_dirty(w)
                 return True
 
     def do(self, animation):
@@ -424,50 +898,140 @@ class MTWidget(EventDispatcher):
         # we need to store a reference of our animation class
         # otherwise, if the animation is called with self.do(),
         # gc can suppress reference, and it's gone !
+        # the animation is stored, not the returned object: sequences and
+        # repeats don't return their current animation object.
         animobj = animation.start(self)
-        self.__animationcache__.add(animobj)
+        if self.__animationcache__ is None:
+            self.__animationcache__ = set()
+        self.__animationcache__.add(animation)
         def animobject_on_complete(widget, *l):
             if widget != self:
                 return
-            if animobj in self.__animationcache__:
-                self.__animationcache__.remove(animobj)
+            if self.__animationcache__ and animation in self.__animationcache__:
+                self.__animationcache__.remove(animation)
         animation.connect('on_complete', animobject_on_complete)
         return animobj
 
+    def reset(self):
+        '''Reset the widget before it goes back in a
+        :class:`~pymt.ui.widgetpool.WidgetPool`: the widget is removed from
+        its parent, the children are removed, the animations are stopped,
+        and the event handlers and inline style are removed. Position and
+        size are kept.
+
+        Subclasses with custom state must extend it.
+        '''
+        parent = self._parent
+        if parent is not None:
+            parent.remove_widget(self)
+            self._parent = None
+            self._invalidate_window_affine()
+        if self._children:
+            for w in self._children[:]:
+                self.remove_widget(w)
+        if self.__animationcache__:
+            for animation in self.__animationcache__:
+                animation.cancel(self)
+            self.__animationcache__ = None
+
+        # default event handlers
+        self._event_stack = None
+        self._event_types = self._class_event_types
+        self._visible = True
+
+        if self._id is not None:
+            if self._id in _id_2_widget and _id_2_widget[self._id]() is self:
+                del _id_2_widget[self._id]
+            self._id = None
+
+        # a style changed by the widget is not shared anymore
+        if self._lazy_style:
+            self._inline_style = None
+            self._style = None
+        elif self._inline_style or type(self._style) is not CSSStyleProxy:
+            self._inline_style = None
+            self.reload_css()
+
+        self._parent_layout = self._parent_layout_source = None
+        self._parent_window = self._parent_window_source = None
+        self._root_window = self._root_window_source = None
+        self.mark_dirty()
+
+    def reuse(self, **kwargs):
+        '''Configure a widget taken from a
+        :class:`~pymt.ui.widgetpool.WidgetPool`, with the same parameters
+        as the constructor. Only the parameters given are changed.
+
+        Subclasses with custom parameters must extend it.
+        '''
+        if 'pos' in kwargs:
+            self.pos = kwargs['pos']
+        if kwargs.get('x') is not None:
+            self.x = kwargs['x']
+        if kwargs.get('y') is not None:
+            self.y = kwargs['y']
+        if 'size' in kwargs:
+            self.size = kwargs['size']
+        if kwargs.get('width') is not None:
+            self.width = kwargs['width']
+        if kwargs.get('height') is not None:
+            self.height = kwargs['height']
+        if 'size_hint' in kwargs:
+            self.size_hint = kwargs['size_hint']
+        if 'visible' in kwargs:
+            self.visible = kwargs['visible']
+        if 'draw_children' in kwargs:
+            self.draw_children = kwargs['draw_children']
+        if 'draw_culling' in kwargs:
+            self.draw_culling = kwargs['draw_culling']
+        if 'id' in kwargs:
+            self.id = kwargs['id']
+        if kwargs.get('style'):
+            self._inline_style = kwargs['style']
+            self.apply_css(self._inline_style)
+        if 'cls' in kwargs and kwargs['cls'] != self._cls:
+            self.cls = kwargs['cls']
+
     # generate event for all baseobject methods
 
     def _set_pos(self, x):
         if super(MTWidget, self)._set_pos(x):
+            self._update_parent_index()
             self.dispatch_event('on_move', *self._pos)
             return True
     pos = property(EventDispatcher._get_pos, _set_pos)
 
     def _set_x(self, x):
         if super(MTWidget, self)._set_x(x):
+            self._update_parent_index()
             self.dispatch_event('on_move', *self._pos)
             return True
     x = property(EventDispatcher._get_x, _set_x)
 
     def _set_y(self, x):
         if super(MTWidget, self)._set_y(x):
+            self._update_parent_index()
             self.dispatch_event('on_move', *self._pos)
             return True
     y = property(EventDispatcher._get_y, _set_y)
 
     def _set_size(self, x):
         if super(MTWidget, self)._set_size(x):
+            self._update_parent_index()
             self.dispatch_event('on_resize', *self._size)
             return True
     size = property(EventDispatcher._get_size, _set_size)
 
     def _set_width(self, x):
         if super(MTWidget, self)._set_width(x):
+            self._update_parent_index()
             self.dispatch_event('on_resize', *self._size)
             return True
     width = property(EventDispatcher._get_width, _set_width)
 
     def _set_height(self, x):
         if super(MTWidget, self)._set_height(x):
+            self._update_parent_index()
             self.dispatch_event('on_resize', *self._size)
             return True
     height = property(EventDispatcher._get_height, _set_height)
@@ -24,12 +24,13 @@ from pymt.utils import SafeList
 from pymt.logger import pymt_logger
 from pymt.base import getCurrentTouches, setWindow, touch_event_listeners
 from pymt.clock import getClock
-from pymt.graphx import set_color, drawCircle, drawLabel, drawRectangle, drawCSSRectangle
+from pymt.graphx import set_color, drawCircle, drawRectangle, drawCSSRectangle, \
+        LabelHandle
 from pymt.modules import pymt_modules
 from pymt.event import EventDispatcher
 from pymt.ui.colors import css_get_style
 from pymt.ui.factory import MTWidgetFactory
-from pymt.ui.widgets import MTWidget
+from pymt.ui.widgets import MTWidget, culling_push, culling_pop
 
 class BaseWindow(EventDispatcher):
     '''BaseWindow is a abstract window widget, for any window implementation.
@@ -185,6 +186,7 @@ class BaseWindow(EventDispatcher):
 
         # show fps if asked
         self.show_fps = kwargs.get('show_fps')
+        self._fps_label = None
         if pymt.pymt_config.getboolean('pymt', 'show_fps'):
             self.show_fps = True
 
@@ -378,6 +380,10 @@ class BaseWindow(EventDispatcher):
     def to_window(self, x, y, initial=True, relative=False):
         return (x, y)
 
+    def _get_window_affine(self):
+        # window coordinates are not transformed
+        return None, None
+
     def get_root_window(self):
         return self
 
@@ -402,15 +408,21 @@ class BaseWindow(EventDispatcher):
         # draw our window
         self.draw()
 
-        # then, draw childrens
-        for w in self.children[:]:
-            w.dispatch_event('on_draw')
+        # then, draw childrens, skipping the ones outside the window
+        culling_push(((0, 0), self.size))
+        try:
+            for w in self.children[:]:
+                w.dispatch_event('on_draw')
+        finally:
+            culling_pop()
 
         if self.show_fps:
             fps = getClock().get_fps()
-            drawLabel(label='FPS: %.2f' % float(fps),
-                center=False, pos=(0, 0),
-                font_size=10, bold=False)
+            if self._fps_label is None:
+                self._fps_label = LabelHandle(center=False, font_size=10,
+                                              bold=False, strip=True)
+            self._fps_label.label = 'FPS: %.2f' % float(fps)
+            self._fps_label.draw(pos=(0, 0))
 
         self.draw_mouse_touch()
 
@@ -0,0 +1,99 @@
+'''
+Coverflow
+'''
+
+from init import test, import_pymt_no_window
+
+def unittest_coverflow_transforms():
+    import_pymt_no_window()
+    from pymt import MTCoverFlow, MTWidget
+
+    coverflow = MTCoverFlow(size=(800, 600))
+    for x in xrange(100):
+        coverflow.add_widget(MTWidget())
+    coverflow.selection = 50
+    tw = coverflow.thumbnail_size[0]
+
+    def get_position(index):
+        # position of a cover when every child was drawn
+        x2 = coverflow.center[0]
+        selection = coverflow.selection
+        if index < selection:
+            return coverflow.cover_angle, x2 - coverflow.cover_distance - \
+                    (selection - index) * coverflow.cover_spacing
+        elif index > selection:
+            return 90 + (90 - coverflow.cover_angle), \
+                    x2 + coverflow.cover_distance + \
+                    (index - selection) * coverflow.cover_spacing
+        return 0, x2 - tw / 2.
+
+    def get_transform(index, transition):
+        angle, x = get_position(index)
+        if transition != 0:
+            if transition > 0:
+                angle2, x2 = get_position(index - 1)
+            else:
+                angle2, x2 = get_position(index + 1)
+            angle += abs(transition) * (angle2 - angle)
+            x += abs(transition) * (x2 - x)
+        return angle, x
+
+    for transition in (0, .3, -.3):
+        coverflow._transition = transition
+        coverflow._update_transforms()
+        first, last = coverflow._get_visible_range()
+        test(first < 50 < last)
+
+        # same order as drawing all the covers, without the hidden ones
+        order = range(0, 50) + range(99, 50, -1) + [50]
+        order = [i for i in order if first <= i <= last]
+        test([t[0] for t in coverflow._transforms] == order)
+
+        # same angle and position
+        for index, angle, x, alpha_coords in coverflow._transforms:
+            angle2, x2 = get_transform(index, transition)
+            test(abs(angle - angle2) < 0.0001 and abs(x - x2) < 0.0001)
+
+        # hidden covers are outside the widget
+        if first > 0:
+            test(get_transform(first - 1, transition)[1] + tw < coverflow.x)
+        if last < 99:
+            test(get_transform(last + 1, transition)[1] >
+                 coverflow.x + coverflow.width)
+
+    # rebuilt only if the selection or the transition change
+    transforms = coverflow._transforms
+    coverflow._update_transforms()
+    test(coverflow._transforms is transforms)
+    coverflow.selection = 10
+    coverflow._update_transforms()
+    test(coverflow._transforms is not transforms)
+    test(coverflow._transforms[-1][0] == 10)
+
+def unittest_coverflow_refresh():
+    import_pymt_no_window()
+    from pymt import MTCoverFlow, MTWidget, MTImageButton, \
+            Loader, ProxyImage, TextureCache
+
+    coverflow = MTCoverFlow(size=(800, 600))
+    cover = MTWidget()
+    child = MTWidget()
+    cover.add_widget(child)
+    image = ProxyImage(Loader.loading_image)
+    button = MTImageButton(image=image)
+    coverflow.add_widgets(cover, button)
+    cache = coverflow._covers[cover] = TextureCache()
+    cache2 = coverflow._covers[button] = TextureCache()
+    cache.dirty = cache2.dirty = False
+
+    # a cover is rendered again when its drawing change
+    child.mark_dirty()
+    test(cache.dirty)
+    test(not cache2.dirty)
+    cache.dirty = False
+    cover.pos = (10, 10)
+    test(cache.dirty)
+
+    # or when its image is loaded
+    image.dispatch_event('on_load')
+    test(cache2.dirty)
@@ -21,6 +21,30 @@ def unittest_css():
     x.style['bg-color'] = [0, 0, 0, 0]
     test(x.style['bg-color'] == [0 ,0 ,0 ,0])
 
+def unittest_css_shared():
+    import_pymt_no_window()
+    from pymt import MTWidget, CSSWidgetStyle, css_add_sheet
+    css_add_sheet('''
+    .shared {
+        bg-color: rgba(255, 0, 0, 255);
+        }
+    ''')
+    w = MTWidget(cls='shared')
+    x = MTWidget(cls='shared')
+    y = MTWidget(cls='shared')
+    test(w.style.shared is x.style.shared)
+    style = w.style
+    style['bg-color'] = [0, 0, 0, 0]
+    style['color'] = [0, 0, 0, 0]
+    test(type(w.style) is CSSWidgetStyle)
+    test(w.style['bg-color'] == [0, 0, 0, 0])
+    test(w.style['color'] == [0, 0, 0, 0])
+    test(x.style['bg-color'] == [1.0, 0.0, 0.0, 1.0])
+    test(x.style.shared is y.style.shared)
+    y.apply_css({'bg-color': [0, 0, 0, 0]})
+    test(y.style['bg-color'] == [0, 0, 0, 0])
+    test(x.style['bg-color'] == [1.0, 0.0, 0.0, 1.0])
+
 def unittest_css_label():
     import_pymt_no_window()
     from pymt import MTLabel, css_add_sheet
@@ -45,3 +69,205 @@ def unittest_css_multiclass():
     ''')
     l = MTLabel(label = 'test', cls=('test1', 'test2'))
     test(l.style['font-size'] == 24)
+
+def unittest_css_merge_order():
+    import_pymt_no_window()
+    from pymt import MTWidget, css_add_sheet
+
+    class MTOrderBase(MTWidget):
+        pass
+
+    class MTOrderChild(MTOrderBase):
+        pass
+
+    # rules are written from the most to the least specific, the text
+    # order must not change the merge order
+    css_add_sheet('''
+    #orderid { order-d: id; }
+    orderchild.orderc { order-c: typeclass; order-d: typeclass;
+                        order-h: child; }
+    orderbase.orderc { order-g: base; order-h: base; }
+    .orderc { order-b: class; order-c: class; order-d: class; }
+    orderchild { order-a: type; order-b: type; order-c: type;
+                 order-d: type; order-f: child; }
+    orderbase { order-e: base; order-f: base; }
+    ''')
+
+    # type, then .class, then type.class, then #id
+    w = MTOrderChild(cls='orderc', id='orderid')
+    test(w.style['order-a'] == 'type')
+    test(w.style['order-b'] == 'class')
+    test(w.style['order-c'] == 'typeclass')
+    test(w.style['order-d'] == 'id')
+    w = MTOrderChild(cls='orderc')
+    test(w.style['order-d'] == 'typeclass')
+    w = MTOrderChild()
+    test(w.style['order-d'] == 'type')
+
+    # the widget class take precedence over its parent classes
+    w = MTOrderChild(cls='orderc')
+    test(w.style['order-e'] == 'base')
+    test(w.style['order-f'] == 'child')
+    test(w.style['order-g'] == 'base')
+    test(w.style['order-h'] == 'child')
+    w = MTOrderBase(cls='orderc')
+    test(w.style['order-f'] == 'base')
+    test(w.style['order-h'] == 'base')
+    test('order-a' not in w.style)
+
+def unittest_css_merge_multiclass():
+    import_pymt_no_window()
+    from pymt import MTWidget, css_add_sheet
+
+    class MTOrderMulti(MTWidget):
+        pass
+
+    css_add_sheet('''
+    ordermulti.ordera { order-k: typeclass; }
+    .orderb { order-j: b; order-k: b; }
+    .ordera { order-i: a; order-j: a; }
+    ''')
+
+    # each css class is merged in order, with its type.class rules
+    w = MTOrderMulti(cls=('ordera', 'orderb'))
+    test(w.style['order-i'] == 'a')
+    test(w.style['order-j'] == 'b')
+    test(w.style['order-k'] == 'b')
+    w = MTOrderMulti(cls=('orderb', 'ordera'))
+    test(w.style['order-j'] == 'a')
+    test(w.style['order-k'] == 'typeclass')
+    w = MTOrderMulti(cls=['orderb', 'ordera'])
+    test(w.style['order-k'] == 'typeclass')
+
+def unittest_css_merge_cache():
+    import_pymt_no_window()
+    from pymt import MTWidget, css_add_sheet
+    from pymt.ui.colors import css_get_style, css_get_styles
+
+    class MTOrderCache(MTWidget):
+        pass
+
+    css_add_sheet('''
+    ordercache.ordercls { order-a: typeclass; }
+    #ordercacheid { order-a: id; }
+    ''')
+
+    # ids without rule share the style of the (class chain, cls)
+    a = MTOrderCache(cls='ordercls', id='ordernostyle1')
+    b = MTOrderCache(cls='ordercls', id='ordernostyle2')
+    c = MTOrderCache(cls='ordercls')
+    test(css_get_style(a) is css_get_style(b))
+    test(css_get_style(a) is css_get_style(c))
+    test(a.style['order-a'] == 'typeclass')
+
+    # an id with a rule get its own style
+    d = MTOrderCache(cls='ordercls', id='ordercacheid')
+    e = MTOrderCache(cls='ordercls', id='ordercacheid')
+    test(d.style['order-a'] == 'id')
+    test(css_get_style(d) is not css_get_style(a))
+    test(css_get_style(d) is css_get_style(e))
+
+    # a different cls is not mixed in the cache
+    f = MTOrderCache(cls='orderother', id='ordernostyle1')
+    test(css_get_style(f) is not css_get_style(a))
+    test('order-a' not in f.style)
+
+    # same styles with the grouped search
+    styles = css_get_styles([a, b, d, c, f, e])
+    test(styles == [css_get_style(x) for x in (a, b, d, c, f, e)])
+    test(styles[0] is styles[1] and styles[2] is styles[5])
+
+def unittest_css_compiled_cache():
+    import_pymt_no_window()
+    import os
+    import shutil
+    import tempfile
+    from pymt.ui import colors
+    tmpdir = tempfile.mkdtemp()
+    cache_fn, cache = colors._css_cache_fn, colors._css_cache
+    try:
+        colors._css_cache_fn = os.path.join(tmpdir, 'css.cache')
+        colors._css_cache = None
+        cssfile = os.path.join(tmpdir, 'test.css')
+        text = '.compiled { bg-color: rgba(255, 0, 0, 255); }'
+        css, deferred = colors.css_get_compiled(cssfile, text)
+        test(css['.compiled']['bg-color'] == [1.0, 0.0, 0.0, 1.0])
+        test(os.path.exists(colors._css_cache_fn))
+
+        # load the precompiled table from the file
+        colors._css_cache = None
+        css2, deferred2 = colors.css_get_compiled(cssfile, text)
+        test(css2 == css)
+        test(css2 is colors._css_cache[cssfile][1])
+
+        # a text change invalidate the precompiled table
+        text = '.compiled { bg-color: rgba(0, 255, 0, 255); }'
+        css3, deferred3 = colors.css_get_compiled(cssfile, text)
+        test(css3['.compiled']['bg-color'] == [0.0, 1.0, 0.0, 1.0])
+        colors._css_cache = None
+        css4, deferred4 = colors.css_get_compiled(cssfile, text)
+        test(css4 == css3)
+    finally:
+        colors._css_cache_fn, colors._css_cache = cache_fn, cache
+        shutil.rmtree(tmpdir)
+
+def unittest_css_reload_batch():
+    import_pymt_no_window()
+    import os
+    import shutil
+    import tempfile
+    import weakref
+    from pymt import MTWidget, getClock
+    from pymt.ui import colors
+
+    class ReloadWidget(MTWidget):
+        def __init__(self, **kwargs):
+            self.reloaded = 0
+            super(ReloadWidget, self).__init__(**kwargs)
+            self.reloaded = 0
+        def reload_css(self):
+            self.reloaded += 1
+            super(ReloadWidget, self).reload_css()
+
+    tmpdir = tempfile.mkdtemp()
+    cssfile = os.path.join(tmpdir, 'reload.css')
+    source = (colors.css_add_file, (cssfile, ))
+    batch = colors.css_reload_batch
+    try:
+        with open(cssfile, 'w') as fd:
+            fd.write('.reloada { bg-color: rgba(255, 0, 0, 255); }\n'
+                     '.reloadb { bg-color: rgba(0, 255, 0, 255); }\n')
+        colors.css_add_file(cssfile)
+        a1 = ReloadWidget(cls='reloada')
+        a2 = ReloadWidget(cls='reloada')
+        b = ReloadWidget(cls='reloadb')
+        dead = ReloadWidget(cls='reloada')
+        test(a1.style['bg-color'] == [1.0, 0.0, 0.0, 1.0])
+        test(a2.style['bg-color'] == [1.0, 0.0, 0.0, 1.0])
+        test(b.style['bg-color'] == [0.0, 1.0, 0.0, 1.0])
+        test(dead.style['bg-color'] == [1.0, 0.0, 0.0, 1.0])
+        ref = weakref.ref(dead)
+        test(ref in colors._css_widgets)
+        del dead
+        test(ref() is None)
+
+        # change only the .reloada rule
+        with open(cssfile, 'w') as fd:
+            fd.write('.reloada { bg-color: rgba(0, 0, 255, 255); }\n'
+                     '.reloadb { bg-color: rgba(0, 255, 0, 255); }\n')
+        colors.css_reload_batch = 1
+        colors.css_reload(batch=True)
+        test(ref not in colors._css_widgets)
+        test(a1.reloaded + a2.reloaded == 1)
+        test(len(colors._css_pending) == 1)
+        colors._css_reload_step()
+        test(a1.reloaded == 1 and a2.reloaded == 1)
+        test(b.reloaded == 0)
+        test(a1.style['bg-color'] == [0.0, 0.0, 1.0, 1.0])
+        test(b.style['bg-color'] == [0.0, 1.0, 0.0, 1.0])
+    finally:
+        getClock().unschedule(colors._css_reload_step)
+        colors.css_reload_batch = batch
+        if source in colors._css_sources:
+            colors._css_sources.remove(source)
+        shutil.rmtree(tmpdir)
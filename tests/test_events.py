@@ -71,3 +71,31 @@ def unittest_dispatcher():
     test('nohandler' and not testpass)
 
 
+
+def unittest_class_events():
+    import_pymt_no_window()
+    from pymt import MTWidget
+
+    class MyWidget(MTWidget):
+        __events__ = ('on_test', )
+        def on_test(self, *largs):
+            pass
+
+    a = MyWidget()
+    b = MyWidget()
+    test('on_test' in a.event_types)
+    test('on_touch_down' in a.event_types)
+    test(a._event_types is b._event_types)
+
+    # dynamic registration is per instance
+    a.on_other = lambda *largs: None
+    a.register_event_type('on_other')
+    test('on_other' in a.event_types)
+    test('on_other' not in b.event_types)
+
+    # visibility remove touch/draw events only for this instance
+    b.visible = False
+    test('on_touch_down' not in b.event_types)
+    test('on_touch_down' in MyWidget().event_types)
+    b.visible = True
+    test('on_touch_down' in b.event_types)
@@ -0,0 +1,43 @@
+'''
+File browser
+'''
+
+from init import test, import_pymt_no_window
+
+def unittest_filebrowser_listing():
+    import_pymt_no_window()
+    import os
+    import shutil
+    import tempfile
+    from pymt import MTFileBrowserView, MTFileListEntryView
+    from pymt.ui.widgets.composed.filebrowser import scan_directory
+
+    path = tempfile.mkdtemp()
+    try:
+        for name in ('b.txt', 'a.png', '.hidden'):
+            open(os.path.join(path, name), 'w').close()
+        os.mkdir(os.path.join(path, 'dir'))
+
+        # entries are sorted, and the listing is reused if not modified
+        result = scan_directory(path)
+        test(result[1] == [('.hidden', False), ('a.png', False),
+                           ('b.txt', False), ('dir', True)])
+        test(scan_directory(path, result) is result)
+
+        # parent, directories, then files
+        view = MTFileBrowserView(path=path, async=False)
+        test(not view.loading)
+        test([x.label_txt for x in view.children] ==
+             ['..', 'dir', 'a.png', 'b.txt'])
+        test(view.entries_count == 3)
+
+        view = MTFileBrowserView(path=path, async=False, filters=['.*txt'])
+        test([x.label_txt for x in view.children] == ['..', 'dir', 'b.txt'])
+
+        view = MTFileBrowserView(path=path, async=False,
+                                 view=MTFileListEntryView)
+        test([x.label_txt for x in view.children] ==
+             ['..', 'dir', 'a.png', 'b.txt'])
+        test(view.children[0].font_size == view.children[0].style['font-size'])
+    finally:
+        shutil.rmtree(path)
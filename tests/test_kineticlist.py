@@ -0,0 +1,70 @@
+'''
+Kinetic list
+'''
+
+from init import test, import_pymt_no_window
+
+def unittest_kineticlist_virtual():
+    import_pymt_no_window()
+    from pymt import MTKineticList, KineticListAdapter
+
+    adapter = KineticListAdapter(data=['item %d' % x for x in xrange(10000)],
+                                 item_size=(100, 40))
+    klist = MTKineticList(adapter=adapter, size=(400, 600), padding_y=4,
+                          searchable=False, deletable=False)
+    klist.do_layout()
+
+    # only the visible items have a view
+    views = klist._virtual_views
+    test(len(views) < 30)
+    test(klist._last_content_size == 10000 * 44)
+    test(views[0].label == 'item 0')
+
+    # views are recycled when scrolling
+    count = len(views)
+    klist.yoffset = -200000
+    klist.do_layout()
+    test(0 not in views)
+    test(len(views) + len(klist._virtual_recycled) <= count * 2)
+    index = min(views)
+    test(views[index].label == 'item %d' % index)
+
+    # data changed
+    adapter.data = adapter.data[:5]
+    klist.refresh()
+    klist.yoffset = 0
+    klist.do_layout()
+    test(len(klist._virtual_views) == 5)
+
+def unittest_kineticlist_search():
+    import_pymt_no_window()
+    from pymt import MTKineticList, MTKineticItem
+
+    klist = MTKineticList(searchable=False, deletable=False)
+    items = [MTKineticItem(label='item %d' % x, deletable=False)
+             for x in xrange(100)]
+    for item in items:
+        klist.add_widget(item)
+
+    klist.search('item 1', 'label')
+    test(list(klist.children) == [x for x in items if 'item 1' in x.label])
+    klist.search('item 12', 'label')
+    test(list(klist.children) == [items[12]])
+
+    # index updated with the children
+    klist.remove_widget(items[12])
+    klist.search('item 12', 'label')
+    test(len(klist.children) == 0)
+    item = MTKineticItem(label='item 120', deletable=False)
+    klist.add_widget(item)
+    klist.search('item 12', 'label')
+    test(list(klist.children) == [item])
+
+    # attribute changed
+    items[5].label = 'other'
+    klist.reindex(items[5])
+    klist.search('oth', 'label')
+    test(list(klist.children) == [items[5]])
+
+    klist.endsearch()
+    test(len(klist.children) == 100)
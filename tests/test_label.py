@@ -0,0 +1,176 @@
+'''
+Core label tests
+'''
+
+from init import test, import_pymt_no_window
+
+def unittest_label_layout_shared():
+    import_pymt_no_window()
+    from pymt import Label
+    a = Label('hello world', size=(50, None))
+    b = Label('hello world', size=(50, None))
+    test(a.get_layout() is b.get_layout())
+    c = Label('hello world', size=(100, None))
+    test(a.get_layout() is not c.get_layout())
+
+def unittest_label_layout_append():
+    import_pymt_no_window()
+    from pymt import Label, Cache
+    a = Label('hello world', size=(50, None))
+    a.label = 'hello world, how are you ?'
+    lines = a.get_layout().lines
+    Cache.remove('pymt.textlayout')
+    b = Label('hello world, how are you ?', size=(50, None))
+    test(b.get_layout().lines == lines)
+    test(a.size == b.size)
+
+def unittest_label_async():
+    import_pymt_no_window()
+    from pymt import Label
+    a = Label('hello async', async=True)
+    b = Label('hello async')
+    test(a.size == b.size)
+    test(a.content_size == b.content_size)
+
+def unittest_label_async_render():
+    import_pymt_no_window()
+    import time
+    from pymt import Label
+    from pymt.core.text import _async_upload
+    a = Label('hello async render', async=True, padding=4)
+    size = a.size
+    for x in xrange(100):
+        _async_upload(0)
+        if a.is_rendered:
+            break
+        time.sleep(.01)
+    test(a.is_rendered)
+    test(a.size == size)
+    test(a.texture.size == (size[0] - 8, size[1] - 8))
+
+def unittest_label_async_refresh():
+    import_pymt_no_window()
+    import time
+    import threading
+    from pymt import Label
+    started = threading.Event()
+    release = threading.Event()
+    a = Label('slow', async=True)
+    render_layout = a._render_layout
+    def _render_layout(layout, size, options):
+        started.set()
+        release.wait(2)
+        return render_layout(layout, size, options)
+    a._render_layout = _render_layout
+    a.label = 'slow async label'
+    test(started.wait(2))
+
+    # measuring a label doesn't wait for the rasterization of another one
+    start = time.time()
+    b = Label('not blocked', async=True)
+    test(time.time() - start < 1)
+    release.set()
+
+def unittest_label_async_markup():
+    import_pymt_no_window()
+    from pymt.core.text.markup import MarkupLabel
+    a = MarkupLabel('[b]hello[/b] async', async=True)
+    test(a.is_rendered)
+
+def unittest_markup_parse():
+    import_pymt_no_window()
+    from pymt.core.text.markup import parse_markup
+    spans = parse_markup('a[b]b[i]c[/b]d[/i]e')
+    test(spans[0] == ((), 'a'))
+    test(spans[1] == ((('bold', True), ), 'b'))
+    test(spans[2] == ((('bold', True), ('italic', True)), 'c'))
+    test(spans[3] == ((('italic', True), ), 'd'))
+    test(spans[4] == ((), 'e'))
+
+def unittest_labelstrip_glyphs():
+    import_pymt_no_window()
+    from pymt import LabelStrip, Cache
+    a = LabelStrip('1.00', font_size=10)
+    b = LabelStrip('0.01', font_size=10)
+    c = LabelStrip('0.01', font_size=11)
+    test(a.get_glyph('1') is b.get_glyph('1'))
+    test(a.get_glyph('0') is not c.get_glyph('0'))
+    w, h = a.content_size
+    test(w == sum([a.get_glyph(x).content_width for x in '1.00']))
+    test(h == a.get_glyph('1').content_height)
+    glyph = a.get_glyph('1')
+    Cache.remove('pymt.labelstrip')
+    test(a.get_glyph('1') is not glyph)
+    test(a.get_glyph('1') is b.get_glyph('1'))
+
+def unittest_labelhandle_update():
+    import_pymt_no_window()
+    from pymt import LabelHandle, LabelStrip, Cache, getLabel
+    handle = LabelHandle('score: 0', font_size=10)
+    obj = handle.obj
+    count = len(Cache._objects['pymt.label'])
+    for x in xrange(10):
+        handle.label = 'score: %d' % x
+    test(handle.obj is obj)
+    test(handle.label == 'score: 9')
+    test(len(Cache._objects['pymt.label']) == count)
+    test(handle.content_size == getLabel('score: 9', font_size=10).content_size)
+    handle = LabelHandle('1.00', font_size=10, strip=True)
+    test(isinstance(handle.obj, LabelStrip))
+    handle.label = '2.50'
+    test(handle.content_size == handle.obj.content_size)
+
+def unittest_markup_render_region():
+    import_pymt_no_window()
+    from pymt import Cache
+    from pymt.core.text.markup import MarkupLabel
+    Cache.remove('pymt.markupspan')
+    a = MarkupLabel('[b]hello[/b] world', size=(200, None))
+    # measure and real pass share the span layouts
+    test(len(Cache._objects['pymt.markupspan']) == 2)
+    texture = a.texture
+    rendered = []
+    render_text = a._render_text
+    def _render_text(context, text, x, y):
+        rendered.append(text)
+        render_text(context, text, x, y)
+    a._render_text = _render_text
+    a.label = '[b]hellx[/b] world'
+    test(a.texture is texture)
+    test('x' in rendered)
+    test('w' not in rendered and 'd' not in rendered)
+
+def unittest_fonts_index():
+    import_pymt_no_window()
+    import os
+    import shutil
+    import tempfile
+    import pymt
+    from pymt.core.text.fonts import FontRegistry, read_font_info
+    filename = os.path.join(pymt.pymt_data_dir, 'DejaVuSans.ttf')
+    info = read_font_info(filename)
+    test(info['family'] == 'DejaVu Sans')
+    test(not info['bold'] and not info['italic'])
+    test(info['units_per_em'] > 0)
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        index = os.path.join(tmpdir, 'fonts.idx')
+        fontdir = os.path.join(tmpdir, 'fonts')
+        os.mkdir(fontdir)
+        a = FontRegistry(filename=index, dirs=[pymt.pymt_data_dir, fontdir])
+        test(a.get_filename('DejaVu Sans') == filename)
+        # the next directories are not needed to find the font
+        test(fontdir not in a._index)
+        test(os.path.exists(index))
+
+        # the index is reused, without scanning again
+        scanned = []
+        b = FontRegistry(filename=index, dirs=[pymt.pymt_data_dir, fontdir])
+        b._scan_dir = lambda path: scanned.append(path) or ([], {})
+        test(b.find_file('DejaVuSans.ttf') == info)
+        test(scanned == [])
+        test(b.fonts == a.fonts)
+        test(scanned == [fontdir])
+    finally:
+        shutil.rmtree(tmpdir)
@@ -127,3 +127,46 @@ def _test_boxlayout(orientation):
         test(sw(m.children[0].pos) == (255, 10))
         test(sw(m.children[1].pos) == (10, 10))
 
+
+def unittest_layout_invalidation():
+    import_pymt_no_window()
+    from pymt import MTBoxLayout, MTWidget
+
+    root = MTBoxLayout()
+    child = MTBoxLayout()
+    root.add_widget(child)
+    root.dispatch_event('on_update')
+    test(not root.need_update and not child.need_update)
+
+    # a change in a child layout is propagated up to the root
+    child.add_widget(MTWidget(size=(50, 50)))
+    test(root.need_update)
+    root.dispatch_event('on_update')
+    test(not root.need_update and not child.need_update)
+    test(tuple(root.size) == (50, 50))
+
+    # moving a child layout don't invalidate the parents
+    child.pos = (10, 10)
+    test(child.need_update)
+    test(not root.need_update)
+    root.dispatch_event('on_update')
+    test(not child.need_update)
+
+def unittest_gridlayout():
+    import_pymt_no_window()
+    from pymt import MTGridLayout, MTWidget
+
+    m = MTGridLayout(cols=2)
+    for x in xrange(4):
+        m.add_widget(MTWidget(size=(10, 10)))
+    m.add_widget(MTWidget(size=(5, 5), size_hint=(1, None)))
+    m.do_layout()
+
+    # columns and rows take the size of their biggest child
+    test(tuple(m.size) == (23, 29))
+    test(tuple(m.children[0].pos) == (1, 18))
+    test(tuple(m.children[1].pos) == (12, 18))
+    test(tuple(m.children[3].pos) == (12, 7))
+    # size hint stretch the child to the column width
+    test(tuple(m.children[4].pos) == (1, 1))
+    test(tuple(m.children[4].size) == (10, 5))
@@ -16,6 +16,17 @@ def unittest_defaults():
     test(w.draw_children == True)
     test(w.cls == '')
 
+def unittest_lazy_children():
+    import_pymt_no_window()
+    from pymt import MTWidget
+    w = MTWidget()
+    w.dispatch_event('on_update')
+    test(w._children is None)
+    test(len(w.children) == 0)
+    c = MTWidget()
+    w.add_widget(c)
+    test(w.children == [c])
+
 def unittest_visible_methods():
     import_pymt_no_window()
     from pymt import MTWidget
@@ -99,3 +110,261 @@ def unittest_coordinate_transform():
     # 100, 100 relative coordinate from child2 is 400, 400 in screen coordinate
     test(child2.to_window(100, 100, relative=True) == (400, 400))
 
+
+def unittest_spatial_index():
+    import_pymt_no_window()
+    from pymt import MTWidget
+
+    class Touch(object):
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+
+    touched = []
+    class Child(MTWidget):
+        def on_touch_down(self, touch):
+            touched.append(self)
+
+    w = MTWidget(spatial_index=64)
+    a = Child(pos=(0, 0), size=(100, 100))
+    b = Child(pos=(50, 50), size=(100, 100))
+    c = Child(pos=(500, 500), size=(100, 100))
+    for x in (a, b, c):
+        w.add_widget(x)
+
+    # only the children under the touch, from front to back
+    w.on_touch_down(Touch(75, 75))
+    test(touched == [b, a])
+
+    # position update
+    del touched[:]
+    c.pos = (60, 60)
+    w.on_touch_down(Touch(75, 75))
+    test(touched == [c, b, a])
+
+    del touched[:]
+    w.remove_widget(b)
+    w.on_touch_down(Touch(75, 75))
+    test(touched == [c, a])
+
+def unittest_cached_transform():
+    import_pymt_no_window()
+    from pymt import MTWidget, MTScatter
+
+    root = MTWidget()
+    scatter = MTScatter(pos=(100, 100))
+    child = MTWidget()
+    root.add_widget(scatter)
+    scatter.add_widget(child)
+
+    test(child.to_widget(150, 150) == (50, 50))
+    test(child.to_window(50, 50) == (150, 150))
+    test(child.to_widget_points([(150, 150), (100, 100)]) == [(50, 50), (0, 0)])
+
+    # cached transformation must follow the scatter
+    scatter.pos = (200, 200)
+    test(child.to_widget(250, 250) == (50, 50))
+    test(child.to_window(50, 50) == (250, 250))
+
+    # and the parent
+    scatter.remove_widget(child)
+    test(child.to_widget(250, 250) == (250, 250))
+
+def unittest_scatter_affine():
+    import_pymt_no_window()
+    from pymt import MTScatter
+
+    s = MTScatter(size=(100, 100))
+    s.scale = 2
+    s.rotation = 90
+    test(abs(s.scale - 2) < 1e-6)
+    test(abs(s.rotation - 90) < 1e-6)
+
+    # the matrix and the affine must match
+    m = s.transform
+    x, y = s.to_parent(10, 20)
+    test(abs(m[0][0] * 10 + m[0][1] * 20 + m[0][3] - x) < 1e-6)
+    test(abs(m[1][0] * 10 + m[1][1] * 20 + m[1][3] - y) < 1e-6)
+    x, y = s.to_local(x, y)
+    test(abs(x - 10) < 1e-6 and abs(y - 20) < 1e-6)
+
+def unittest_culling():
+    import_pymt_no_window()
+    from pymt import MTWidget, MTScatter, culling_push, culling_pop
+
+    root = MTWidget()
+    inside = MTWidget(pos=(10, 10))
+    outside = MTWidget(pos=(500, 500))
+    scatter = MTScatter(size=(100, 100))
+    scatter.scale = 10
+    root.add_widgets(inside, outside, scatter)
+
+    # no visible area, no culling
+    test(not outside.is_culled())
+
+    culling_push(((0, 0), (200, 200)))
+    test(not inside.is_culled())
+    test(outside.is_culled())
+    # the scatter bounding box include the transformation
+    test(not scatter.is_culled())
+    outside.draw_culling = False
+    test(not outside.is_culled())
+    outside.draw_culling = True
+
+    # culling can be disabled for nested drawing
+    culling_push(None)
+    test(not outside.is_culled())
+    culling_pop()
+    culling_pop()
+
+def unittest_texture_cache():
+    import_pymt_no_window()
+    from pymt import MTWidget
+
+    panel = MTWidget(cache_as_texture=True)
+    child = MTWidget()
+    panel.add_widget(child)
+    test(panel.cache_as_texture)
+
+    cache = panel._texture_cache
+    cache.dirty = False
+    child.pos = (20, 20)
+    test(cache.dirty)
+
+    cache.dirty = False
+    child.visible = False
+    test(cache.dirty)
+
+    # the style is copied on the first change, then changed in place
+    for x in xrange(2):
+        cache.dirty = False
+        child.style['bg-color'] = (x, 0, 0, 1)
+        test(cache.dirty)
+
+    panel.cache_as_texture = False
+    test(not panel.cache_as_texture)
+
+def unittest_retained_default():
+    import_pymt_no_window()
+    from pymt import MTWidget, MTButton
+
+    class Custom(MTButton):
+        def draw(self):
+            pass
+
+    # retained drawing is safe only if the drawing properties are declared
+    test(MTButton._retained_default)
+    test(not Custom._retained_default)
+    w = MTWidget(retained=True)
+    test(w.retained)
+    for x in xrange(2):
+        w._retained.dirty = False
+        w.style['bg-color'] = (x, 0, 0, 1)
+        test(w._retained.dirty)
+    w.retained = False
+    test(not w.retained)
+
+def unittest_retained_async_label():
+    import_pymt_no_window()
+    import time
+    from pymt import MTLabel
+    from pymt.core.text import _async_upload
+
+    w = MTLabel(label='hello retained', async=True, retained=True)
+    recorded = []
+    draw = w.draw
+    def record():
+        draw()
+        recorded.append(w.label_obj.is_rendered)
+    w.draw = record
+
+    # the placeholder is drawn, but the drawing is not kept
+    w.dispatch_event('on_draw')
+    test(recorded == [False])
+    test(w._retained.dirty)
+
+    # recorded again once the texture is uploaded, then replayed
+    for x in xrange(100):
+        _async_upload(0)
+        if w.label_obj.is_rendered:
+            break
+        time.sleep(.01)
+    w.dispatch_event('on_draw')
+    test(recorded[-1])
+    count = len(recorded)
+    w.dispatch_event('on_draw')
+    test(len(recorded) == count)
+
+def unittest_widget_pool():
+    import_pymt_no_window()
+    from pymt import MTWidget, WidgetPool
+
+    pool = WidgetPool()
+    root = MTWidget()
+    w = pool.acquire(MTWidget, cls='item', size=(50, 50))
+    w.add_widget(MTWidget())
+    w.push_handlers(on_touch_down=lambda touch: True)
+    w.visible = False
+    root.add_widget(w)
+
+    test(pool.release(w))
+    test(len(pool) == 1)
+    test(w.parent is None)
+    test(w not in root.children)
+    test(len(w.children) == 0)
+    test(w.visible)
+    test(w._event_stack is None)
+
+    # reused only for the same class and css class
+    test(pool.acquire(MTWidget, cls='other') is not w)
+    w2 = pool.acquire(MTWidget, cls='item', pos=(10, 20))
+    test(w2 is w)
+    test(w2.pos == (10, 20))
+    test(len(pool) == 0)
+
+def unittest_widget_pool_animation():
+    import_pymt_no_window()
+    from pymt import MTWidget, WidgetPool, Animation, Repeat, getClock
+
+    pool = WidgetPool()
+    move = Animation(duration=1, x=100)
+    sequence = Animation(duration=1, y=100) + Animation(duration=1, x=100)
+    repeat = Repeat(Animation(duration=1, x=10, type='delta'), times=3)
+    w = pool.acquire(MTWidget)
+    for animation in (move, sequence, repeat):
+        w.do(animation)
+
+    # released while animating: nothing left in the animations
+    test(pool.release(w))
+    test(w not in move.children)
+    test(w not in sequence.animations[0].children)
+    test(w not in repeat.animations.children)
+    getClock().tick()
+    test(w.x == 0)
+
+    # the same animation can be applied again once reused
+    w = pool.acquire(MTWidget)
+    test(w.do(move) is not None)
+    test(w in move.children)
+
+def unittest_lazy_style():
+    import_pymt_no_window()
+    from pymt import MTWidget, MTButton, css_get_style
+
+    root = MTWidget()
+    children = [MTWidget(cls='item') for x in xrange(10)]
+    root.add_widgets(*children)
+
+    # style is resolved on first access, for all the siblings
+    test(children[0]._style is None)
+    test(children[0].style == css_get_style(children[0]))
+    test(children[-1]._style is not None)
+
+    # inline style is still applied
+    w = MTWidget(style={'bg-color': (1, 0, 0, 1)})
+    test(w.style['bg-color'] == (1, 0, 0, 1))
+
+    # labels derive attributes from their style, resolved immediately
+    button = MTButton()
+    test(button._style is not None)
+    test(button.color == button.style['color'])
+    test(button.font_size == button.style['font-size'])